@@ -368,9 +368,9 @@ exports.processWalletTopUp = functions.region('us-central1').https.onCall(async
         const PAYPAL_CLIENT_ID = process.env.PAYPAL_CLIENT_ID || '';
         const PAYPAL_CLIENT_SECRET = process.env.PAYPAL_CLIENT_SECRET || '';
         const PAYPAL_ENV = process.env.PAYPAL_ENV || 'sandbox';
-        const PAYPAL_BASE_URL = PAYPAL_ENV === 'production'
+        const PAYPAL_BASE_URL = process.env.PAYPAL_API_BASE_URL || (PAYPAL_ENV === 'production'
             ? 'https://api-m.paypal.com'
-            : 'https://api-m.sandbox.paypal.com';
+            : 'https://api-m.sandbox.paypal.com');
         const auth = Buffer.from(`${PAYPAL_CLIENT_ID}:${PAYPAL_CLIENT_SECRET}`).toString('base64');
         const tokenResponse = await fetch(`${PAYPAL_BASE_URL}/v1/oauth2/token`, {
             method: 'POST',
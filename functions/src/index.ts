@@ -11,6 +11,7 @@
  * - PAYPAL_CLIENT_ID: PayPal REST API Client ID
  * - PAYPAL_CLIENT_SECRET: PayPal REST API Client Secret
  * - PAYPAL_ENV: 'sandbox' or 'production'
+ * - PAYPAL_API_BASE_URL (optional): overrides the PayPal API host, e.g. a local stand-in
  */
 
 import * as functions from 'firebase-functions';
@@ -499,9 +500,9 @@ export const processWalletTopUp = functions.region('us-central1').https.onCall(a
     const PAYPAL_CLIENT_ID = process.env.PAYPAL_CLIENT_ID || '';
     const PAYPAL_CLIENT_SECRET = process.env.PAYPAL_CLIENT_SECRET || '';
     const PAYPAL_ENV = process.env.PAYPAL_ENV || 'sandbox';
-    const PAYPAL_BASE_URL = PAYPAL_ENV === 'production' 
+    const PAYPAL_BASE_URL = process.env.PAYPAL_API_BASE_URL || (PAYPAL_ENV === 'production' 
       ? 'https://api-m.paypal.com'
-      : 'https://api-m.sandbox.paypal.com';
+      : 'https://api-m.sandbox.paypal.com');
 
     const auth = Buffer.from(`${PAYPAL_CLIENT_ID}:${PAYPAL_CLIENT_SECRET}`).toString('base64');
     const tokenResponse = await fetch(
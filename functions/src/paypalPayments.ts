@@ -12,9 +12,10 @@ const db = admin.firestore();
 const PAYPAL_CLIENT_ID = process.env.PAYPAL_CLIENT_ID || 'AV_tLDGMXIHhXnRCrDuX-Nb-2Wa-hEWjAkTj5ssXye5oTJeDZzTQqQym3UgFe-gOZDaQ1Fn-t8YPvfkx';
 const PAYPAL_CLIENT_SECRET = process.env.PAYPAL_CLIENT_SECRET || 'EBY2ts8baThwt97plOoNWxeryVxWHXEe-ANWAexRZ7zq1sfq-qIa90XNhC5JExAaFGTvrF_TT2hqwzj0';
 const PAYPAL_ENV = process.env.PAYPAL_ENV || 'sandbox';
-const PAYPAL_BASE_URL = PAYPAL_ENV === 'production' 
+// PAYPAL_API_BASE_URL points the functions at a local PayPal stand-in for offline runs
+const PAYPAL_BASE_URL = process.env.PAYPAL_API_BASE_URL || (PAYPAL_ENV === 'production' 
   ? 'https://api-m.paypal.com'
-  : 'https://api-m.sandbox.paypal.com';
+  : 'https://api-m.sandbox.paypal.com');
 
 /**
  * Exchange PayPal OAuth authorization code for access token
@@ -0,0 +1,5 @@
+"""Performance and reliability harness for the TestSprite browser suite.
+
+The TC scripts in the parent directory stay self-contained; the modules here
+are run from ``testsprite_tests/`` with ``python -m harness.<module>``.
+"""
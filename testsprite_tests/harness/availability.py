@@ -0,0 +1,297 @@
+"""Stress harness for ``src/lib/availabilityUtils.ts``.
+
+Generates listings with long blocked-date calendars and many bookings, runs
+``isListingAvailableForDates`` and ``hasPartialAvailability`` inside one
+persistent page (imported through the Vite dev server) in batched evaluate
+calls, and checks every answer against a Python reference implementation.
+
+    cd testsprite_tests
+    python -m harness.availability --listings 5000 --blocked-ranges 200 --bookings 200
+
+The page runs in UTC: the app builds date keys with ``toISOString()`` after
+``setHours(0, 0, 0, 0)``, so in zones east of UTC every key shifts back a day.
+Pass ``--timezone Asia/Manila --utc-offset-minutes 480`` to reproduce that.
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from . import browser, reporting
+
+MODULE_PATH = "/src/lib/availabilityUtils.ts"
+
+# (checkIn, checkOut) as YYYY-MM-DD strings
+DateRange = Tuple[str, str]
+
+
+@dataclass
+class CalendarCase:
+    """One generated listing plus the date ranges to query against it."""
+
+    listing_id: str
+    blocked_dates: List[str]
+    available_dates: List[str]
+    confirmed: List[DateRange]
+    pending: List[DateRange]
+    queries: List[DateRange] = field(default_factory=list)
+
+    def to_js(self) -> Dict[str, Any]:
+        return {
+            "id": self.listing_id,
+            "blockedDates": self.blocked_dates,
+            "availableDates": self.available_dates,
+            "confirmed": self.confirmed,
+            "pending": self.pending,
+            "queries": self.queries,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Python reference implementation
+# ---------------------------------------------------------------------------
+
+def _day(value: str, utc_offset_minutes: int = 0) -> date:
+    # new Date("YYYY-MM-DD") is UTC midnight; setHours(0) then snaps to that local day
+    utc_midnight = datetime.fromisoformat(value[:10])
+    return (utc_midnight + timedelta(minutes=utc_offset_minutes)).date()
+
+
+def _key(day: date, utc_offset_minutes: int) -> str:
+    # Local midnight expressed in UTC, which is what toISOString() formats
+    local_midnight = datetime(day.year, day.month, day.day)
+    return (local_midnight - timedelta(minutes=utc_offset_minutes)).date().isoformat()
+
+
+class ReferenceCalendar:
+    """Set-based mirror of the checks in availabilityUtils.ts.
+
+    Requested ranges include the check-out day and bookings block both of their
+    endpoints, exactly like the TypeScript loop over ``generateDateRange``.
+    """
+
+    def __init__(self, case: CalendarCase, utc_offset_minutes: int = 0):
+        self.offset = utc_offset_minutes
+        self.blocked: Set[str] = set(case.blocked_dates)
+        self.available: Optional[Set[str]] = set(case.available_dates) if case.available_dates else None
+        self.booked: Set[date] = set()
+        for check_in, check_out in list(case.confirmed) + list(case.pending):
+            current, end = _day(check_in, self.offset), _day(check_out, self.offset)
+            while current <= end:
+                self.booked.add(current)
+                current += timedelta(days=1)
+
+    def _is_free(self, day: date) -> bool:
+        key = _key(day, self.offset)
+        if key in self.blocked:
+            return False
+        if self.available is not None and key not in self.available:
+            return False
+        return day not in self.booked
+
+    def _days(self, check_in: str, check_out: str) -> Optional[List[date]]:
+        start, end = _day(check_in, self.offset), _day(check_out, self.offset)
+        if end <= start:
+            return None
+        return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+    def is_available(self, check_in: str, check_out: str) -> bool:
+        days = self._days(check_in, check_out)
+        return days is not None and all(self._is_free(d) for d in days)
+
+    def has_partial(self, check_in: str, check_out: str) -> bool:
+        days = self._days(check_in, check_out)
+        return days is not None and any(self._is_free(d) for d in days)
+
+
+# ---------------------------------------------------------------------------
+# Data generation
+# ---------------------------------------------------------------------------
+
+def generate_cases(
+    count: int,
+    blocked_ranges: int,
+    bookings: int,
+    queries: int,
+    seed: int = 1,
+    horizon_days: int = 1825,
+    start: date = date(2025, 1, 1),
+) -> List[CalendarCase]:
+    rng = random.Random(seed)
+    cases: List[CalendarCase] = []
+
+    def random_range(max_len: int) -> Tuple[date, date]:
+        first = start + timedelta(days=rng.randrange(horizon_days))
+        return first, first + timedelta(days=rng.randint(0, max_len))
+
+    for index in range(count):
+        blocked: Set[str] = set()
+        for _ in range(blocked_ranges):
+            first, last = random_range(3)
+            while first <= last:
+                blocked.add(first.isoformat())
+                first += timedelta(days=1)
+
+        # Roughly one listing in five restricts itself to an explicit window
+        available: List[str] = []
+        if rng.random() < 0.2:
+            first, last = random_range(horizon_days // 2)
+            available = [(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+
+        booked = [random_range(7) for _ in range(bookings)]
+        split = rng.randint(0, len(booked))
+        confirmed = [(a.isoformat(), b.isoformat()) for a, b in booked[:split]]
+        pending = [(a.isoformat(), b.isoformat()) for a, b in booked[split:]]
+
+        ranges: List[DateRange] = []
+        for _ in range(queries):
+            check_in = start + timedelta(days=rng.randrange(horizon_days))
+            # A few inverted or zero-length ranges exercise the early return
+            nights = rng.randint(-1, 14)
+            ranges.append((check_in.isoformat(), (check_in + timedelta(days=nights)).isoformat()))
+
+        cases.append(CalendarCase(f"listing-{index:06d}", sorted(blocked), available, confirmed, pending, ranges))
+    return cases
+
+
+# ---------------------------------------------------------------------------
+# In-page runner
+# ---------------------------------------------------------------------------
+
+_LOAD_MODULE_JS = """
+async (path) => {
+  window.__harnessAvailability = await import(path);
+  return Object.keys(window.__harnessAvailability);
+}
+"""
+
+# Objects are built before the timer starts so only the two checks are measured
+_EVALUATE_BATCH_JS = """
+(cases) => {
+  const m = window.__harnessAvailability;
+  const toBooking = ([checkIn, checkOut]) => ({ checkIn, checkOut });
+  const prepared = cases.map((c) => ({
+    listing: { id: c.id, blockedDates: c.blockedDates, availableDates: c.availableDates },
+    confirmed: c.confirmed.map(toBooking),
+    pending: c.pending.map(toBooking),
+    queries: c.queries.map(([a, b]) => [new Date(a), new Date(b)]),
+  }));
+  const results = [];
+  const started = performance.now();
+  for (const p of prepared) {
+    for (const [checkIn, checkOut] of p.queries) {
+      const full = m.isListingAvailableForDates(p.listing, checkIn, checkOut, p.confirmed, p.pending);
+      const partial = m.hasPartialAvailability(p.listing, checkIn, checkOut, p.confirmed, p.pending);
+      results.push((full ? 1 : 0) | (partial ? 2 : 0));
+    }
+  }
+  return { results, elapsedMs: performance.now() - started };
+}
+"""
+
+
+def _batches(items: Sequence[CalendarCase], size: int):
+    for offset in range(0, len(items), size):
+        yield items[offset:offset + size]
+
+
+async def run(args: argparse.Namespace) -> int:
+    cases = generate_cases(args.listings, args.blocked_ranges, args.bookings, args.queries,
+                           seed=args.seed, horizon_days=args.horizon_days)
+
+    ref_started = time.perf_counter()
+    expected: List[int] = []
+    for case in cases:
+        calendar = ReferenceCalendar(case, args.utc_offset_minutes)
+        for check_in, check_out in case.queries:
+            expected.append(int(calendar.is_available(check_in, check_out)) | (int(calendar.has_partial(check_in, check_out)) << 1))
+    ref_ms = (time.perf_counter() - ref_started) * 1000
+
+    session = await browser.open_session(timezone_id=args.timezone)
+    try:
+        await browser.goto(session.page, "/")
+        await session.page.evaluate(_LOAD_MODULE_JS, args.module_path)
+
+        actual: List[int] = []
+        batch_ms: List[float] = []
+        in_page_ms = 0.0
+        wall_started = time.perf_counter()
+        for batch in _batches(cases, args.batch_size):
+            started = time.perf_counter()
+            result = await session.page.evaluate(_EVALUATE_BATCH_JS, [c.to_js() for c in batch])
+            batch_ms.append((time.perf_counter() - started) * 1000)
+            actual.extend(result["results"])
+            in_page_ms += result["elapsedMs"]
+        wall_ms = (time.perf_counter() - wall_started) * 1000
+    finally:
+        await session.close()
+
+    mismatches = []
+    index = 0
+    for case in cases:
+        for check_in, check_out in case.queries:
+            if actual[index] != expected[index] and len(mismatches) < args.max_mismatches:
+                mismatches.append({
+                    "listingId": case.listing_id,
+                    "checkIn": check_in,
+                    "checkOut": check_out,
+                    "expected": {"available": bool(expected[index] & 1), "partial": bool(expected[index] & 2)},
+                    "actual": {"available": bool(actual[index] & 1), "partial": bool(actual[index] & 2)},
+                })
+            index += 1
+    mismatch_count = sum(1 for a, e in zip(actual, expected) if a != e)
+
+    checks = len(expected) * 2
+    throughput = checks / (in_page_ms / 1000) if in_page_ms else 0.0
+    payload = {
+        "listings": len(cases),
+        "blockedRangesPerListing": args.blocked_ranges,
+        "bookingsPerListing": args.bookings,
+        "queriesPerListing": args.queries,
+        "checks": checks,
+        "mismatches": mismatch_count,
+        "mismatchSamples": mismatches,
+        "inPageMs": in_page_ms,
+        "wallMs": wall_ms,
+        "referenceMs": ref_ms,
+        "checksPerSecond": throughput,
+        "batchMs": reporting.summarize(batch_ms),
+    }
+    path = reporting.write_report("availability_stress", payload)
+
+    print(f"{checks} checks over {len(cases)} listings: {throughput:,.0f} checks/s in page, "
+          f"{wall_ms:,.0f} ms wall, {mismatch_count} mismatches -> {path}")
+
+    if mismatch_count:
+        return 1
+    if args.min_throughput and throughput < args.min_throughput:
+        print(f"Throughput {throughput:,.0f} checks/s is below the floor of {args.min_throughput:,.0f}")
+        return 1
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--listings", type=int, default=2000)
+    parser.add_argument("--blocked-ranges", type=int, default=200)
+    parser.add_argument("--bookings", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=20, help="date ranges checked per listing")
+    parser.add_argument("--horizon-days", type=int, default=1825, help="calendar span the data is spread over")
+    parser.add_argument("--batch-size", type=int, default=100, help="listings per evaluate call")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timezone", default="UTC")
+    parser.add_argument("--utc-offset-minutes", type=int, default=0,
+                        help="offset of --timezone, used by the reference to mirror toISOString() keys")
+    parser.add_argument("--module-path", default=MODULE_PATH)
+    parser.add_argument("--min-throughput", type=float, default=0.0, help="fail below this many checks/s")
+    parser.add_argument("--max-mismatches", type=int, default=20, help="mismatch samples kept in the report")
+    return asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
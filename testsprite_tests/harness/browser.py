@@ -0,0 +1,56 @@
+"""Browser session helpers mirroring the setup in the generated TC scripts."""
+
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List, Optional
+
+from playwright import async_api
+
+from . import config
+
+# Callbacks applied to every context opened through ``open_session``
+ContextHook = Callable[[Any], Awaitable[None]]
+
+
+@dataclass
+class Session:
+    pw: Any
+    browser: Any
+    context: Any
+    page: Any
+    hooks: List[ContextHook] = field(default_factory=list)
+
+    async def close(self) -> None:
+        if self.context:
+            await self.context.close()
+        if self.browser:
+            await self.browser.close()
+        if self.pw:
+            await self.pw.stop()
+
+
+async def open_session(
+    hooks: Optional[List[ContextHook]] = None,
+    timezone_id: Optional[str] = None,
+    **context_options: Any,
+) -> Session:
+    """Start Playwright, launch Chromium and open one context with one page."""
+    pw = await async_api.async_playwright().start()
+    browser = await pw.chromium.launch(headless=config.HEADLESS, args=config.LAUNCH_ARGS)
+    if timezone_id:
+        context_options["timezone_id"] = timezone_id
+    context = await browser.new_context(**context_options)
+    context.set_default_timeout(config.DEFAULT_TIMEOUT_MS)
+    for hook in hooks or []:
+        await hook(context)
+    page = await context.new_page()
+    return Session(pw, browser, context, page, list(hooks or []))
+
+
+async def goto(page: Any, path: str, timeout: int = 10000) -> None:
+    """Navigate to an app route and wait for DOMContentLoaded like the TC scripts."""
+    url = path if path.startswith("http") else f"{config.BASE_URL}{path}"
+    await page.goto(url, wait_until="commit", timeout=timeout)
+    try:
+        await page.wait_for_load_state("domcontentloaded", timeout=3000)
+    except async_api.Error:
+        pass
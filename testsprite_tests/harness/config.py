@@ -0,0 +1,70 @@
+"""Shared settings for harness runs.
+
+Everything can be overridden from the environment so CI machines and local
+runs use the same code paths.
+"""
+
+import json
+import os
+from pathlib import Path
+
+# Root of the TestSprite suite (testsprite_tests/)
+SUITE_DIR = Path(__file__).resolve().parent.parent
+
+# Root of the web app (package.json, src/, functions/)
+APP_DIR = SUITE_DIR.parent
+
+# Where harness reports are written
+REPORT_DIR = Path(os.environ.get("HARNESS_REPORT_DIR", SUITE_DIR / "tmp" / "harness"))
+
+# Origin the generated TC scripts hard-code (the Vite dev server)
+DEV_SERVER_URL = "http://localhost:8080"
+
+# App under test; instrumented TC runs have DEV_SERVER_URL rewritten to this
+BASE_URL = os.environ.get("HARNESS_BASE_URL", DEV_SERVER_URL).rstrip("/")
+
+# Same launch arguments the generated TC scripts use
+LAUNCH_ARGS = [
+    "--window-size=1280,720",
+    "--disable-dev-shm-usage",
+    "--ipc=host",
+    "--single-process",
+]
+
+DEFAULT_TIMEOUT_MS = int(os.environ.get("HARNESS_DEFAULT_TIMEOUT_MS", "5000"))
+HEADLESS = os.environ.get("HARNESS_HEADLESS", "1") != "0"
+
+# Navigation-heavy routes exercised by TC018 and the dashboards
+KEY_ROUTES = [
+    "/",
+    "/login",
+    "/guest/browse",
+    "/guest/dashboard",
+    "/host/dashboard",
+    "/admin/dashboard",
+]
+
+# Routes whose pages redirect signed-out visitors to a login page, and the
+# step plan that signs in for them first
+LOGIN_PLANS = {
+    "/guest/dashboard": SUITE_DIR / "plans" / "guest_login.py",
+    "/host/": SUITE_DIR / "plans" / "host_login.py",
+    "/admin/": SUITE_DIR / "plans" / "admin_login.py",
+}
+
+
+def _default_project() -> str:
+    try:
+        rc = json.loads((APP_DIR / ".firebaserc").read_text(encoding="utf-8"))
+        return rc["projects"]["default"]
+    except (OSError, ValueError, KeyError):
+        return "demo-firebnb"
+
+
+# Firebase emulators (firebase.json, plus Functions in firebase.functions-bench.json);
+# the Firestore emulator shares port 8080 with the dev server there, so point one
+# of them elsewhere when running both
+FIREBASE_PROJECT = os.environ.get("GCLOUD_PROJECT", _default_project())
+FIRESTORE_EMULATOR_HOST = os.environ.get("FIRESTORE_EMULATOR_HOST", "127.0.0.1:8080")
+AUTH_EMULATOR_HOST = os.environ.get("FIREBASE_AUTH_EMULATOR_HOST", "127.0.0.1:9099")
+FUNCTIONS_EMULATOR_HOST = os.environ.get("FUNCTIONS_EMULATOR_HOST", "127.0.0.1:5001")
@@ -0,0 +1,684 @@
+"""Concurrency benchmarks for the app's Firestore transactions, on the emulator.
+
+Each scenario signs in a pool of client pages per role. A pool shares one
+context, so it shares one auth session, but every page has its own Firestore
+client. The pools import the app's own service modules through the Vite dev
+server and fire N calls at the same instant. The web SDK runs transactions
+optimistically: it reads, then commits with ``updateTime`` preconditions, and a
+commit that lost the race comes back 400/409 and is retried. Every
+``documents:commit`` the pages send is therefore one transaction attempt, and
+the commit log gives retries and the writes that actually landed.
+
+``wallet``: top-ups (``processWalletTopUp``), payments (``processBookingPayment``)
+and refunds (``processBookingRefund``) against one guest wallet. Payments run
+as the host, as in ``HostBookings``. The final centavo balance is checked
+against the start balance plus every committed operation.
+
+``booking``: N guests, each signed in to its own context, call ``createBooking``
+for overlapping dates on one fresh listing. ``validateBookingCreation`` reads
+first and ``addDoc`` writes afterwards, outside any transaction. Accepted
+bookings that overlap are double bookings. The ``sequential`` mode sends the
+same requests one at a time. It separates a race from validation that never
+rejects anything.
+
+``promo``: a listing gets a promo code with ``promoMaxUses``. N guests apply it
+at once (``validatePromoCode``, then ``createBooking`` with the discount). The
+host then confirms every booking at once, as ``HostBookings`` does:
+``updateBooking`` sets ``confirmed``, then ``processBookingPayment``
+re-validates the code. Only confirmed bookings count against the cap, so
+over-redemptions are confirmed bookings that kept the code beyond it. Firestore
+reads and writes per redemption come from ``firestore_traffic``.
+
+The app must talk to the emulators (``VITE_USE_EMULATORS=true``), and the
+sign-in plans' accounts must exist in the Auth emulator and in ``users``.
+
+    cd testsprite_tests
+    python -m harness.contention wallet --concurrency 1 5 10 25 50 --kinds topup payment refund mixed
+    python -m harness.contention wallet --clients 8 --concurrency 100 --kinds mixed
+    python -m harness.contention booking --concurrency 2 5 10 25 50 --modes concurrent sequential
+    python -m harness.contention promo --guests 10 50 100 --cap 5
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from . import browser, config, firestore_traffic, reporting, steps
+from .emulator import AuthEmulator, FirestoreEmulator, from_fields
+from .resources import ResourcePolicy
+
+GUEST_PLAN = config.SUITE_DIR / "plans" / "guest_login.py"
+HOST_PLAN = config.SUITE_DIR / "plans" / "host_login.py"
+WALLET_MODULE = "/src/lib/walletService.ts"
+PAYMENT_MODULE = "/src/lib/paymentService.ts"
+FIRESTORE_MODULE = "/src/lib/firestore.ts"
+PROMO_MODULE = "/src/lib/promoCodeService.ts"
+BENCH_PASSWORD = "12345abc"
+
+_COMMIT = re.compile(r"/documents:commit(\?|$)")
+
+# Polled by wait_for_function: authStateReady() can resolve before an in-flight
+# sign-in lands, so wait for currentUser itself
+_SIGNED_IN_JS = """
+async () => {
+  const { auth } = await import('/src/lib/firebase.ts');
+  return auth.currentUser ? auth.currentUser.uid : null;
+}
+"""
+
+# Every op waits for the shared start instant, so pages fire together. An op
+# calls ``module.fn(...args)``, or runs ``flow(modules, ...args)`` for multi-call flows
+_FIRE_JS = """
+async ({ ops, startAt }) => {
+  const modules = {};
+  for (const op of ops) {
+    for (const path of op.modules || [op.module]) {
+      modules[path] = modules[path] || await import(path);
+    }
+  }
+  await new Promise((resolve) => setTimeout(resolve, Math.max(0, startAt - Date.now())));
+  return Promise.all(ops.map(async (op) => {
+    const started = performance.now();
+    const startedAt = Date.now();
+    try {
+      const value = op.flow
+        ? await (0, eval)(op.flow)(modules, ...op.args)
+        : await modules[op.module][op.fn](...op.args);
+      return { tag: op.tag, kind: op.kind, ok: true, ms: performance.now() - started, startedAt, endedAt: Date.now(),
+               value: typeof value === 'string' || typeof value === 'number' ? value : null };
+    } catch (e) {
+      return { tag: op.tag, kind: op.kind, ok: false, error: String((e && e.message) || e).slice(0, 300),
+               ms: performance.now() - started, startedAt, endedAt: Date.now() };
+    }
+  }));
+}
+"""
+
+
+def centavos(php: float) -> int:
+    return int(round(php * 100))
+
+
+# ---------------------------------------------------------------------------
+# Client pools and the commit log
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Commit:
+    status: int
+    writes: List[Dict[str, Any]]
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200
+
+    @property
+    def conflicted(self) -> bool:
+        # FAILED_PRECONDITION / ABORTED: another commit changed a document this one read
+        return self.status in (400, 409)
+
+    def paths(self) -> List[str]:
+        return [w["update"]["name"].split("/documents/", 1)[1] for w in self.writes if "update" in w]
+
+    def fields(self, prefix: str) -> Dict[str, Any]:
+        """Fields written to the first document whose path starts with ``prefix``."""
+        for write in self.writes:
+            update = write.get("update")
+            if update and update["name"].split("/documents/", 1)[1].startswith(prefix):
+                return from_fields(update.get("fields", {}))
+        return {}
+
+
+class CommitLog:
+    """Transaction commits sent by every page of the contexts it is attached to."""
+
+    def __init__(self) -> None:
+        self.commits: List[Commit] = []
+
+    def attach(self, context: Any) -> None:
+        def on_response(response: Any) -> None:
+            request = response.request
+            if request.method == "POST" and _COMMIT.search(response.url):
+                try:
+                    writes = json.loads(request.post_data or "{}").get("writes", [])
+                except ValueError:
+                    writes = []
+                self.commits.append(Commit(response.status, writes))
+
+        context.on("response", on_response)
+
+    def mark(self) -> int:
+        return len(self.commits)
+
+    def since(self, mark: int) -> List[Commit]:
+        return self.commits[mark:]
+
+
+@dataclass
+class ClientPool:
+    role: str
+    uid: str
+    context: Any
+    pages: List[Any] = field(default_factory=list)
+
+
+async def _prepare(context: Any) -> None:
+    # Keep videos, fonts and map tiles off the wire; only Firestore traffic matters here
+    await ResourcePolicy("functional", test="contention").apply(context)
+
+
+async def signed_in_uid(page: Any) -> Optional[str]:
+    """The uid Firebase Auth settles on in ``page``, or None if nobody signs in in time."""
+    try:
+        handle = await page.wait_for_function(_SIGNED_IN_JS, timeout=config.DEFAULT_TIMEOUT_MS)
+    except Exception:
+        return None
+    return await handle.json_value()
+
+
+async def open_pool(session: browser.Session, role: str, plan: Union[Path, List[steps.Step]], size: int,
+                    log: CommitLog, first: bool = False) -> ClientPool:
+    """Sign in once with ``plan`` (a plan file or steps) and open ``size`` pages on that session."""
+    if first:
+        context, page = session.context, session.page
+    else:
+        context = await session.browser.new_context()
+        context.set_default_timeout(config.DEFAULT_TIMEOUT_MS)
+        for hook in session.hooks:
+            await hook(context)
+        page = await context.new_page()
+    log.attach(context)
+    compiled = steps.compile_plan(steps.load_steps(plan) if isinstance(plan, Path) else plan, name=f"{role}_login")
+    page = (await steps.execute(compiled, context, page))["page"]
+    uid = await signed_in_uid(page)
+    if not uid:
+        raise RuntimeError(f"{compiled.name} did not leave a signed-in {role}")
+    pool = ClientPool(role, uid, context, [page])
+    while len(pool.pages) < size:
+        extra = await context.new_page()
+        await browser.goto(extra, page.url)
+        if await signed_in_uid(extra) != uid:
+            raise RuntimeError(f"extra {role} page is not signed in as {uid}")
+        pool.pages.append(extra)
+    return pool
+
+
+def assign(pools: Dict[str, ClientPool], ops: List[Dict[str, Any]]) -> List[Tuple[Any, List[Dict[str, Any]]]]:
+    """Round-robin each role's ops over that role's pages."""
+    batches: Dict[int, Tuple[Any, List[Dict[str, Any]]]] = {}
+    sent: Counter = Counter()
+    for op in ops:
+        pages = pools[op.pop("role")].pages
+        page = pages[sent[id(pages)] % len(pages)]
+        sent[id(pages)] += 1
+        batches.setdefault(id(page), (page, []))[1].append(op)
+    return list(batches.values())
+
+
+async def fire(batches: List[Tuple[Any, List[Dict[str, Any]]]], lead_ms: int = 500) -> List[Dict[str, Any]]:
+    """Run every page's batch with one shared start instant; one result per op."""
+    start_at = int(time.time() * 1000) + lead_ms
+    results = await asyncio.gather(*(page.evaluate(_FIRE_JS, {"ops": ops, "startAt": start_at})
+                                     for page, ops in batches))
+    return [{**op, "startAt": start_at} for batch in results for op in batch]
+
+
+async def run_ops(pools: Dict[str, ClientPool], ops: List[Dict[str, Any]], mode: str) -> List[Dict[str, Any]]:
+    """All ops at one instant (``concurrent``), or one after another (``sequential``)."""
+    if mode == "concurrent":
+        return await fire(assign(pools, ops))
+    results = []
+    for op in ops:
+        results.extend(await fire(assign(pools, [op]), lead_ms=0))
+    return results
+
+
+def op_stats(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    ok = [r for r in results if r["ok"]]
+    wall_ms = (max(r["endedAt"] for r in results) - results[0]["startAt"]) if results else 0
+    return {
+        "ops": len(results),
+        "ok": len(ok),
+        "failed": len(results) - len(ok),
+        "latencyMs": reporting.summarize(r["ms"] for r in ok),
+        "wallMs": wall_ms,
+        "throughputOpsPerSec": len(ok) / (wall_ms / 1000) if wall_ms > 0 else 0.0,
+        "errors": dict(Counter(r["error"] for r in results if not r["ok"]).most_common(10)),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Wallet scenario
+# ---------------------------------------------------------------------------
+
+WALLET_KINDS = ("topup", "payment", "refund")
+
+
+def _booking(booking_id: str, guest: str, host: str, price: float) -> Dict[str, Any]:
+    check_in = date.today() + timedelta(days=60)
+    return {
+        "id": booking_id, "listingId": "bench-contention-listing", "guestId": guest, "hostId": host,
+        "checkIn": check_in.isoformat(), "checkOut": (check_in + timedelta(days=2)).isoformat(),
+        "guests": 1, "totalPrice": price, "status": "confirmed", "createdAt": f"{date.today().isoformat()}T00:00:00Z",
+    }
+
+
+def _classify(commit: Commit, guest: str) -> Optional[str]:
+    paths = commit.paths()
+    if f"users/{guest}" not in paths:
+        return None
+    if any(p.startswith("bookings/") for p in paths):
+        return "refund"
+    if any(p.startswith("transactions/") for p in paths):
+        return "topup"
+    return "payment"
+
+
+def _guest_delta(kind: str, commit: Commit, price_c: int) -> int:
+    if kind == "topup":
+        return int(commit.fields("transactions/").get("amount", 0))
+    if kind == "refund":
+        return centavos(float(commit.fields("bookings/").get("refundAmount", 0)))
+    return -price_c
+
+
+async def wallet_case(args: argparse.Namespace, emulator: FirestoreEmulator, pools: Dict[str, ClientPool],
+                      log: CommitLog, kind: str, n: int) -> Dict[str, Any]:
+    guest, host = pools["guest"].uid, pools["host"].uid
+    start_c, price_c = centavos(args.start_balance), centavos(args.price)
+    prefix = f"bench-{int(time.time())}-{kind}-{n}"
+    kinds = [WALLET_KINDS[i % 3] for i in range(n)] if kind == "mixed" else [kind] * n
+
+    emulator.update(f"users/{guest}", {"walletBalance": start_c})
+    emulator.update(f"users/{host}", {"walletBalance": start_c, "earningsPayoutMethod": "wallet"})
+    seeded = []
+    ops = []
+    for i, op_kind in enumerate(kinds):
+        tag = f"{prefix}-{i}"
+        if op_kind == "topup":
+            ops.append({"role": "guest", "kind": op_kind, "tag": tag, "module": WALLET_MODULE,
+                        "fn": "processWalletTopUp", "args": [tag, args.topup, "Contention benchmark top-up", guest]})
+            continue
+        booking = _booking(tag, guest, host, args.price)
+        seeded.append((f"bookings/{tag}", {k: v for k, v in booking.items() if k != "id"}))
+        if op_kind == "payment":
+            ops.append({"role": "host", "kind": op_kind, "tag": tag, "module": PAYMENT_MODULE,
+                        "fn": "processBookingPayment", "args": [booking, "wallet"]})
+        else:
+            # A completed wallet payment makes the booking refundable
+            seeded.append((f"transactions/{tag}-payment", {
+                "userId": guest, "type": "payment", "amount": price_c, "status": "completed",
+                "paymentMethod": "wallet", "bookingId": tag, "createdAt": booking["createdAt"]}))
+            ops.append({"role": "guest", "kind": op_kind, "tag": tag, "module": PAYMENT_MODULE,
+                        "fn": "processBookingRefund", "args": [booking, "guest", "Contention benchmark"]})
+    for i in range(0, len(seeded), 500):
+        emulator.set_many(seeded[i:i + 500])
+
+    mark = log.mark()
+    results = await fire(assign(pools, ops))
+    commits = log.since(mark)
+    final_c = int(emulator.get(f"users/{guest}").get("walletBalance", 0))
+
+    per_kind: Dict[str, Any] = {}
+    expected_c = start_c
+    for op_kind in sorted(set(kinds)):
+        mine = [c for c in commits if _classify(c, guest) == op_kind]
+        landed = [c for c in mine if c.ok]
+        retries = sum(1 for c in mine if c.conflicted)
+        expected_c += sum(_guest_delta(op_kind, c, price_c) for c in landed)
+        stats = op_stats([r for r in results if r["kind"] == op_kind])
+        per_kind[op_kind] = {
+            **stats,
+            "commits": len(mine),
+            "committed": len(landed),
+            "retries": retries,
+            "rejectedCommits": len(mine) - len(landed) - retries,
+            # The balance moved but a follow-up write (records, points, notifications) failed
+            "failedAfterCommit": max(0, len(landed) - stats["ok"]),
+        }
+    return {
+        "kind": kind,
+        "concurrency": n,
+        "clients": {role: len(pool.pages) for role, pool in pools.items()},
+        **op_stats(results),
+        "retries": sum(k["retries"] for k in per_kind.values()),
+        "retriesPerOp": sum(k["retries"] for k in per_kind.values()) / n if n else 0.0,
+        "byKind": per_kind,
+        "balance": {"startCentavos": start_c, "expectedCentavos": expected_c, "finalCentavos": final_c,
+                    "driftCentavos": final_c - expected_c},
+    }
+
+
+async def run_wallet(args: argparse.Namespace) -> int:
+    emulator = FirestoreEmulator()
+    log = CommitLog()
+    cases: List[Dict[str, Any]] = []
+    session = await browser.open_session(hooks=[_prepare])
+    try:
+        # Refunds debit the host too, so the host signs in even when it fires nothing
+        pools = {"guest": await open_pool(session, "guest", args.guest_plan, args.clients, log, first=True),
+                 "host": await open_pool(session, "host", args.host_plan, args.clients, log)}
+        for kind in args.kinds:
+            for n in args.concurrency:
+                case = await wallet_case(args, emulator, pools, log, kind, n)
+                cases.append(case)
+                drift = case["balance"]["driftCentavos"]
+                print(f"{kind:<8} N={n:<4} {case['ok']:>4}/{n} ok  p95 {case['latencyMs']['p95']:>7.0f} ms  "
+                      f"{case['throughputOpsPerSec']:>6.1f} ops/s  retries {case['retries']:>4} "
+                      f"({case['retriesPerOp']:.2f}/op)  drift {drift:+d} centavos"
+                      + ("" if drift == 0 else "  BALANCE MISMATCH"))
+    finally:
+        await session.close()
+
+    path = reporting.write_report("contention_wallet", {
+        "amounts": {"topupPHP": args.topup, "pricePHP": args.price, "startBalancePHP": args.start_balance},
+        "cases": cases,
+    })
+    print(f"Report -> {path}")
+    return 1 if any(c["balance"]["driftCentavos"] for c in cases) else 0
+
+
+# ---------------------------------------------------------------------------
+# Booking scenario
+# ---------------------------------------------------------------------------
+
+BOOKING_HOST = "bench-race-host"
+# validateBookingCreation's messages for the two checks that should stop a race
+_REJECTED = re.compile(r"already booked|pending booking request")
+
+
+def guest_login(email: str, password: str = BENCH_PASSWORD) -> List[steps.Step]:
+    """``GUEST_PLAN`` with ``email`` and ``password`` in place of the plan's own account."""
+    from plans.selectors import LOGIN_EMAIL, LOGIN_PASSWORD
+
+    values = {LOGIN_EMAIL: email, LOGIN_PASSWORD: password}
+    return [replace(step, value=values[step.target]) if step.action == "fill" and step.target in values else step
+            for step in steps.load_steps(GUEST_PLAN)]
+
+
+def max_compatible(ranges: List[Tuple[str, str]]) -> int:
+    """Most bookings that can coexist: greedy interval scheduling on check-out.
+
+    Ranges are half-open like ``doDateRangesOverlap``, so a check-out day can be
+    the next check-in.
+    """
+    kept, last_out = 0, ""
+    for check_in, check_out in sorted(ranges, key=lambda r: r[1]):
+        if check_in >= last_out:
+            kept += 1
+            last_out = check_out
+    return kept
+
+
+async def open_guests(session: browser.Session, count: int, log: CommitLog, logins: int) -> List[ClientPool]:
+    """``count`` benchmark guests, each in its own context; ``logins`` sign in at a time."""
+    auth, emulator = AuthEmulator(), FirestoreEmulator()
+    emails = [f"bench-guest-{i}@example.com" for i in range(count)]
+    uids = [auth.ensure_user(email, BENCH_PASSWORD) for email in emails]
+    emulator.set_many([(f"users/{uid}", {"uid": uid, "email": email, "displayName": f"Bench Guest {i}",
+                                         "role": "guest", "roles": ["guest"], "walletBalance": 0})
+                       for i, (uid, email) in enumerate(zip(uids, emails))])
+    gate = asyncio.Semaphore(logins)
+
+    async def one(email: str) -> ClientPool:
+        async with gate:
+            return await open_pool(session, "guest", guest_login(email), 1, log)
+
+    return list(await asyncio.gather(*(one(email) for email in emails)))
+
+
+async def booking_case(args: argparse.Namespace, emulator: FirestoreEmulator, guests: List[ClientPool],
+                       mode: str, n: int) -> Dict[str, Any]:
+    listing = f"bench-race-{int(time.time())}-{mode}-{n}"
+    emulator.set_many([(f"listing/{listing}", {
+        "title": "Contention benchmark listing", "hostId": BOOKING_HOST, "status": "approved",
+        "category": "home", "price": args.price, "maxGuests": 4})])
+    first_night = date.today() + timedelta(days=90)
+    ops = []
+    for i in range(n):
+        # Every range shares at least one night with every other while spread <= nights
+        check_in = first_night + timedelta(days=i % args.spread)
+        check_out = check_in + timedelta(days=args.nights)
+        ops.append({"role": f"guest-{i}", "kind": "booking", "tag": f"{listing}-{i}", "module": FIRESTORE_MODULE,
+                    "fn": "createBooking", "args": [{
+                        "listingId": listing, "hostId": BOOKING_HOST, "guestId": guests[i].uid,
+                        "checkIn": check_in.isoformat(), "checkOut": check_out.isoformat(), "guests": 1,
+                        "totalPrice": args.price * args.nights, "status": "pending"}]})
+    ranges = {op["tag"]: (op["args"][0]["checkIn"], op["args"][0]["checkOut"]) for op in ops}
+    pools = {f"guest-{i}": guest for i, guest in enumerate(guests[:n])}
+
+    results = await run_ops(pools, ops, mode)
+
+    accepted = [r for r in results if r["ok"]]
+    rejected = [r for r in results if not r["ok"] and _REJECTED.search(r["error"])]
+    compatible = max_compatible([ranges[r["tag"]] for r in accepted])
+    stats = op_stats(results)
+    return {
+        "mode": mode,
+        "guests": n,
+        "listingId": listing,
+        "accepted": len(accepted),
+        "rejected": len(rejected),
+        "errored": len(results) - len(accepted) - len(rejected),
+        "rejectionRate": len(rejected) / n if n else 0.0,
+        "doubleBookings": len(accepted) - compatible,
+        "latencyMs": {
+            "all": reporting.summarize(r["ms"] for r in results),
+            "accepted": stats["latencyMs"],
+            "rejected": reporting.summarize(r["ms"] for r in rejected),
+        },
+        "wallMs": stats["wallMs"],
+        "throughputOpsPerSec": n / (stats["wallMs"] / 1000) if stats["wallMs"] > 0 else 0.0,
+        "errors": stats["errors"],
+        "bookingIds": [r["value"] for r in accepted],
+    }
+
+
+async def run_booking(args: argparse.Namespace) -> int:
+    emulator = FirestoreEmulator()
+    emulator.set_many([(f"users/{BOOKING_HOST}", {"uid": BOOKING_HOST, "role": "host", "roles": ["host"],
+                                                  "displayName": "Bench Host", "walletBalance": 0})])
+    cases: List[Dict[str, Any]] = []
+    session = await browser.open_session(hooks=[_prepare])
+    try:
+        guests = await open_guests(session, max(args.concurrency), CommitLog(), args.logins)
+        for mode in args.modes:
+            for n in args.concurrency:
+                case = await booking_case(args, emulator, guests, mode, n)
+                cases.append(case)
+                print(f"{mode:<10} N={n:<4} accepted {case['accepted']:>3}  rejected {case['rejected']:>3}  "
+                      f"errors {case['errored']:>3}  double-booked {case['doubleBookings']:>3}  "
+                      f"p50 {case['latencyMs']['all']['p50']:>6.0f} ms  p95 {case['latencyMs']['all']['p95']:>6.0f} ms"
+                      + ("  OVERBOOKED" if case["doubleBookings"] else ""))
+    finally:
+        await session.close()
+
+    path = reporting.write_report("contention_booking", {
+        "dates": {"nights": args.nights, "spread": args.spread}, "cases": cases})
+    print(f"Report -> {path}")
+    return 1 if any(c["doubleBookings"] for c in cases) else 0
+
+
+# ---------------------------------------------------------------------------
+# Promo scenario
+# ---------------------------------------------------------------------------
+
+# Both flows get the module paths they use as their first argument.
+# ListingDetails: validate, then book with the discount the validation returned
+_APPLY_PROMO_FLOW = """
+async (modules, paths, code, booking) => {
+  const promo = modules[paths.promo];
+  const validation = await promo.validatePromoCode(code, booking.listingId);
+  if (!validation.valid) throw new Error(`promo rejected: ${validation.error}`);
+  const discount = promo.calculatePromoDiscountAmount(booking.originalPrice, validation.discount);
+  return modules[paths.firestore].createBooking({
+    ...booking, totalPrice: Math.max(0, booking.originalPrice - discount), discountAmount: discount,
+    promoCode: validation.promoCode, promoCodeDiscount: validation.discount, promoCodeDiscountAmount: discount,
+  });
+}
+"""
+
+# HostBookings: read the booking, mark it confirmed, then take the payment
+_CONFIRM_FLOW = """
+async (modules, paths, bookingId) => {
+  const firestore = modules[paths.firestore];
+  const booking = await firestore.getBooking(bookingId);
+  await firestore.updateBooking(bookingId, { status: 'confirmed' });
+  await modules[paths.payment].processBookingPayment(booking, 'wallet');
+  return bookingId;
+}
+"""
+
+
+def _start_phase(trackers: List[firestore_traffic.FirestoreTracker], phase: str) -> None:
+    for tracker in trackers:
+        tracker.mark(phase, "", "")
+
+
+def _phase_totals(trackers: List[firestore_traffic.FirestoreTracker]) -> Dict[str, int]:
+    totals = {"reads": 0, "writes": 0}
+    for tracker in trackers:
+        for key in totals:
+            totals[key] += tracker.steps[-1]["counts"][key]
+    return totals
+
+
+async def promo_case(args: argparse.Namespace, emulator: FirestoreEmulator, guests: List[ClientPool],
+                     host: ClientPool, trackers: List[firestore_traffic.FirestoreTracker], mode: str,
+                     n: int) -> Dict[str, Any]:
+    stamp = int(time.time())
+    listing = f"bench-promo-{stamp}-{mode}-{n}"
+    code = f"FLASH{stamp % 100000}"
+    emulator.set_many([(f"listing/{listing}", {
+        "title": "Flash promotion benchmark listing", "hostId": host.uid, "status": "approved", "category": "home",
+        "price": args.price, "maxGuests": 4, "promoCode": code, "promoDiscount": args.discount,
+        "promoMaxUses": args.cap, "promoDescription": "Contention benchmark flash sale"})])
+    # Enough for every payment; each guest stays on non-overlapping dates
+    for guest in guests[:n]:
+        emulator.update(f"users/{guest.uid}", {"walletBalance": centavos(args.price * 100)})
+    first_night = date.today() + timedelta(days=120)
+
+    apply_ops = []
+    paths = {"promo": PROMO_MODULE, "firestore": FIRESTORE_MODULE}
+    for i in range(n):
+        check_in = first_night + timedelta(days=3 * i)
+        apply_ops.append({"role": f"guest-{i}", "kind": "apply", "tag": f"{listing}-{i}",
+                          "modules": list(paths.values()), "flow": _APPLY_PROMO_FLOW,
+                          "args": [paths, code, {"listingId": listing, "hostId": host.uid, "guestId": guests[i].uid,
+                                                 "checkIn": check_in.isoformat(),
+                                                 "checkOut": (check_in + timedelta(days=2)).isoformat(),
+                                                 "guests": 1, "originalPrice": args.price * 2,
+                                                 "status": "pending"}]})
+    pools = {f"guest-{i}": guest for i, guest in enumerate(guests[:n])}
+    pools["host"] = host
+
+    _start_phase(trackers, f"apply-{listing}")
+    applied = await run_ops(pools, apply_ops, mode)
+    apply_traffic = _phase_totals(trackers)
+    booking_ids = [r["value"] for r in applied if r["ok"]]
+
+    paths = {"firestore": FIRESTORE_MODULE, "payment": PAYMENT_MODULE}
+    confirm_ops = [{"role": "host", "kind": "confirm", "tag": booking_id,
+                    "modules": list(paths.values()), "flow": _CONFIRM_FLOW, "args": [paths, booking_id]}
+                   for booking_id in booking_ids]
+    _start_phase(trackers, f"confirm-{listing}")
+    confirmed = await run_ops(pools, confirm_ops, mode) if confirm_ops else []
+    confirm_traffic = _phase_totals(trackers)
+
+    final = [emulator.get(f"bookings/{booking_id}") or {} for booking_id in booking_ids]
+    redeemed = sum(1 for b in final if b.get("status") == "confirmed" and b.get("promoCode"))
+    stripped = sum(1 for b in final if b.get("status") == "confirmed" and not b.get("promoCode"))
+    writes = apply_traffic["writes"] + confirm_traffic["writes"]
+    reads = apply_traffic["reads"] + confirm_traffic["reads"]
+    return {
+        "mode": mode,
+        "guests": n,
+        "cap": args.cap,
+        "listingId": listing,
+        "promoCode": code,
+        "apply": {**op_stats(applied), "traffic": apply_traffic,
+                  "rejectedAtApply": sum(1 for r in applied if not r["ok"] and r["error"].startswith("promo rejected"))},
+        "confirm": {**op_stats(confirmed), "traffic": confirm_traffic},
+        "redeemed": redeemed,
+        "overRedemptions": max(0, redeemed - args.cap),
+        "confirmedWithoutPromo": stripped,
+        "writesPerRedemption": writes / redeemed if redeemed else float(writes),
+        "readsPerRedemption": reads / redeemed if redeemed else float(reads),
+    }
+
+
+async def run_promo(args: argparse.Namespace) -> int:
+    emulator = FirestoreEmulator()
+    trackers: List[firestore_traffic.FirestoreTracker] = []
+
+    async def track(context: Any) -> None:
+        trackers.append(await firestore_traffic.attach(context))
+
+    cases: List[Dict[str, Any]] = []
+    session = await browser.open_session(hooks=[_prepare, track])
+    try:
+        log = CommitLog()
+        host = await open_pool(session, "host", args.host_plan, args.clients, log, first=True)
+        guests = await open_guests(session, max(args.guests), log, args.logins)
+        for mode in args.modes:
+            for n in args.guests:
+                case = await promo_case(args, emulator, guests, host, trackers, mode, n)
+                cases.append(case)
+                print(f"{mode:<10} N={n:<4} cap {args.cap:<3} applied {case['apply']['ok']:>4}  "
+                      f"redeemed {case['redeemed']:>4}  over {case['overRedemptions']:>4}  "
+                      f"apply p95 {case['apply']['latencyMs']['p95']:>6.0f} ms  "
+                      f"confirm p95 {case['confirm']['latencyMs']['p95']:>6.0f} ms  "
+                      f"{case['writesPerRedemption']:.1f} writes/redemption"
+                      + ("  OVER CAP" if case["overRedemptions"] else ""))
+    finally:
+        await session.close()
+
+    path = reporting.write_report("contention_promo", {
+        "promo": {"cap": args.cap, "discountPercent": args.discount, "pricePHP": args.price}, "cases": cases})
+    print(f"Report -> {path}")
+    return 1 if any(c["overRedemptions"] for c in cases) else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="scenario", required=True)
+    wallet = sub.add_parser("wallet", help="simultaneous top-ups, payments and refunds on one guest wallet")
+    wallet.add_argument("--concurrency", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    wallet.add_argument("--kinds", nargs="+", choices=[*WALLET_KINDS, "mixed"], default=["mixed"])
+    wallet.add_argument("--clients", type=int, default=4, help="pages (Firestore clients) per role")
+    wallet.add_argument("--topup", type=float, default=250.25, help="PHP per top-up")
+    wallet.add_argument("--price", type=float, default=125.50, help="PHP per booking payment and refund")
+    wallet.add_argument("--start-balance", type=float, default=100000.0, help="PHP on both wallets before each case")
+    wallet.add_argument("--guest-plan", type=Path, default=GUEST_PLAN)
+    wallet.add_argument("--host-plan", type=Path, default=HOST_PLAN)
+    booking = sub.add_parser("booking", help="N guests booking overlapping dates on one listing at once")
+    booking.add_argument("--concurrency", type=int, nargs="+", default=[2, 5, 10, 25, 50], help="guests per case")
+    booking.add_argument("--modes", nargs="+", choices=["concurrent", "sequential"], default=["concurrent"])
+    booking.add_argument("--nights", type=int, default=3)
+    booking.add_argument("--spread", type=int, default=2, help="distinct check-in days; <= --nights keeps all overlapping")
+    booking.add_argument("--price", type=float, default=2500.0, help="PHP per night")
+    booking.add_argument("--logins", type=int, default=8, help="guests signing in at the same time")
+    promo = sub.add_parser("promo", help="N guests redeeming one capped promo code, then the host confirming")
+    promo.add_argument("--guests", type=int, nargs="+", default=[10, 50, 100], help="guests per case")
+    promo.add_argument("--cap", type=int, default=5, help="promoMaxUses")
+    promo.add_argument("--discount", type=float, default=20.0, help="percent")
+    promo.add_argument("--modes", nargs="+", choices=["concurrent", "sequential"], default=["concurrent"])
+    promo.add_argument("--price", type=float, default=2500.0, help="PHP per night (2 nights per booking)")
+    promo.add_argument("--clients", type=int, default=4, help="host pages confirming in parallel")
+    promo.add_argument("--logins", type=int, default=8, help="guests signing in at the same time")
+    promo.add_argument("--host-plan", type=Path, default=HOST_PLAN)
+    args = parser.parse_args(argv)
+    runners = {"wallet": run_wallet, "booking": run_booking, "promo": run_promo}
+    return asyncio.run(runners[args.scenario](args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,485 @@
+"""Seeded synthetic dataset for the scaling benchmarks.
+
+Streams users (hosts, guests, an admin), listings, bookings, reviews,
+messages and wallet transactions shaped like ``src/types/index.ts`` and the
+collections the app reads (``listing``, ``users``, ``bookings``, ...).
+Documents are produced one listing at a time, so memory stays flat no matter
+how many are generated:
+
+- every entity draws from its own ``Random(f"{seed}:{kind}:{index}")``, so the
+  same seed gives the same documents in any order or slice;
+- a listing's bookings are a forward walk through time, so they never overlap
+  (check-out days are inclusive in ``availabilityUtils``, hence the 1-day gap);
+- the listing document is emitted after its reviews, with the rating fields
+  already filled in.
+
+Writes are streamed to the Firestore emulator in ``documents:commit`` batches
+with a bounded number in flight, or to a JSONL file.
+
+    cd testsprite_tests
+    python -m harness.dataset --listings 20000 --guests 50000 --sink emulator
+    python -m harness.dataset --listings 1000 --sink jsonl --out /tmp/seed.jsonl.gz
+    python -m harness.dataset --config big.json --sink count
+"""
+
+import argparse
+import gzip
+import json
+import math
+import random
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, fields
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import reporting
+from .emulator import FirestoreEmulator, to_fields
+
+Document = Tuple[str, str, Dict[str, Any]]  # (collection, id, data)
+
+
+@dataclass
+class Distributions:
+    """Sizes and shape of the generated data; every field can come from ``--config``."""
+
+    seed: int = 1
+    hosts: int = 200
+    guests: int = 2000
+    listings: int = 1000
+    start: str = "2024-01-01"
+    months: int = 24
+    # Listings per host follow a power law: host index = hosts * u ** host_skew
+    host_skew: float = 2.0
+    category_weights: Dict[str, float] = field(default_factory=lambda: {"home": 0.7, "experience": 0.2, "service": 0.1})
+    status_weights: Dict[str, float] = field(
+        default_factory=lambda: {"approved": 0.85, "pending": 0.08, "draft": 0.04, "rejected": 0.03})
+    # Median price (PHP) and log-normal sigma per category
+    price_median: Dict[str, float] = field(default_factory=lambda: {"home": 2500, "experience": 1200, "service": 1800})
+    price_sigma: float = 0.6
+    # Mean days between one stay's check-out and the next check-in
+    booking_gap_days: float = 6.0
+    max_nights: int = 7
+    cancel_rate: float = 0.08
+    review_rate: float = 0.45
+    rating_weights: List[float] = field(default_factory=lambda: [0.02, 0.03, 0.08, 0.25, 0.62])
+    messages_per_booking: float = 3.0
+    promo_rate: float = 0.15
+    coupon_rate: float = 0.3
+    deposits_per_guest: float = 1.5
+
+    @classmethod
+    def from_json(cls, path: Path, **overrides: Any) -> "Distributions":
+        raw = json.loads(Path(path).read_text(encoding="utf-8"))
+        known = {f.name for f in fields(cls)}
+        unknown = set(raw) - known
+        if unknown:
+            raise ValueError(f"Unknown distribution keys: {', '.join(sorted(unknown))}")
+        raw.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**raw)
+
+
+CITIES = [
+    ("Manila", "Metro Manila", 14.5995, 120.9842), ("Makati", "Metro Manila", 14.5547, 121.0244),
+    ("Quezon City", "Metro Manila", 14.6760, 121.0437), ("Cebu City", "Cebu", 10.3157, 123.8854),
+    ("Davao City", "Davao del Sur", 7.1907, 125.4553), ("Baguio", "Benguet", 16.4023, 120.5960),
+    ("Tagaytay", "Cavite", 14.1153, 120.9621), ("El Nido", "Palawan", 11.1956, 119.4075),
+    ("Boracay", "Aklan", 11.9674, 121.9248), ("Siargao", "Surigao del Norte", 9.8482, 126.0458),
+    ("Iloilo City", "Iloilo", 10.7202, 122.5621), ("Vigan", "Ilocos Sur", 17.5747, 120.3869),
+]
+HOUSE_TYPES = ["Apartment", "House", "Villa", "Condo", "Cabin", "Loft"]
+AMENITIES = ["WiFi", "Kitchen", "Pool", "Air conditioning", "Parking", "Washer", "TV", "Workspace", "Beach access"]
+SERVICE_TYPES = ["Photography", "Cleaning", "Catering", "Tour guide", "Massage", "Airport transfer"]
+ADJECTIVES = ["Cozy", "Sunny", "Modern", "Rustic", "Charming", "Spacious", "Quiet", "Seaside", "Hillside"]
+FIRST_NAMES = ["Juan", "Maria", "Jose", "Ana", "Mark", "Grace", "Paolo", "Bea", "Miguel", "Carla", "Rafael", "Liza"]
+LAST_NAMES = ["Santos", "Reyes", "Cruz", "Bautista", "Garcia", "Mendoza", "Torres", "Flores", "Ramos", "Aquino"]
+REVIEW_TEXT = {
+    1: "Not as described and hard to reach the host.",
+    2: "Location was fine but the place needs work.",
+    3: "Decent stay, a few things could be better.",
+    4: "Great place, would book again.",
+    5: "Perfect stay, the host was wonderful!",
+}
+MESSAGE_TEXT = [
+    "Hi! Is early check-in possible?", "Sure, what time are you arriving?", "Around 1 PM, thanks!",
+    "How do I get the keys?", "The lockbox code is in your booking details.", "Is parking available?",
+    "Thanks for staying with us!", "We had a great time, thank you.",
+]
+
+
+def host_id(i: int) -> str:
+    return f"host-{i:06d}"
+
+
+def guest_id(i: int) -> str:
+    return f"guest-{i:07d}"
+
+
+def listing_id(i: int) -> str:
+    return f"listing-{i:07d}"
+
+
+def _rng(dist: Distributions, kind: str, index: int) -> random.Random:
+    return random.Random(f"{dist.seed}:{kind}:{index}")
+
+
+def _weighted(rng: random.Random, weights: Dict[str, float]) -> str:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    # Knuth; means here are small
+    limit, k, p = math.exp(-mean), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+def _iso(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _at(day: date, rng: random.Random) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + timedelta(seconds=rng.randrange(86400))
+
+
+def _centavos(php: float) -> int:
+    """Wallet balances and transaction amounts are stored as integer centavos."""
+    return int(round(php * 100))
+
+
+def _name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+# ---------------------------------------------------------------------------
+# Entities
+# ---------------------------------------------------------------------------
+
+def make_user(dist: Distributions, role: str, index: int, start: date) -> Document:
+    rng = _rng(dist, role, index)
+    uid = {"host": host_id, "guest": guest_id}.get(role, lambda i: f"admin-{i:03d}")(index)
+    created = _at(start - timedelta(days=rng.randrange(365)), rng)
+    data: Dict[str, Any] = {
+        "email": f"{uid}@example.test",
+        "fullName": _name(rng),
+        "role": role,
+        "roles": [role] if role != "host" or rng.random() < 0.6 else ["host", "guest"],
+        "createdAt": _iso(created),
+        "points": 0,
+        "favorites": [],
+        "wishlist": [],
+        "walletBalance": _centavos(rng.lognormvariate(math.log(1500), 1.0)) if role != "admin" else 0,
+        "emailVerified": True,
+        "policyAccepted": True,
+        "policyAcceptedDate": _iso(created),
+    }
+    if role == "guest":
+        data["points"] = rng.randrange(0, 2000, 10)
+        data["favorites"] = [listing_id(rng.randrange(dist.listings)) for _ in range(_poisson(rng, 2))]
+        if rng.random() < dist.coupon_rate:
+            data["coupons"] = [{
+                "id": f"coupon-{uid}-{n}",
+                "code": f"SAVE{rng.choice([100, 200, 500])}",
+                "discount": rng.choice([100, 200, 500]),
+                "validUntil": _iso(created + timedelta(days=180)),
+                "used": rng.random() < 0.3,
+                "minSpend": rng.choice([0, 1000, 3000]),
+            } for n in range(rng.randint(1, 3))]
+    elif role == "host":
+        data["hostPoints"] = rng.randrange(0, 5000, 10)
+        data["earningsPayoutMethod"] = rng.choice(["wallet", "paypal"])
+        data["paypalEmail"] = f"{uid}@paypal.example.test"
+    return "users", uid, data
+
+
+def make_listing(dist: Distributions, index: int, start: date, rng: random.Random) -> Dict[str, Any]:
+    category = _weighted(rng, dist.category_weights)
+    city, province, lat, lng = rng.choice(CITIES)
+    price = round(rng.lognormvariate(math.log(dist.price_median[category]), dist.price_sigma) / 50) * 50 or 50
+    created = _at(start - timedelta(days=rng.randrange(180)), rng)
+    house_type = rng.choice(HOUSE_TYPES)
+    title = {
+        "home": f"{rng.choice(ADJECTIVES)} {house_type} in {city}",
+        "experience": f"{city} {rng.choice(['food crawl', 'island hopping', 'heritage walk', 'surf lesson'])}",
+        "service": f"{rng.choice(SERVICE_TYPES)} in {city}",
+    }[category]
+    data: Dict[str, Any] = {
+        "hostId": host_id(int(dist.hosts * rng.random() ** dist.host_skew)),
+        "title": title,
+        "description": f"{title}. Hosted on Firebnb since {created.year}.",
+        "category": category,
+        "price": price,
+        "location": f"{city}, {province}",
+        "coordinates": {"lat": round(lat + rng.uniform(-0.05, 0.05), 6), "lng": round(lng + rng.uniform(-0.05, 0.05), 6)},
+        "images": [f"https://res.cloudinary.com/demo/image/upload/listings/{listing_id(index)}-{n}.jpg"
+                   for n in range(rng.randint(3, 8))],
+        "status": _weighted(rng, dist.status_weights),
+        "blockedDates": [],
+        "createdAt": _iso(created),
+        "updatedAt": _iso(created + timedelta(days=rng.randrange(30))),
+    }
+    if rng.random() < 0.3:
+        data["discount"] = rng.choice([5, 10, 15, 20])
+    if rng.random() < dist.promo_rate:
+        data.update(promoCode=f"PROMO{index % 10000:04d}", promoDescription="Limited-time promo",
+                    promoDiscount=rng.choice([5, 10, 15]), promoMaxUses=rng.choice([5, 10, 50]))
+    if category == "home":
+        bedrooms = rng.choices([1, 2, 3, 4, 5], weights=[35, 30, 20, 10, 5])[0]
+        data.update(bedrooms=bedrooms, bathrooms=max(1, bedrooms - rng.randint(0, 1)),
+                    maxGuests=bedrooms * 2 + rng.randint(0, 2), houseType=house_type,
+                    amenities=rng.sample(AMENITIES, rng.randint(3, 7)))
+    elif category == "experience":
+        data.update(pricePerPerson=price, capacity=rng.choice([4, 6, 8, 10, 15]),
+                    schedule=rng.choice(["Daily 9:00 AM", "Weekends 2:00 PM", "Mon-Fri 7:00 AM"]),
+                    whatsIncluded=rng.sample(["Snacks", "Transport", "Guide", "Photos", "Gear"], 3))
+    else:
+        data.update(servicePrice=price, duration=rng.choice(["1 hour", "2 hours", "half day", "1 day"]),
+                    serviceType=rng.choice(SERVICE_TYPES), locationRequired=rng.random() < 0.5)
+    return data
+
+
+def listing_documents(dist: Distributions, index: int, start: date, today: date) -> Iterator[Document]:
+    """A listing's bookings, reviews, messages and transactions, then the listing itself."""
+    rng = _rng(dist, "listing", index)
+    lid = listing_id(index)
+    listing = make_listing(dist, index, start, rng)
+    end = start + timedelta(days=dist.months * 30)
+    capacity = listing.get("maxGuests") or listing.get("capacity") or 1
+    ratings: List[int] = []
+
+    day = start + timedelta(days=rng.randrange(14))
+    n = 0
+    while listing["status"] == "approved":
+        nights = 1 if listing["category"] != "home" else rng.randint(1, dist.max_nights)
+        check_in, check_out = day, day + timedelta(days=nights)
+        if check_out >= end:
+            break
+        bid = f"booking-{index:07d}-{n:04d}"
+        guest = guest_id(rng.randrange(dist.guests))
+        guests = rng.randint(1, capacity)
+        base = listing["price"] * (nights if listing["category"] == "home" else
+                                   guests if listing["category"] == "experience" else 1)
+        discount = round(base * listing.get("discount", 0) / 100, 2)
+        created = _at(check_in - timedelta(days=rng.randint(1, 60)), rng)
+        if check_in > today:
+            status = "confirmed" if rng.random() < 0.8 else "pending"
+        else:
+            status = "cancelled" if rng.random() < dist.cancel_rate else "completed"
+        booking: Dict[str, Any] = {
+            "listingId": lid, "guestId": guest, "hostId": listing["hostId"],
+            "checkIn": check_in.isoformat(), "checkOut": check_out.isoformat(),
+            "guests": guests, "totalPrice": round(base - discount, 2), "originalPrice": base,
+            "status": status, "createdAt": _iso(created),
+        }
+        if discount:
+            booking.update(listingDiscount=listing["discount"], listingDiscountAmount=discount, discountAmount=discount)
+        if status == "cancelled":
+            booking.update(refundStatus="refunded", refundAmount=booking["totalPrice"],
+                           refundedAt=_iso(created + timedelta(days=1)))
+        yield "bookings", bid, booking
+
+        if status != "pending":
+            method = rng.choice(["paypal", "wallet"])
+            yield "transactions", f"txn-{bid}-pay", {
+                "userId": guest, "type": "payment", "amount": _centavos(booking["totalPrice"]), "status": "completed",
+                "description": f"Payment for {listing['title']}", "paymentMethod": method,
+                "bookingId": bid, "guestId": guest, "hostId": listing["hostId"], "createdAt": booking["createdAt"],
+            }
+            if status == "cancelled":
+                yield "transactions", f"txn-{bid}-refund", {
+                    "userId": guest, "type": "refund", "amount": _centavos(booking["totalPrice"]), "status": "completed",
+                    "description": f"Refund for {listing['title']}", "bookingId": bid,
+                    "originalTransactionId": f"txn-{bid}-pay", "originalPaymentMethod": method,
+                    "cancelledBy": rng.choice(["guest", "host"]), "createdAt": booking["refundedAt"],
+                }
+
+        for m in range(_poisson(rng, dist.messages_per_booking)):
+            from_guest = m % 2 == 0
+            yield "messages", f"msg-{bid}-{m:02d}", {
+                "senderId": guest if from_guest else listing["hostId"],
+                "receiverId": listing["hostId"] if from_guest else guest,
+                "bookingId": bid, "content": rng.choice(MESSAGE_TEXT), "read": rng.random() < 0.8,
+                "createdAt": _iso(created + timedelta(minutes=30 * (m + 1))),
+            }
+
+        if status == "completed" and rng.random() < dist.review_rate:
+            rating = rng.choices([1, 2, 3, 4, 5], weights=dist.rating_weights)[0]
+            ratings.append(rating)
+            yield "reviews", f"review-{bid}", {
+                "listingId": lid, "bookingId": bid, "guestId": guest, "rating": rating,
+                "comment": REVIEW_TEXT[rating], "createdAt": _iso(_at(check_out + timedelta(days=rng.randint(0, 7)), rng)),
+            }
+
+        # Next check-in strictly after this check-out
+        day = check_out + timedelta(days=1 + int(rng.expovariate(1 / dist.booking_gap_days)))
+        n += 1
+
+    if ratings:
+        listing.update(averageRating=round(sum(ratings) / len(ratings), 1), reviewCount=len(ratings))
+    yield "listing", lid, listing
+
+
+def deposit_documents(dist: Distributions, index: int, start: date) -> Iterator[Document]:
+    rng = _rng(dist, "deposits", index)
+    uid = guest_id(index)
+    for n in range(_poisson(rng, dist.deposits_per_guest)):
+        amount = _centavos(rng.choice([500, 1000, 2000, 5000]))
+        yield "transactions", f"txn-{uid}-dep-{n:02d}", {
+            "userId": uid, "type": "deposit", "amount": amount, "status": "completed",
+            "description": "Wallet top-up via PayPal", "paymentMethod": "paypal",
+            "createdAt": _iso(_at(start + timedelta(days=rng.randrange(dist.months * 30)), rng)),
+        }
+
+
+def generate(dist: Distributions, today: Optional[date] = None) -> Iterator[Document]:
+    """Every document, users first so references resolve as soon as they are written."""
+    start = date.fromisoformat(dist.start)
+    today = today or start + timedelta(days=dist.months * 15)
+    yield make_user(dist, "admin", 1, start)
+    for i in range(dist.hosts):
+        yield make_user(dist, "host", i, start)
+    for i in range(dist.guests):
+        yield make_user(dist, "guest", i, start)
+        yield from deposit_documents(dist, i, start)
+    for i in range(dist.listings):
+        yield from listing_documents(dist, i, start, today)
+
+
+# ---------------------------------------------------------------------------
+# Sinks
+# ---------------------------------------------------------------------------
+
+class CountSink:
+    def __init__(self) -> None:
+        self.counts: Dict[str, int] = {}
+
+    def write(self, collection: str, doc_id: str, data: Dict[str, Any]) -> None:
+        self.counts[collection] = self.counts.get(collection, 0) + 1
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlSink(CountSink):
+    """``{"collection", "id", "data"}`` per line; ``.gz`` paths are compressed."""
+
+    def __init__(self, path: Path):
+        super().__init__()
+        self.handle = gzip.open(path, "wt", encoding="utf-8") if str(path).endswith(".gz") else \
+            open(path, "w", encoding="utf-8")
+
+    def write(self, collection: str, doc_id: str, data: Dict[str, Any]) -> None:
+        super().write(collection, doc_id, data)
+        self.handle.write(json.dumps({"collection": collection, "id": doc_id, "data": data}) + "\n")
+
+    def close(self) -> None:
+        self.handle.close()
+
+
+class EmulatorSink(CountSink):
+    """Batched commits with at most ``in_flight`` batches queued or running."""
+
+    def __init__(self, emulator: FirestoreEmulator, batch_size: int = 500, workers: int = 8, in_flight: int = 16):
+        super().__init__()
+        if not 1 <= batch_size <= 500:
+            raise ValueError("Firestore commits take 1-500 writes")
+        self.emulator = emulator
+        self.batch_size = batch_size
+        self.batch: List[Dict[str, Any]] = []
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.slots = threading.BoundedSemaphore(in_flight)
+        self.errors: List[BaseException] = []
+        self.commits = 0
+
+    def write(self, collection: str, doc_id: str, data: Dict[str, Any]) -> None:
+        super().write(collection, doc_id, data)
+        self.batch.append({"update": {"name": self.emulator.name(f"{collection}/{doc_id}"), "fields": to_fields(data)}})
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.errors:
+            raise self.errors[0]
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+        self.slots.acquire()  # back-pressure: the generator waits while the pool is saturated
+        future = self.pool.submit(self.emulator.commit, batch)
+        future.add_done_callback(self._done)
+
+    def _done(self, future: Future) -> None:
+        self.slots.release()
+        if future.exception() is not None:
+            self.errors.append(future.exception())
+        else:
+            self.commits += 1
+
+    def close(self) -> None:
+        self.flush()
+        self.pool.shutdown(wait=True)
+        if self.errors:
+            raise self.errors[0]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", type=Path, help="JSON file with Distributions fields")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--hosts", type=int)
+    parser.add_argument("--guests", type=int)
+    parser.add_argument("--listings", type=int)
+    parser.add_argument("--months", type=int)
+    parser.add_argument("--sink", choices=["emulator", "jsonl", "count"], default="count")
+    parser.add_argument("--out", type=Path, help="with --sink jsonl, output file (.jsonl or .jsonl.gz)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=8, help="with --sink emulator, parallel commits")
+    parser.add_argument("--clear", action="store_true", help="with --sink emulator, wipe the database first")
+    args = parser.parse_args(argv)
+
+    overrides = {k: getattr(args, k) for k in ("seed", "hosts", "guests", "listings", "months")}
+    dist = Distributions.from_json(args.config, **overrides) if args.config else \
+        Distributions(**{k: v for k, v in overrides.items() if v is not None})
+
+    if args.sink == "jsonl":
+        if not args.out:
+            parser.error("--sink jsonl needs --out")
+        sink: CountSink = JsonlSink(args.out)
+    elif args.sink == "emulator":
+        emulator = FirestoreEmulator()
+        if args.clear:
+            emulator.clear()
+        sink = EmulatorSink(emulator, args.batch_size, args.workers, in_flight=args.workers * 2)
+    else:
+        sink = CountSink()
+
+    started = time.perf_counter()
+    last = started
+    total = 0
+    try:
+        for collection, doc_id, data in generate(dist):
+            sink.write(collection, doc_id, data)
+            total += 1
+            if total % 10000 == 0 and time.perf_counter() - last > 5:
+                last = time.perf_counter()
+                print(f"  {total:,} documents, {total / (last - started):,.0f}/s")
+    finally:
+        sink.close()
+    elapsed = time.perf_counter() - started
+
+    path = reporting.write_report("dataset", {
+        "sink": args.sink, "distributions": asdict(dist), "counts": sink.counts,
+        "documents": total, "seconds": elapsed, "docsPerSecond": total / elapsed if elapsed else None,
+    })
+    print(", ".join(f"{count:,} {name}" for name, count in sorted(sink.counts.items())))
+    print(f"{total:,} documents in {elapsed:.1f} s ({total / max(elapsed, 1e-9):,.0f}/s) -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""Minimal REST clients for the Firestore, Auth and Functions emulators.
+
+Writes go through ``documents:commit`` with the emulator's ``Bearer owner``
+token, which bypasses security rules. One keep-alive connection per thread, so
+a thread pool can push batches in parallel. ``AuthEmulator`` creates the
+email/password accounts that benchmarks sign in with, and ``FunctionsEmulator``
+invokes callables with those accounts' ID tokens.
+"""
+
+import http.client
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from . import config
+from .firestore_traffic import decode_value
+
+
+def to_value(value: Any) -> Dict[str, Any]:
+    """Firestore REST ``Value`` for a JSON-like Python value."""
+    if value is None:
+        return {"nullValue": None}
+    if isinstance(value, bool):
+        return {"booleanValue": value}
+    if isinstance(value, int):
+        return {"integerValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, str):
+        return {"stringValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [to_value(v) for v in value]}}
+    if isinstance(value, dict):
+        return {"mapValue": {"fields": to_fields(value)}}
+    raise TypeError(f"Cannot store {type(value).__name__} in Firestore")
+
+
+def to_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: to_value(value) for key, value in data.items()}
+
+
+def from_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: decode_value(value) for key, value in fields.items()}
+
+
+class EmulatorError(RuntimeError):
+    def __init__(self, status: int, body: str):
+        super().__init__(f"Firestore emulator returned {status}: {body[:300]}")
+        self.status = status
+        self.body = body
+
+
+class FirestoreEmulator:
+    def __init__(self, host: str = config.FIRESTORE_EMULATOR_HOST, project: str = config.FIREBASE_PROJECT):
+        self.host = host
+        self.project = project
+        self.database = f"projects/{project}/databases/(default)"
+        self._local = threading.local()
+
+    def name(self, path: str) -> str:
+        """Full resource name for ``collection/doc[/collection/doc...]``."""
+        return f"{self.database}/documents/{path}"
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self.host, timeout=60)
+        return connection
+
+    def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Any:
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Authorization": "Bearer owner", "Content-Type": "application/json"}
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(method, quote(path, safe="/:()?=&,-_.~"), body=payload, headers=headers)
+                response = connection.getresponse()
+                text = response.read().decode("utf-8", "replace")
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Stale keep-alive connection; reconnect once
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+        if response.status >= 400:
+            raise EmulatorError(response.status, text)
+        return json.loads(text) if text else None
+
+    def commit(self, writes: List[Dict[str, Any]]) -> Any:
+        return self.request("POST", f"/v1/{self.database}/documents:commit", {"writes": writes})
+
+    def set_many(self, docs: List[tuple]) -> Any:
+        """Overwrite ``[(path, data), ...]`` in one atomic commit (max 500)."""
+        return self.commit([{"update": {"name": self.name(path), "fields": to_fields(data)}} for path, data in docs])
+
+    def update(self, path: str, data: Dict[str, Any]) -> Any:
+        """Set only the fields in ``data``, leaving the rest of the document alone."""
+        return self.commit([{"update": {"name": self.name(path), "fields": to_fields(data)},
+                             "updateMask": {"fieldPaths": list(data)}}])
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            document = self.request("GET", f"/v1/{self.name(path)}")
+        except EmulatorError as exc:
+            if exc.status == 404:
+                return None
+            raise
+        return from_fields(document.get("fields", {}))
+
+    def clear(self) -> None:
+        """Delete every document in the emulator's database."""
+        self.request("DELETE", f"/emulator/v1/projects/{self.project}/databases/(default)/documents")
+
+
+class AuthEmulator:
+    def __init__(self, host: str = config.AUTH_EMULATOR_HOST):
+        self.host = host
+
+    def _post(self, method: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        connection = http.client.HTTPConnection(self.host, timeout=30)
+        try:
+            # The emulator accepts any API key
+            connection.request("POST", f"/identitytoolkit.googleapis.com/v1/accounts:{method}?key=harness",
+                               body=json.dumps(body).encode("utf-8"), headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            text = response.read().decode("utf-8", "replace")
+        finally:
+            connection.close()
+        if response.status >= 400:
+            raise EmulatorError(response.status, text)
+        return json.loads(text)
+
+    def sign_in(self, email: str, password: str) -> Dict[str, Any]:
+        """``localId`` and ``idToken`` of the email/password account, creating it on first use."""
+        body = {"email": email, "password": password, "returnSecureToken": True}
+        try:
+            return self._post("signUp", body)
+        except EmulatorError as exc:
+            if "EMAIL_EXISTS" not in exc.body:
+                raise
+        return self._post("signInWithPassword", body)
+
+    def ensure_user(self, email: str, password: str) -> str:
+        """uid of the email/password account, creating it on first use."""
+        return self.sign_in(email, password)["localId"]
+
+
+class FunctionsEmulator:
+    """Callable (``onCall``) client: ``{"data": ...}`` in, ``{"result"}`` or ``{"error"}`` out."""
+
+    def __init__(self, host: str = config.FUNCTIONS_EMULATOR_HOST, project: str = config.FIREBASE_PROJECT,
+                 region: str = "us-central1", timeout: float = 120.0):
+        self.host = host
+        self.project = project
+        self.region = region
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def call(self, name: str, data: Dict[str, Any], id_token: Optional[str] = None) -> Tuple[int, Dict[str, Any]]:
+        """HTTP status and decoded body; connection failures come back as status 0."""
+        headers = {"Content-Type": "application/json"}
+        if id_token:
+            headers["Authorization"] = f"Bearer {id_token}"
+        payload = json.dumps({"data": data}).encode("utf-8")
+        for attempt in range(2):
+            connection = getattr(self._local, "connection", None)
+            if connection is None:
+                connection = self._local.connection = http.client.HTTPConnection(self.host, timeout=self.timeout)
+            try:
+                connection.request("POST", f"/{self.project}/{self.region}/{name}", body=payload, headers=headers)
+                response = connection.getresponse()
+                text = response.read().decode("utf-8", "replace")
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Stale keep-alive connection; reconnect once
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    return 0, {}
+            except OSError:
+                # Timed out: the call may still run, so never resend it
+                connection.close()
+                self._local.connection = None
+                return 0, {}
+        try:
+            return response.status, json.loads(text)
+        except ValueError:
+            # The emulator answers unknown functions and crashed workers in plain text
+            return response.status, {"error": {"status": f"HTTP_{response.status}", "message": text[:300]}}
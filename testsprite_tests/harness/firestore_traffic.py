@@ -0,0 +1,535 @@
+"""Firestore read/write accounting per route and per TC step.
+
+An init script wraps ``XMLHttpRequest`` and ``fetch`` in the page and forwards
+Firestore traffic to Python:
+
+- WebChannel ``Listen/channel``: ``addTarget`` / ``removeTarget`` from the POST
+  bodies and ``documentChange`` / ``targetChange`` from the streamed responses;
+- WebChannel ``Write/channel`` and REST ``:commit``: writes;
+- REST ``:runQuery`` / ``:batchGet`` / ``:runAggregationQuery`` (transactions).
+
+Reads are counted the way Firestore bills them: one per document delivered,
+and one for a query that completes with no results. Reads from a listener are
+charged to the step that opened it, so a dashboard's snapshot listeners count
+against the click that navigated there even if data arrives later.
+
+    cd testsprite_tests
+    python -m harness.runner --feature firestore
+    python -m harness.firestore_traffic report
+"""
+
+import argparse
+import json
+import re
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config, reporting
+
+RESULTS_FILE = config.REPORT_DIR / "firestore" / "traffic.jsonl"
+BINDING = "__harnessFirestore"
+
+TRAFFIC_INIT_SCRIPT = """
+(() => {
+  if (window.__harnessFirestoreInstalled) return;
+  window.__harnessFirestoreInstalled = true;
+  const client = Math.random().toString(36).slice(2);
+  const CHANNEL = /google\\.firestore\\.v1\\.Firestore\\/(Listen|Write)\\/channel/;
+  const REST = /\\/v1\\/(projects\\/[^/]+\\/databases\\/[^/]+\\/documents(?:\\/[^?:]*)?):(commit|runQuery|batchGet|runAggregationQuery)\\b/;
+  const emit = (event) => {
+    event.client = client;
+    event.path = location.pathname;
+    event.t = Date.now();
+    try { window.__harnessFirestore(event); } catch (e) {}
+  };
+  const decode = (url) => { try { return decodeURIComponent(url); } catch (e) { return url; } };
+  const describeWrite = (w) => ({
+    op: w.update ? 'set' : w.delete ? 'delete' : w.transform ? 'transform' : 'verify',
+    name: (w.update && w.update.name) || w.delete || (w.transform && w.transform.document) || w.verify || '',
+  });
+
+  const onChannelSend = (body) => {
+    if (typeof body !== 'string') return;
+    for (const [key, value] of new URLSearchParams(body)) {
+      if (!/^req\\d+___data__$/.test(key)) continue;
+      let msg;
+      try { msg = JSON.parse(value); } catch (e) { continue; }
+      if (msg.addTarget) {
+        const target = msg.addTarget;
+        emit({ kind: 'listen', targetId: target.targetId, query: target.query || null,
+               documents: target.documents ? target.documents.documents : null,
+               resume: !!(target.resumeToken || target.readTime) });
+      } else if (msg.removeTarget !== undefined) {
+        emit({ kind: 'unlisten', targetId: msg.removeTarget });
+      } else if (msg.writes) {
+        emit({ kind: 'write', writes: msg.writes.map(describeWrite) });
+      }
+    }
+  };
+
+  // WebChannel frames are "<length>\\n<json>" with json = [[arrayId, [message, ...]], ...]
+  const parseFrames = (state, text) => {
+    const messages = [];
+    for (;;) {
+      const nl = text.indexOf('\\n', state.offset);
+      if (nl < 0) break;
+      const length = parseInt(text.slice(state.offset, nl), 10);
+      if (isNaN(length)) { state.offset = text.length; break; }
+      if (text.length < nl + 1 + length) break;
+      const frame = text.slice(nl + 1, nl + 1 + length);
+      state.offset = nl + 1 + length;
+      try {
+        for (const [, payload] of JSON.parse(frame)) {
+          if (Array.isArray(payload)) messages.push(...payload.filter((m) => m && typeof m === 'object'));
+        }
+      } catch (e) {}
+    }
+    return messages;
+  };
+
+  const onListenMessages = (messages) => {
+    const out = [];
+    for (const m of messages) {
+      if (m.documentChange) {
+        out.push({ type: 'change', name: m.documentChange.document.name,
+                   targets: m.documentChange.targetIds || [] });
+      } else if (m.documentDelete) {
+        out.push({ type: 'delete', name: m.documentDelete.document });
+      } else if (m.documentRemove) {
+        out.push({ type: 'remove', name: m.documentRemove.document });
+      } else if (m.targetChange) {
+        const cause = m.targetChange.cause;
+        out.push({ type: 'target', change: m.targetChange.targetChangeType || 'NO_CHANGE',
+                   targets: m.targetChange.targetIds || [],
+                   cause: cause ? { code: cause.code, message: cause.message } : null });
+      } else if (m.filter) {
+        out.push({ type: 'filter', target: m.filter.targetId, count: m.filter.count });
+      }
+    }
+    if (out.length) emit({ kind: 'listen-data', messages: out });
+  };
+
+  const onRest = (match, body, text, status, ms) => {
+    const [, parent, method] = match;
+    let request = null;
+    let response = null;
+    try { request = body ? JSON.parse(body) : null; } catch (e) {}
+    try { response = text ? JSON.parse(text) : null; } catch (e) {}
+    const rows = Array.isArray(response) ? response : [];
+    const failure = (response && response.error) || (rows[0] && rows[0].error) || null;
+    const event = { kind: 'rest', method, parent, status, ms,
+                    error: failure ? { code: failure.code, message: failure.message } : null };
+    if (method === 'runQuery') {
+      event.query = request && request.structuredQuery || null;
+      event.documents = rows.filter((r) => r.document).length;
+    } else if (method === 'runAggregationQuery') {
+      const aggregation = request && request.structuredAggregationQuery;
+      event.query = aggregation && aggregation.structuredQuery || null;
+      event.aggregation = true;
+    } else if (method === 'batchGet') {
+      event.requested = request && request.documents ? request.documents.length : 0;
+      event.documents = rows.filter((r) => r.found).length;
+    } else if (method === 'commit') {
+      event.writes = request && request.writes ? request.writes.map(describeWrite) : [];
+    }
+    emit(event);
+  };
+
+  const XHR = XMLHttpRequest.prototype;
+  const open = XHR.open;
+  const send = XHR.send;
+  XHR.open = function (method, url) {
+    this.__harnessUrl = decode(String(url));
+    return open.apply(this, arguments);
+  };
+  XHR.send = function (body) {
+    const url = this.__harnessUrl || '';
+    const channel = url.match(CHANNEL);
+    const rest = url.match(REST);
+    if (channel) {
+      if (body) onChannelSend(body);
+      if (channel[1] === 'Listen') {
+        const state = { offset: 0 };
+        const read = () => {
+          try { if (this.readyState >= 3) onListenMessages(parseFrames(state, this.responseText)); } catch (e) {}
+        };
+        this.addEventListener('readystatechange', read);
+        this.addEventListener('progress', read);
+      }
+    } else if (rest) {
+      const started = performance.now();
+      this.addEventListener('loadend', () => {
+        let text = '';
+        try { text = this.responseText; } catch (e) {}
+        onRest(rest, body, text, this.status, performance.now() - started);
+      });
+    }
+    return send.apply(this, arguments);
+  };
+
+  const originalFetch = window.fetch;
+  window.fetch = function (input, init) {
+    const url = decode(typeof input === 'string' ? input : (input && input.url) || '');
+    const rest = url.match(REST);
+    const promise = originalFetch.apply(this, arguments);
+    if (!rest) return promise;
+    const started = performance.now();
+    const body = init && typeof init.body === 'string' ? init.body : null;
+    return promise.then((response) => {
+      response.clone().text()
+        .then((text) => onRest(rest, body, text, response.status, performance.now() - started))
+        .catch(() => {});
+      return response;
+    });
+  };
+})();
+"""
+
+
+# ---------------------------------------------------------------------------
+# Query shapes (shared with the N+1 and index checks)
+# ---------------------------------------------------------------------------
+
+_DOCUMENT_ID = re.compile(r"^[A-Za-z0-9_-]{16,}$")
+
+
+def decode_value(value: Dict[str, Any]) -> Any:
+    """Python value for a Firestore REST ``Value``."""
+    if not isinstance(value, dict) or not value:
+        return value
+    kind, raw = next(iter(value.items()))
+    if kind == "arrayValue":
+        return [decode_value(v) for v in raw.get("values", [])]
+    if kind == "mapValue":
+        return {k: decode_value(v) for k, v in raw.get("fields", {}).items()}
+    if kind == "integerValue":
+        return int(raw)
+    if kind == "nullValue":
+        return None
+    return raw
+
+
+def flatten_filters(where: Optional[Dict[str, Any]]) -> List[Tuple[str, str, Any]]:
+    """``(field, op, value)`` for every filter under ``where``, ANDed composites flattened."""
+    if not where:
+        return []
+    if "compositeFilter" in where:
+        out: List[Tuple[str, str, Any]] = []
+        for sub in where["compositeFilter"].get("filters", []):
+            out.extend(flatten_filters(sub))
+        return out
+    if "fieldFilter" in where:
+        f = where["fieldFilter"]
+        return [(f["field"]["fieldPath"], f["op"], decode_value(f.get("value", {})))]
+    if "unaryFilter" in where:
+        f = where["unaryFilter"]
+        return [(f["field"]["fieldPath"], f["op"], None)]
+    return []
+
+
+def relative_path(name: str) -> str:
+    """``users/abc`` from ``projects/p/databases/(default)/documents/users/abc``."""
+    _, _, rest = name.partition("/documents")
+    return rest.strip("/")
+
+
+def query_shape(structured: Dict[str, Any], parent: str = "") -> Dict[str, Any]:
+    """Collection, filters and ordering of a ``StructuredQuery``; ``values`` kept apart."""
+    source = (structured.get("from") or [{}])[0]
+    filters = flatten_filters(structured.get("where"))
+    parent_path = relative_path(parent)
+    return {
+        "collection": source.get("collectionId", ""),
+        "collectionGroup": bool(source.get("allDescendants")),
+        # Subcollection parents differ per document, only their shape matters
+        "parent": document_key(parent_path) if parent_path else "",
+        "filters": [[fieldpath, op] for fieldpath, op, _ in filters],
+        "values": [value for _, _, value in filters],
+        "orderBy": [[o["field"]["fieldPath"], o.get("direction", "ASCENDING")] for o in structured.get("orderBy", [])],
+        "limit": structured.get("limit"),
+    }
+
+
+def shape_key(shape: Dict[str, Any]) -> str:
+    """Readable signature: ``bookings where guestId EQUAL, status IN order by createdAt DESCENDING``."""
+    text = f"{shape['parent'] + '/' if shape['parent'] else ''}{shape['collection']}"
+    if shape["collectionGroup"]:
+        text = f"group:{text}"
+    if shape["filters"]:
+        text += " where " + ", ".join(f"{f} {op}" for f, op in shape["filters"])
+    if shape["orderBy"]:
+        text += " order by " + ", ".join(f"{f} {d}" for f, d in shape["orderBy"])
+    if shape["limit"] is not None:
+        text += " limit"
+    return text
+
+
+def document_key(path: str) -> str:
+    """``users/:id`` for ``users/abc``; ``listing/:id/reviews/:id`` for nested paths."""
+    return "/".join(":id" if i % 2 else seg for i, seg in enumerate(path.split("/")))
+
+
+def route_of(path: str) -> str:
+    """Pathname with document ids replaced, so /guest/listing/<id> groups together."""
+    segments = [":id" if _DOCUMENT_ID.match(seg) else seg for seg in path.split("/")]
+    return "/".join(segments) or "/"
+
+
+# ---------------------------------------------------------------------------
+# Accounting
+# ---------------------------------------------------------------------------
+
+def _counters() -> Dict[str, int]:
+    return {"reads": 0, "writes": 0, "listens": 0, "unlistens": 0, "rest": 0}
+
+
+@dataclass
+class Target:
+    step: int
+    route: str
+    kind: str  # "query" or "documents"
+    shape: Optional[Dict[str, Any]]
+    documents: List[str]
+    query: Optional[Dict[str, Any]] = None  # entry in FirestoreTracker.queries
+    docs: int = 0
+    current: bool = False
+    open: bool = True
+
+
+@dataclass
+class FirestoreTracker:
+    """Firestore usage for one browser context."""
+
+    test: str
+    steps: List[Dict[str, Any]] = field(default_factory=list)
+    targets: Dict[Tuple[str, int], Target] = field(default_factory=dict)
+    queries: List[Dict[str, Any]] = field(default_factory=list)
+    # Single-document gets/listeners: {"key": "users/:id", "id": ...}
+    lookups: List[Dict[str, Any]] = field(default_factory=list)
+    # Distinct documents delivered per step, for "how many cards were on screen"
+    step_documents: Dict[int, set] = field(default_factory=lambda: defaultdict(set))
+    routes: Dict[str, Dict[str, int]] = field(default_factory=lambda: defaultdict(_counters))
+    peak_listeners: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    # Page load that sent the latest event; earlier loads' listeners died with them
+    last_client: str = ""
+
+    def __post_init__(self) -> None:
+        self.mark("load", "", "")
+
+    def open_listeners(self) -> int:
+        return sum(1 for (client, _), t in self.targets.items() if client == self.last_client and t.open)
+
+    @property
+    def step(self) -> int:
+        return len(self.steps) - 1
+
+    def mark(self, action: str, target: str, url: str) -> None:
+        self.steps.append({"index": len(self.steps), "action": action, "target": target,
+                           "url": url, "counts": _counters()})
+
+    def _charge(self, step: int, route: str, key: str, amount: int = 1) -> None:
+        self.steps[step]["counts"][key] += amount
+        self.routes[route][key] += amount
+
+    def on_event(self, event: Dict[str, Any]) -> None:
+        route = route_of(event.get("path", "/"))
+        kind = event.get("kind")
+        client = self.last_client = event.get("client", "")
+        if kind == "listen":
+            query = event.get("query")
+            shape = query_shape(query.get("structuredQuery", {}), query.get("parent", "")) if query else None
+            documents = [relative_path(d) for d in event.get("documents") or []]
+            target = self.targets[(client, event["targetId"])] = Target(
+                self.step, route, "query" if query else "documents", shape, documents)
+            self._charge(self.step, route, "listens")
+            if shape is not None:
+                target.query = {"source": "listen", "step": self.step, "route": route, "t": event.get("t"),
+                                "shape": shape, "key": shape_key(shape), "resume": event.get("resume"),
+                                "documents": 0}
+                self.queries.append(target.query)
+            for path in documents:
+                self.lookups.append({"step": self.step, "route": route, "t": event.get("t"),
+                                     "key": document_key(path), "id": path.rsplit("/", 1)[-1]})
+            open_here = sum(1 for (c, _), t in self.targets.items() if c == client and t.open)
+            self.peak_listeners[route] = max(self.peak_listeners[route], open_here)
+        elif kind == "unlisten":
+            target = self.targets.get((client, event["targetId"]))
+            if target:
+                target.open = False
+            self._charge(self.step, route, "unlistens")
+        elif kind == "listen-data":
+            self._on_listen_data(client, route, event["messages"])
+        elif kind == "write":
+            writes = [w for w in event.get("writes", []) if w["op"] != "verify"]
+            self._charge(self.step, route, "writes", len(writes))
+        elif kind == "rest":
+            self._on_rest(route, event)
+
+    def _on_listen_data(self, client: str, route: str, messages: List[Dict[str, Any]]) -> None:
+        for message in messages:
+            if message["type"] == "change":
+                # A document delivered to several targets is read once
+                owner = next((self.targets[(client, t)] for t in message["targets"] if (client, t) in self.targets), None)
+                for t in message["targets"]:
+                    target = self.targets.get((client, t))
+                    if target:
+                        target.docs += 1
+                        if target.query is not None:
+                            target.query["documents"] = target.docs
+                step, where = (owner.step, owner.route) if owner else (self.step, route)
+                self._charge(step, where, "reads")
+                self.step_documents[step].add(relative_path(message["name"]))
+            elif message["type"] == "target" and message.get("cause"):
+                # e.g. FAILED_PRECONDITION (9) "The query requires an index"
+                for t in message["targets"]:
+                    target = self.targets.get((client, t))
+                    if target:
+                        target.open = False
+                        if target.query is not None:
+                            target.query["error"] = message["cause"]
+            elif message["type"] == "target" and message["change"] == "CURRENT":
+                for t in message["targets"]:
+                    target = self.targets.get((client, t))
+                    if target and not target.current:
+                        target.current = True
+                        # An empty query result still costs one read
+                        if target.kind == "query" and target.docs == 0:
+                            self._charge(target.step, target.route, "reads")
+
+    def _on_rest(self, route: str, event: Dict[str, Any]) -> None:
+        method = event["method"]
+        self._charge(self.step, route, "rest")
+        if method == "commit":
+            writes = [w for w in event.get("writes", []) if w["op"] != "verify"]
+            self._charge(self.step, route, "writes", len(writes))
+        elif method == "batchGet":
+            self._charge(self.step, route, "reads", max(event.get("requested", 0), event.get("documents", 0)))
+        elif method in ("runQuery", "runAggregationQuery"):
+            self._charge(self.step, route, "reads", 1 if event.get("aggregation") else max(1, event.get("documents", 0)))
+            if event.get("query"):
+                shape = query_shape(event["query"], event.get("parent", ""))
+                self.queries.append({"source": method, "step": self.step, "route": route, "t": event.get("t"),
+                                     "shape": shape, "key": shape_key(shape), "documents": event.get("documents", 0),
+                                     "error": event.get("error")})
+
+    def summary(self) -> Dict[str, Any]:
+        routes = {}
+        for route, counts in self.routes.items():
+            routes[route] = {**counts, "peakListeners": self.peak_listeners.get(route, 0)}
+        for step in self.steps:
+            by_collection: Dict[str, int] = defaultdict(int)
+            for path in self.step_documents.get(step["index"], ()):
+                by_collection[document_key(path).rsplit("/", 1)[0]] += 1
+            step["documentsByCollection"] = dict(by_collection)
+        return {
+            "test": self.test,
+            "steps": self.steps,
+            "routes": routes,
+            "queries": self.queries,
+            "lookups": self.lookups,
+            "openListenersAtClose": self.open_listeners(),
+            "targets": [{"step": t.step, "route": t.route, "kind": t.kind,
+                         "key": shape_key(t.shape) if t.shape else ", ".join(t.documents[:3]),
+                         "docs": t.docs, "open": t.open} for t in self.targets.values()],
+        }
+
+
+# ---------------------------------------------------------------------------
+# Runner feature
+# ---------------------------------------------------------------------------
+
+async def attach(context: Any) -> FirestoreTracker:
+    from . import instrument
+
+    tracker = FirestoreTracker(instrument.test_id())
+    await context.expose_binding(BINDING, lambda source, event: tracker.on_event(event))
+    await context.add_init_script(TRAFFIC_INIT_SCRIPT)
+    context._harness_firestore = tracker
+    return tracker
+
+
+async def _mark_step(page: Any, action: str, target: str) -> None:
+    tracker = getattr(page.context, "_harness_firestore", None)
+    if tracker is not None:
+        tracker.mark(action, target, page.url)
+
+
+async def _write_summary(context: Any) -> None:
+    tracker = getattr(context, "_harness_firestore", None)
+    if tracker is None:
+        return
+    RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with RESULTS_FILE.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(tracker.summary()) + "\n")
+
+
+def reset() -> None:
+    RESULTS_FILE.unlink(missing_ok=True)
+
+
+def install() -> None:
+    """Runner feature: account Firestore traffic in every context the script opens."""
+    from . import instrument
+
+    async def on_context(context: Any) -> None:
+        await attach(context)
+
+    instrument.on_context(on_context)
+    instrument.on_action(_mark_step)
+    instrument.before_close(_write_summary)
+
+
+def load_results() -> List[Dict[str, Any]]:
+    if not RESULTS_FILE.exists():
+        return []
+    return [json.loads(line) for line in RESULTS_FILE.read_text(encoding="utf-8").splitlines() if line]
+
+
+def aggregate(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-route totals across tests, plus the most expensive steps."""
+    routes: Dict[str, Dict[str, Any]] = defaultdict(lambda: {**_counters(), "peakListeners": 0, "tests": []})
+    steps = []
+    for result in results:
+        for route, counts in result["routes"].items():
+            total = routes[route]
+            for key in _counters():
+                total[key] += counts[key]
+            total["peakListeners"] = max(total["peakListeners"], counts["peakListeners"])
+            total["tests"].append(result["test"])
+        for step in result["steps"]:
+            steps.append({"test": result["test"], **step})
+    steps.sort(key=lambda s: -s["counts"]["reads"])
+    return {"routes": dict(sorted(routes.items(), key=lambda kv: -kv[1]["reads"])), "topSteps": steps[:20]}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Firestore usage per route and per step")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("report", help="aggregate the last run's traffic")
+    sub.add_parser("clear", help="forget the last run's traffic")
+    args = parser.parse_args(argv)
+
+    if args.command == "clear":
+        reset()
+        return 0
+    results = load_results()
+    if not results:
+        print("No Firestore traffic recorded yet (run with --feature firestore)")
+        return 0
+    summary = aggregate(results)
+    path = reporting.write_report("firestore_usage", summary)
+    for route, counts in summary["routes"].items():
+        print(f"{route:<28} {counts['reads']:>6} reads {counts['writes']:>5} writes "
+              f"{counts['listens']:>4} listeners (peak {counts['peakListeners']})")
+    print("Most expensive steps:")
+    for step in summary["topSteps"][:5]:
+        print(f"  {step['test']} step {step['index']} {step['action']} {step['target'][:60]}: {step['counts']['reads']} reads")
+    print(f"Report -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""Load driver for the payment callables on the Functions emulator.
+
+Calls ``processWalletTopUp``, ``requestHostWithdrawal``,
+``processHostPayoutFunction`` and ``exchangePayPalOAuth`` the way
+``httpsCallable`` does: ``POST /<project>/us-central1/<name>`` with
+``{"data": ...}`` and the caller's ID token. The functions reach PayPal through
+``PAYPAL_API_BASE_URL``, so the PayPal stand-in sits behind them and its
+latency and failures can be dialled in.
+
+The emulator starts one worker process per function on the first call and
+another one whenever every worker is busy, and each new worker loads
+``functions/lib/index.js`` from scratch. Per function the run therefore has
+three phases:
+
+- ``firstCall``: one call, which pays the cold start on a freshly started emulator;
+- ``burst``: N calls at once per concurrency level; calls beyond the idle
+  workers wait for new ones, so this is cold start under load;
+- ``warm``: ``--iterations`` calls with N in flight, on the workers the burst left.
+
+Each phase reports p50/p95/p99, calls/s, error codes and, with the in-process
+stand-in, the PayPal requests it made. ``limit`` is the highest level before
+throughput stops growing by 10 % or the error rate passes ``--max-error-rate``.
+``requestHostWithdrawal`` is disabled in ``index.ts`` and always answers
+``UNIMPLEMENTED``; that counts as its expected result, so it measures the bare
+callable round trip. Top-ups read and then update ``walletBalance`` outside a
+transaction, so the run also checks the guest's final balance; lost top-ups
+make the exit code 1.
+
+The Functions emulator config lives in ``firebase.functions-bench.json`` rather
+than ``firebase.json``, so ``firebase deploy`` and ``npm run emulators`` keep
+ignoring ``functions/``. It needs a built ``functions/lib``.
+
+    cd testsprite_tests
+    (cd ../functions && npm ci && npm run build)
+    PAYPAL_API_BASE_URL=http://127.0.0.1:8790 firebase emulators:start --config ../firebase.functions-bench.json
+    python -m harness.functions_bench --concurrency 1 5 10 25 --iterations 50
+    python -m harness.functions_bench --functions processWalletTopUp --paypal-latency lognormal:300:0.5
+"""
+
+import argparse
+import socket
+import sys
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import config, reporting
+from .emulator import AuthEmulator, FirestoreEmulator, FunctionsEmulator
+from .stubs.base import parse_fault_args
+from .stubs.paypal import PayPalStub, captured_order
+
+FUNCTIONS = ("processWalletTopUp", "requestHostWithdrawal", "processHostPayoutFunction", "exchangePayPalOAuth")
+# Error codes that are the function's normal answer rather than a failure
+EXPECTED = {"requestHostWithdrawal": {"UNIMPLEMENTED"}}
+
+GUEST_EMAIL = "bench-fn-guest@example.com"
+HOST_EMAIL = "bench-fn-host@example.com"
+BENCH_PASSWORD = "12345abc"
+HOST_PAYPAL_EMAIL = "bench-fn-host-paypal@example.com"
+TOPUP_AMOUNT = 500
+PAYOUT_AMOUNT = 1500
+
+
+@dataclass
+class Call:
+    function: str
+    status: int
+    code: str
+    ok: bool
+    ms: float
+    started: float
+
+
+@dataclass
+class Accounts:
+    guest: str
+    guest_token: str
+    host: str
+    host_token: str
+
+
+def sign_in_accounts(auth: AuthEmulator, db: FirestoreEmulator) -> Accounts:
+    """Benchmark guest and host, with the ``users`` docs the callables read."""
+    guest = auth.sign_in(GUEST_EMAIL, BENCH_PASSWORD)
+    host = auth.sign_in(HOST_EMAIL, BENCH_PASSWORD)
+    db.set_many([
+        (f"users/{guest['localId']}", {"email": GUEST_EMAIL, "role": "guest", "roles": ["guest"],
+                                       "walletBalance": 0}),
+        (f"users/{host['localId']}", {"email": HOST_EMAIL, "role": "host", "roles": ["host"],
+                                      "walletBalance": 0, "hostPayPalEmail": HOST_PAYPAL_EMAIL,
+                                      "hostPayPalEmailVerified": True}),
+    ])
+    return Accounts(guest["localId"], guest["idToken"], host["localId"], host["idToken"])
+
+
+# ---------------------------------------------------------------------------
+# Payloads
+# ---------------------------------------------------------------------------
+
+Payload = Tuple[Dict[str, Any], str]
+
+
+def payloads(function: str, count: int, accounts: Accounts, db: FirestoreEmulator, paypal_url: str) -> List[Payload]:
+    """``count`` ready-to-send ``(data, id_token)`` pairs; anything they need is seeded first."""
+    if function == "processWalletTopUp":
+        # One captured order per call, so no call is answered "already processed"
+        with ThreadPoolExecutor(max_workers=min(count, 16) or 1) as pool:
+            orders = list(pool.map(lambda _: captured_order(paypal_url, f"{TOPUP_AMOUNT:.2f}"), range(count)))
+        return [({"orderId": order, "amount": TOPUP_AMOUNT, "description": "Functions benchmark top-up"},
+                 accounts.guest_token) for order in orders]
+    if function == "requestHostWithdrawal":
+        return [({"amount": 100}, accounts.host_token)] * count
+    if function == "processHostPayoutFunction":
+        # processHostPayout updates the earnings transaction with the payout ids
+        ids = [f"bench-fn-payout-{uuid.uuid4().hex[:12]}" for _ in range(count)]
+        for start in range(0, count, 500):
+            db.set_many([(f"transactions/{tx}", {"userId": accounts.host, "type": "booking_payment",
+                                                 "amount": PAYOUT_AMOUNT, "status": "completed"})
+                         for tx in ids[start:start + 500]])
+        return [({"hostId": accounts.host, "transactionId": tx, "amount": PAYOUT_AMOUNT,
+                  "bookingId": f"bench-fn-booking-{tx[-12:]}"}, accounts.host_token) for tx in ids]
+    if function == "exchangePayPalOAuth":
+        # The stand-in accepts any authorization code
+        return [({"authCode": f"bench-code-{uuid.uuid4().hex[:12]}",
+                  "redirectUri": f"{config.BASE_URL}/paypal-callback"}, accounts.guest_token) for _ in range(count)]
+    raise ValueError(f"unknown function {function!r}")
+
+
+# ---------------------------------------------------------------------------
+# Calls
+# ---------------------------------------------------------------------------
+
+def invoke(client: FunctionsEmulator, function: str, payload: Payload) -> Call:
+    data, token = payload
+    started = time.time()
+    began = time.perf_counter()
+    status, body = client.call(function, data, token)
+    ms = (time.perf_counter() - began) * 1000
+    if status == 0:
+        code = "NO_RESPONSE"
+    elif "error" in body:
+        code = str(body["error"].get("status", f"HTTP_{status}"))
+    else:
+        code = "OK"
+    return Call(function, status, code, code == "OK" or code in EXPECTED.get(function, ()), ms, started)
+
+
+def wave(client: FunctionsEmulator, function: str, batch: List[Payload], concurrency: int) -> Tuple[List[Call], float]:
+    """Send ``batch`` with ``concurrency`` calls in flight; returns the calls and the wall time."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        calls = list(pool.map(lambda payload: invoke(client, function, payload), batch))
+    return calls, time.perf_counter() - started
+
+
+def paypal_summary(stub: Optional[PayPalStub], since: int) -> Optional[Dict[str, Any]]:
+    """PayPal requests the stand-in served since log index ``since``, per path kind."""
+    if stub is None:
+        return None
+    per_path: Dict[str, List[float]] = {}
+    failed = 0
+    for record in stub.log[since:]:
+        # Collapse order ids so every capture/get lands in one bucket
+        path = "/".join("{id}" if len(part) in (13, 17) and part.isalnum() and part.isupper() else part
+                        for part in record.path.split("/"))
+        per_path.setdefault(f"{record.method} {path}", []).append(record.injected_delay_ms + record.handler_ms)
+        failed += not 200 <= record.status < 300
+    return {"requests": sum(len(v) for v in per_path.values()), "failed": failed,
+            "ms": {path: reporting.summarize(values) for path, values in per_path.items()}}
+
+
+def phase(calls: List[Call], wall_s: float, paypal: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    ok = [c for c in calls if c.ok]
+    result = {
+        "calls": len(calls),
+        "ok": len(ok),
+        "errorRate": 1 - len(ok) / len(calls) if calls else 0.0,
+        "codes": dict(Counter(c.code for c in calls)),
+        "callsPerSecond": len(ok) / wall_s if wall_s else 0.0,
+        "ms": reporting.summarize([c.ms for c in calls]),
+    }
+    if paypal is not None:
+        result["paypal"] = paypal
+    return result
+
+
+def limit_of(levels: List[Dict[str, Any]], max_error_rate: float) -> Optional[int]:
+    """Highest concurrency before warm throughput stops growing by 10 % or errors pass the limit."""
+    best = None
+    previous = 0.0
+    for level in levels:
+        warm = level["warm"]
+        if warm["errorRate"] > max_error_rate or (best is not None and warm["callsPerSecond"] < previous * 1.1):
+            break
+        best, previous = level["concurrency"], warm["callsPerSecond"]
+    return best
+
+
+def bench_function(client: FunctionsEmulator, function: str, accounts: Accounts, db: FirestoreEmulator,
+                   paypal_url: str, stub: Optional[PayPalStub], levels: List[int], iterations: int,
+                   max_error_rate: float, log: Callable[[str], None]) -> Dict[str, Any]:
+    all_calls: List[Call] = []
+    total_s = 0.0
+
+    def run(batch: List[Payload], concurrency: int) -> Dict[str, Any]:
+        nonlocal total_s
+        mark = len(stub.log) if stub else 0
+        calls, wall_s = wave(client, function, batch, concurrency)
+        all_calls.extend(calls)
+        total_s += wall_s
+        return phase(calls, wall_s, paypal_summary(stub, mark))
+
+    def prepared(count: int) -> List[Payload]:
+        if stub is None:
+            return payloads(function, count, accounts, db, paypal_url)
+        # Seeding talks to the stand-in too; keep injected faults out of it
+        faults, stub.faults = stub.faults, []
+        try:
+            return payloads(function, count, accounts, db, paypal_url)
+        finally:
+            stub.faults = faults
+
+    first = run(prepared(1), 1)
+    log(f"{function:<26} first call   {first['ms']['max']:>8.1f} ms  {', '.join(first['codes'])}")
+    results = []
+    for concurrency in levels:
+        burst = run(prepared(concurrency), concurrency)
+        warm = run(prepared(iterations), concurrency)
+        results.append({"concurrency": concurrency, "burst": burst, "warm": warm})
+        log(f"{function:<26} c={concurrency:<4} burst p95 {burst['ms']['p95']:>8.1f} ms | warm p50 "
+            f"{warm['ms']['p50']:>7.1f} p95 {warm['ms']['p95']:>7.1f} p99 {warm['ms']['p99']:>7.1f} ms "
+            f"{warm['callsPerSecond']:>6.1f}/s err {warm['errorRate']:.1%}")
+
+    warm_ms = [c.ms for c in all_calls[1:]]
+    return {
+        "function": function,
+        "firstCall": first,
+        "levels": results,
+        "limit": limit_of(results, max_error_rate),
+        # Cold start as seen by a caller: first call over the warm median
+        "coldOverWarmMs": first["ms"]["max"] - reporting.summarize(warm_ms)["p50"] if warm_ms else None,
+        "overall": phase(all_calls, total_s, None),
+        "okTopUps": sum(1 for c in all_calls if c.ok) if function == "processWalletTopUp" else None,
+    }
+
+
+def _reachable(host: str) -> bool:
+    name, _, port = host.rpartition(":")
+    try:
+        socket.create_connection((name, int(port)), timeout=2).close()
+    except OSError:
+        return False
+    return True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--functions", nargs="+", choices=FUNCTIONS, default=list(FUNCTIONS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 5, 10, 25])
+    parser.add_argument("--iterations", type=int, default=50, help="warm calls per concurrency level")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="error rate that ends the usable range")
+    parser.add_argument("--paypal", help="running stand-in URL; otherwise one is started on --paypal-port")
+    parser.add_argument("--paypal-port", type=int, default=8790,
+                        help="must match the PAYPAL_API_BASE_URL the emulator was started with")
+    parser.add_argument("--paypal-latency", default="none", help="e.g. fixed:80, lognormal:300:0.5")
+    parser.add_argument("--paypal-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    for name, host in (("Functions", config.FUNCTIONS_EMULATOR_HOST), ("Auth", config.AUTH_EMULATOR_HOST),
+                       ("Firestore", config.FIRESTORE_EMULATOR_HOST)):
+        if not _reachable(host):
+            print(f"{name} emulator is not listening on {host}", file=sys.stderr)
+            return 2
+
+    db = FirestoreEmulator()
+    accounts = sign_in_accounts(AuthEmulator(), db)
+    client = FunctionsEmulator()
+    stub = None
+    if not args.paypal:
+        faults = parse_fault_args(args.paypal_latency, args.paypal_error_rate, "http", [], args.seed)
+        stub = PayPalStub(port=args.paypal_port, faults=faults, seed=args.seed).start()
+    paypal_url = args.paypal or stub.base_url
+
+    try:
+        results = [bench_function(client, function, accounts, db, paypal_url, stub, args.concurrency,
+                                  args.iterations, args.max_error_rate, print) for function in args.functions]
+    finally:
+        if stub:
+            stub.stop()
+
+    payload: Dict[str, Any] = {"functions": results, "concurrency": args.concurrency,
+                               "iterations": args.iterations, "paypalLatency": args.paypal_latency,
+                               "paypalErrorRate": args.paypal_error_rate}
+    lost = 0
+    topups = next((r for r in results if r["function"] == "processWalletTopUp"), None)
+    if topups:
+        balance = (db.get(f"users/{accounts.guest}") or {}).get("walletBalance", 0)
+        expected = topups["okTopUps"] * TOPUP_AMOUNT
+        lost = round((expected - balance) / TOPUP_AMOUNT)
+        payload["wallet"] = {"expectedBalance": expected, "balance": balance, "lostTopUps": lost}
+        print(f"wallet: {topups['okTopUps']} top-ups succeeded, balance {balance} of {expected} "
+              f"({lost} lost updates)")
+    path = reporting.write_report("functions_bench", payload)
+    for result in results:
+        cold = result["coldOverWarmMs"]
+        print(f"{result['function']:<26} cold +{cold or 0:.0f} ms, usable up to "
+              f"c={result['limit'] if result['limit'] is not None else '-'}")
+    print(f"Report -> {path}")
+    return 1 if lost else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""Cold-start import cost of the Cloud Functions bundle, per file and per function.
+
+Every function instance loads ``functions/lib/index.js``, and with it
+``firebase-functions``, ``firebase-admin``, ``paypalPayouts`` and
+``paypalPayments``, whichever trigger it serves. Both PayPal modules call
+``admin.firestore()`` at the top level, so even a callable that throws straight
+away pays for loading the Firestore client. This module starts ``--runs`` fresh
+``node`` processes. Each one hooks ``Module._load`` and times every file the
+first time it is required. A lazy require is charged to the module whose
+evaluation triggered it.
+
+Files are grouped by npm package (or ``lib/<file>.js`` for the bundle's own
+code). For every export of ``index.js`` the module reads which imports its body
+references, plus the Firestore client when it calls ``admin.firestore()``.
+What those imports loaded is needed; the rest is cold start the function pays
+for code it never runs. Functions are ranked by that unused load time, which
+is the case for splitting the bundle or lazy-loading the PayPal modules.
+
+Needs ``npm ci`` in ``functions/``; profile a fresh ``npm run build`` after
+changing ``functions/src``.
+
+    cd testsprite_tests
+    python -m harness.functions_imports --runs 10
+    python -m harness.functions_imports --runs 20 --top 25
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from . import config, reporting
+
+FUNCTIONS_DIR = config.APP_DIR / "functions"
+FIRESTORE_PACKAGE = "@google-cloud/firestore"
+_MARKER = "__HARNESS_IMPORTS__"
+
+# Runs in the profiled process: time each first-time require, self and inclusive,
+# and note which module required which
+_PROFILER_JS = r"""
+const Module = require('module');
+const path = require('path');
+const { performance } = require('perf_hooks');
+const records = [];
+const edges = new Set();
+const stack = [];
+const load = Module._load;
+Module._load = function (request, parent, isMain) {
+  let file;
+  try {
+    file = Module._resolveFilename(request, parent, isMain);
+  } catch (error) {
+    return load.apply(this, arguments);
+  }
+  if (!path.isAbsolute(file)) {
+    return load.apply(this, arguments);
+  }
+  // Cached requires still count as dependencies, just not as load time
+  if (stack.length) edges.add(JSON.stringify([stack[stack.length - 1].file, file]));
+  if (Module._cache[file]) {
+    return load.apply(this, arguments);
+  }
+  const record = { file, parent: stack.length ? stack[stack.length - 1].file : null, childMs: 0 };
+  stack.push(record);
+  const started = performance.now();
+  try {
+    return load.apply(this, arguments);
+  } finally {
+    record.ms = performance.now() - started;
+    stack.pop();
+    if (stack.length) stack[stack.length - 1].childMs += record.ms;
+    record.selfMs = record.ms - record.childMs;
+    delete record.childMs;
+    records.push(record);
+  }
+};
+const bootMs = performance.now();
+let error = null;
+try {
+  require(process.env.HARNESS_ENTRY);
+} catch (e) {
+  error = String((e && e.stack) || e);
+}
+const totalMs = performance.now() - bootMs;
+process.stdout.write('\n' + process.env.HARNESS_MARKER + JSON.stringify({
+  records, edges: [...edges].map(JSON.parse), bootMs, totalMs, heapUsed: process.memoryUsage().heapUsed, error,
+}) + '\n');
+// firebase-admin can keep handles open; the measurement is done
+process.exit(0);
+"""
+
+
+def group_of(file: str) -> str:
+    """npm package of ``file``, or its path relative to ``functions/``."""
+    parts = Path(file).parts
+    if "node_modules" in parts:
+        index = len(parts) - 1 - parts[::-1].index("node_modules")
+        name = parts[index + 1]
+        return f"{name}/{parts[index + 2]}" if name.startswith("@") else name
+    try:
+        return Path(file).relative_to(FUNCTIONS_DIR).as_posix()
+    except ValueError:
+        return file
+
+
+def _label(file: str) -> str:
+    """Path inside its package, or relative to ``functions/``."""
+    parts = Path(file).parts
+    if "node_modules" in parts:
+        return "/".join(parts[len(parts) - parts[::-1].index("node_modules"):])
+    return group_of(file)
+
+
+def profile_once(node: str, entry: Path) -> Dict[str, Any]:
+    env = {
+        "PATH": os.environ.get("PATH", ""),
+        "HOME": os.environ.get("HOME", ""),
+        "HARNESS_ENTRY": str(entry),
+        "HARNESS_MARKER": _MARKER,
+        # What the runtime provides; initializeApp() reads it at load
+        "GCLOUD_PROJECT": config.FIREBASE_PROJECT,
+        "FIREBASE_CONFIG": json.dumps({"projectId": config.FIREBASE_PROJECT}),
+    }
+    started = time.perf_counter()
+    process = subprocess.run([node, "-e", _PROFILER_JS], cwd=FUNCTIONS_DIR, env=env,
+                             capture_output=True, text=True, timeout=120)
+    wall_ms = (time.perf_counter() - started) * 1000
+    line = next((l for l in process.stdout.splitlines() if l.startswith(_MARKER)), None)
+    if line is None:
+        raise RuntimeError(f"node exited {process.returncode} without a profile:\n{process.stderr[-2000:]}")
+    result = json.loads(line[len(_MARKER):])
+    result["wallMs"] = wall_ms
+    return result
+
+
+def node_baseline(node: str, runs: int) -> float:
+    """Median wall time of an empty ``node`` process, to separate Node's own start-up."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([node, "-e", "0"], capture_output=True, timeout=60)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+# ---------------------------------------------------------------------------
+# What each function uses
+# ---------------------------------------------------------------------------
+
+_IMPORT = re.compile(r'^const (\w+) = (?:__importStar\()?require\("([^"]+)"\)', re.M)
+# Top-level statements of tsc output start in column 0
+_STATEMENT = re.compile(r"^(?:exports\.(\w+) = (?!.*void 0;$)|(?:async )?function (\w+)|const (\w+) = )", re.M)
+
+
+def _strip_comments(source: str) -> str:
+    source = re.sub(r"/\*.*?\*/", "", source, flags=re.S)
+    return re.sub(r"^\s*//.*$", "", source, flags=re.M)
+
+
+def _import_group(spec: str, entry: Path) -> str:
+    if spec.startswith("."):
+        return group_of(str((entry.parent / spec).with_suffix(".js")))
+    parts = spec.split("/")
+    return "/".join(parts[:2]) if spec.startswith("@") else parts[0]
+
+
+def function_roots(entry: Path) -> Dict[str, Set[str]]:
+    """Groups each export of ``entry`` references, directly or through local helpers."""
+    source = entry.read_text(encoding="utf-8")
+    bindings = {name: _import_group(spec, entry) for name, spec in _IMPORT.findall(source)}
+    statements = list(_STATEMENT.finditer(source))
+    exports: Dict[str, str] = {}
+    helpers: Dict[str, str] = {}
+    for i, match in enumerate(statements):
+        end = statements[i + 1].start() if i + 1 < len(statements) else len(source)
+        body = _strip_comments(source[match.end():end])
+        if match.group(1):
+            exports[match.group(1)] = body
+        elif (match.group(2) or match.group(3)) not in bindings:
+            helpers[match.group(2) or match.group(3)] = body
+
+    roots: Dict[str, Set[str]] = {}
+    for name, body in exports.items():
+        seen: Set[str] = set()
+        pending = [body]
+        used: Set[str] = set()
+        while pending:
+            text = pending.pop()
+            used |= {group for binding, group in bindings.items() if re.search(rf"\b{binding}\.", text)}
+            if re.search(r"\.firestore[(.]", text):
+                used.add(FIRESTORE_PACKAGE)
+            for helper, helper_body in helpers.items():
+                if helper not in seen and re.search(rf"\b{helper}\b", text):
+                    seen.add(helper)
+                    pending.append(helper_body)
+        roots[name] = used
+    return roots
+
+
+def needed_groups(roots: Set[str], edges: Dict[str, Set[str]], entry_group: str) -> Set[str]:
+    """``roots`` plus everything they loaded. The entry's own edges are not
+    followed: it requires every module, used or not."""
+    needed = {entry_group}
+    pending = list(roots)
+    while pending:
+        group = pending.pop()
+        if group in needed:
+            continue
+        needed.add(group)
+        pending.extend(edges.get(group, ()))
+    return needed
+
+
+def analyse(runs: List[Dict[str, Any]], roots: Dict[str, Set[str]], entry_group: str, top: int) -> Dict[str, Any]:
+    by_file: Dict[str, List[float]] = {}
+    by_group: List[Dict[str, float]] = []
+    edges: Dict[str, Set[str]] = {}
+    for run in runs:
+        groups: Dict[str, float] = {}
+        for record in run["records"]:
+            group = group_of(record["file"])
+            groups[group] = groups.get(group, 0.0) + record["selfMs"]
+            by_file.setdefault(_label(record["file"]), []).append(record["ms"])
+        for parent, child in run["edges"]:
+            if group_of(parent) != group_of(child):
+                edges.setdefault(group_of(parent), set()).add(group_of(child))
+        by_group.append(groups)
+
+    def group_ms(name: str) -> List[float]:
+        return [groups.get(name, 0.0) for groups in by_group]
+
+    all_groups = sorted({name for groups in by_group for name in groups})
+    totals = [sum(groups.values()) for groups in by_group]
+    functions = []
+    for function, used in roots.items():
+        needed = needed_groups(used, edges, entry_group)
+        unused = [sum(ms for name, ms in groups.items() if name not in needed) for groups in by_group]
+        wasted = sorted(((statistics.median(group_ms(name)), name) for name in all_groups if name not in needed),
+                        reverse=True)
+        functions.append({
+            "function": function,
+            "imports": sorted(used),
+            "neededMs": statistics.median([t - u for t, u in zip(totals, unused)]),
+            "unusedMs": statistics.median(unused),
+            "unusedShare": statistics.median([u / t if t else 0.0 for t, u in zip(totals, unused)]),
+            "unusedGroups": [{"group": name, "ms": ms} for ms, name in wasted[:5] if ms >= 0.05],
+        })
+    functions.sort(key=lambda f: f["unusedMs"], reverse=True)
+
+    return {
+        "requireMs": reporting.summarize([run["totalMs"] for run in runs]),
+        "groups": sorted(({"group": name, "selfMs": reporting.summarize(group_ms(name)),
+                           "files": sum(1 for r in runs[0]["records"] if group_of(r["file"]) == name)}
+                          for name in all_groups), key=lambda g: g["selfMs"]["p50"], reverse=True),
+        "files": sorted(({"file": name, "inclusiveMs": reporting.summarize(values)} for name, values in by_file.items()),
+                        key=lambda f: f["inclusiveMs"]["p50"], reverse=True)[:top],
+        "loadedBy": {parent: sorted(children) for parent, children in edges.items()},
+        "functions": functions,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="fresh node processes to profile")
+    parser.add_argument("--node", default="node")
+    parser.add_argument("--entry", type=Path, default=None, help="defaults to functions/package.json main")
+    parser.add_argument("--top", type=int, default=15, help="slowest files to list")
+    args = parser.parse_args(argv)
+
+    entry = args.entry or FUNCTIONS_DIR / json.loads((FUNCTIONS_DIR / "package.json").read_text())["main"]
+    if not (FUNCTIONS_DIR / "node_modules").is_dir():
+        print(f"No node_modules in {FUNCTIONS_DIR}; run npm ci there first", file=sys.stderr)
+        return 2
+
+    runs = []
+    for i in range(args.runs):
+        run = profile_once(args.node, entry)
+        if run["error"]:
+            print(f"Loading {entry} failed:\n{run['error']}", file=sys.stderr)
+            return 1
+        runs.append(run)
+        print(f"run {i + 1:>3}: require {run['totalMs']:7.1f} ms, process {run['wallMs']:7.1f} ms, "
+              f"{len(run['records'])} files")
+
+    result = analyse(runs, function_roots(entry), group_of(str(entry)), args.top)
+    result.update({
+        "entry": str(entry),
+        "runs": args.runs,
+        "processMs": reporting.summarize([run["wallMs"] for run in runs]),
+        "nodeBaselineMs": node_baseline(args.node, min(args.runs, 5)),
+        "heapUsedMb": statistics.median([run["heapUsed"] for run in runs]) / 2 ** 20,
+    })
+    path = reporting.write_report("functions_imports", result)
+
+    print(f"\nrequire p50 {result['requireMs']['p50']:.1f} ms (node alone {result['nodeBaselineMs']:.1f} ms)")
+    for group in result["groups"][:10]:
+        print(f"  {group['group']:<36} {group['selfMs']['p50']:>8.1f} ms  {group['files']:>4} files")
+    print("\nUnused at cold start, per function:")
+    for function in result["functions"]:
+        wasted = ", ".join(f"{g['group']} {g['ms']:.0f}" for g in function["unusedGroups"][:3])
+        print(f"  {function['function']:<28} {function['unusedMs']:>8.1f} ms ({function['unusedShare']:.0%})"
+              + (f"  {wasted}" if wasted else ""))
+    print(f"Report -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
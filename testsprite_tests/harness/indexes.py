@@ -0,0 +1,214 @@
+"""Composite index coverage of the queries the suite issued.
+
+Every structured query captured by the ``firestore`` runner feature is checked
+against ``firestore.indexes.json``:
+
+- **missing**: the query combines an inequality or ``orderBy`` with other
+  fields and no declared composite index serves it (or Firestore rejected it
+  with FAILED_PRECONDITION);
+- **client-side fallbacks**: queries retried on the same collection after an
+  index error, and unfiltered, unlimited reads of a whole collection that the
+  app filters and sorts in the browser, plus the code paths in ``src/`` that
+  do this on purpose;
+- **unused**: declared indexes that serve no captured query, equality-only queries included.
+
+The rules follow Firestore's planner: equality and ``array-contains`` filters
+merge single-field indexes, anything with a sort order over more than one
+field needs a composite index with the equality fields first and the
+inequality/``orderBy`` fields last, in order and direction.
+
+    cd testsprite_tests
+    python -m harness.runner --feature firestore
+    python -m harness.indexes
+"""
+
+import argparse
+import json
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config, firestore_traffic, reporting
+
+INDEXES_FILE = config.APP_DIR / "firestore.indexes.json"
+
+EQUALITY_OPS = {"EQUAL", "IN", "IS_NULL", "IS_NAN"}
+ARRAY_OPS = {"ARRAY_CONTAINS", "ARRAY_CONTAINS_ANY"}
+# FAILED_PRECONDITION, as a gRPC code or a REST status string
+INDEX_ERRORS = {9, "9", "FAILED_PRECONDITION"}
+
+# Source comments and error handling that mark a deliberate client-side fallback
+_FALLBACK_MARKERS = re.compile(r"failed-precondition|composite index|without orderBy", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class Requirement:
+    """Index a query needs: unordered equality/array fields, then ordered sort fields."""
+
+    collection: str
+    collection_group: bool
+    equality: Tuple[str, ...]
+    array: Tuple[str, ...]
+    sort: Tuple[Tuple[str, str], ...]
+
+    @property
+    def needs_composite(self) -> bool:
+        return bool(self.sort) and len(self.equality) + len(self.array) + len(self.sort) > 1
+
+    def suggestion(self) -> Dict[str, Any]:
+        """Entry to paste into firestore.indexes.json."""
+        fields = [{"fieldPath": f, "order": "ASCENDING"} for f in self.equality]
+        fields += [{"fieldPath": f, "arrayConfig": "CONTAINS"} for f in self.array]
+        fields += [{"fieldPath": f, "order": d} for f, d in self.sort]
+        return {"collectionGroup": self.collection,
+                "queryScope": "COLLECTION_GROUP" if self.collection_group else "COLLECTION", "fields": fields}
+
+
+def requirement(shape: Dict[str, Any]) -> Requirement:
+    equality: List[str] = []
+    array: List[str] = []
+    inequality: List[str] = []
+    for fieldpath, op in shape["filters"]:
+        bucket = equality if op in EQUALITY_OPS else array if op in ARRAY_OPS else inequality
+        if fieldpath not in bucket:
+            bucket.append(fieldpath)
+    sort = [(f, d) for f, d in shape["orderBy"] if f != "__name__"]
+    # Inequality fields are implicitly ordered after any explicit orderBy
+    sort += [(f, "ASCENDING") for f in sorted(inequality) if f not in {s for s, _ in sort}]
+    sorted_fields = {f for f, _ in sort}
+    return Requirement(
+        collection=shape["collection"],
+        collection_group=shape["collectionGroup"],
+        equality=tuple(sorted(f for f in equality if f not in sorted_fields)),
+        array=tuple(sorted(array)),
+        sort=tuple(sort),
+    )
+
+
+@dataclass
+class DeclaredIndex:
+    position: int
+    collection: str
+    collection_group: bool
+    fields: Tuple[Tuple[str, str], ...]  # (fieldPath, ASCENDING|DESCENDING|CONTAINS), __name__ dropped
+
+    def label(self) -> str:
+        return f"{self.collection}({', '.join(f'{f} {o}' for f, o in self.fields)})"
+
+    def serves(self, req: Requirement) -> bool:
+        if self.collection != req.collection or self.collection_group != req.collection_group:
+            return False
+        if len(self.fields) != len(req.equality) + len(req.array) + len(req.sort):
+            return False
+        head, tail = self.fields[:len(self.fields) - len(req.sort)], self.fields[len(self.fields) - len(req.sort):]
+        if tuple(tail) != req.sort:
+            return False
+        return ({f for f, o in head if o != "CONTAINS"} == set(req.equality)
+                and {f for f, o in head if o == "CONTAINS"} == set(req.array))
+
+
+def load_indexes(path: Path = INDEXES_FILE) -> List[DeclaredIndex]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    indexes = []
+    for position, raw in enumerate(data.get("indexes", [])):
+        fields = tuple((f["fieldPath"], f.get("order") or ("CONTAINS" if f.get("arrayConfig") else "ASCENDING"))
+                       for f in raw["fields"] if f["fieldPath"] != "__name__")
+        indexes.append(DeclaredIndex(position, raw["collectionGroup"],
+                                     raw.get("queryScope") == "COLLECTION_GROUP", fields))
+    return indexes
+
+
+def _is_index_error(error: Optional[Dict[str, Any]]) -> bool:
+    return bool(error) and (error.get("code") in INDEX_ERRORS or "index" in str(error.get("message", "")).lower())
+
+
+def static_fallbacks(root: Path = config.APP_DIR / "src") -> List[str]:
+    """``file:line`` of code that works around missing indexes in the browser."""
+    hits = []
+    for path in sorted(root.rglob("*.ts*")):
+        for number, line in enumerate(path.read_text(encoding="utf-8", errors="replace").splitlines(), 1):
+            if _FALLBACK_MARKERS.search(line):
+                hits.append(f"{path.relative_to(config.APP_DIR)}:{number}: {line.strip()[:100]}")
+    return hits
+
+
+def check(queries: List[Dict[str, Any]], indexes: List[DeclaredIndex]) -> Dict[str, Any]:
+    missing: Dict[str, Dict[str, Any]] = {}
+    fallbacks: Dict[str, Dict[str, Any]] = {}
+    used = set()
+    covered = 0
+
+    def note(bucket: Dict[str, Dict[str, Any]], key: str, query: Dict[str, Any], **extra: Any) -> None:
+        entry = bucket.setdefault(key, {"query": key, "count": 0, "tests": set(), "routes": set(), **extra})
+        entry["count"] += 1
+        entry["tests"].add(query["test"])
+        entry["routes"].add(query["route"])
+
+    failed_by_step: Dict[Tuple[str, int, str], Dict[str, Any]] = {}
+    for query in sorted(queries, key=lambda q: (q["test"], q.get("t") or 0)):
+        shape = query["shape"]
+        req = requirement(shape)
+        step_key = (query["test"], query["step"], shape["collection"])
+        if _is_index_error(query.get("error")):
+            note(missing, query["key"], query, index=req.suggestion(), reason="rejected by Firestore")
+            failed_by_step[step_key] = query
+            continue
+        if step_key in failed_by_step:
+            note(fallbacks, query["key"], query, reason=f"retried after index error on {failed_by_step[step_key]['key']}")
+        if not shape["filters"] and shape["limit"] is None and not shape["orderBy"]:
+            note(fallbacks, query["key"], query, reason="reads the whole collection", documents=query.get("documents", 0))
+        # Equality-only queries can still be served by a declared index, so match them all
+        serving = [index for index in indexes if index.serves(req)]
+        used.update(index.position for index in serving)
+        if not req.needs_composite:
+            continue
+        if serving:
+            covered += 1
+        else:
+            note(missing, query["key"], query, index=req.suggestion(), reason="no declared composite index")
+
+    def finish(bucket: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        out = []
+        for entry in bucket.values():
+            out.append({**entry, "tests": sorted(entry["tests"]), "routes": sorted(entry["routes"])})
+        return sorted(out, key=lambda e: -e["count"])
+
+    return {
+        "queries": len(queries),
+        "distinctShapes": len({q["key"] for q in queries}),
+        "coveredByComposite": covered,
+        "missing": finish(missing),
+        "clientSideFallbacks": finish(fallbacks),
+        "unused": [index.label() for index in indexes if index.position not in used],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--indexes", type=Path, default=INDEXES_FILE, help="firestore.indexes.json to check against")
+    args = parser.parse_args(argv)
+
+    queries = [{**q, "test": result["test"]} for result in firestore_traffic.load_results() for q in result["queries"]]
+    if not queries:
+        print("No Firestore queries recorded yet (run with --feature firestore)")
+        return 0
+    result = check(queries, load_indexes(args.indexes))
+    result["staticFallbacks"] = static_fallbacks()
+    path = reporting.write_report("index_coverage", result)
+
+    print(f"{result['queries']} queries, {result['distinctShapes']} shapes, "
+          f"{result['coveredByComposite']} served by a composite index")
+    for entry in result["missing"]:
+        print(f"  MISSING  {entry['query']} x{entry['count']} ({entry['reason']}) on {', '.join(entry['routes'])}")
+    for entry in result["clientSideFallbacks"]:
+        print(f"  CLIENT   {entry['query']} x{entry['count']} ({entry['reason']})")
+    for label in result["unused"]:
+        print(f"  UNUSED   {label}")
+    print(f"Report -> {path}")
+    return 1 if result["missing"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
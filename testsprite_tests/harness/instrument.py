@@ -0,0 +1,130 @@
+"""Instrumentation for the generated TC scripts without editing them.
+
+The TC scripts create their own Playwright browser and context. ``install()``
+patches ``Browser.new_context`` and ``BrowserContext.close`` so harness
+features can adjust context options, attach listeners to every new context and
+run a last step (e.g. a screenshot) before the script closes it. ``Page.goto``
+is patched too, so the scripts' hard-coded dev-server URLs follow
+``config.BASE_URL`` (e.g. a production preview server).
+
+Every ``page.goto`` and locator ``click`` / ``fill`` / ``press`` is a *step*:
+``on_action`` hooks run just before it, which is how features attribute what
+they observe to the step that caused it.
+"""
+
+import os
+import sys
+import traceback
+from typing import Any, Awaitable, Callable, Dict, List
+
+from playwright.async_api import Browser, BrowserContext, Locator, Page
+
+from . import config
+
+OptionsHook = Callable[[Dict[str, Any]], Dict[str, Any]]
+ContextHook = Callable[[Any], Awaitable[None]]
+# (page, action, target) where target is the URL or the locator's selector
+ActionHook = Callable[[Any, str, str], Awaitable[None]]
+
+_options_hooks: List[OptionsHook] = []
+_context_hooks: List[ContextHook] = []
+_close_hooks: List[ContextHook] = []
+_action_hooks: List[ActionHook] = []
+_installed = False
+
+
+def context_options(hook: OptionsHook) -> OptionsHook:
+    """Register a function that rewrites ``new_context`` keyword arguments."""
+    _options_hooks.append(hook)
+    return hook
+
+
+def on_context(hook: ContextHook) -> ContextHook:
+    """Register a coroutine run on every context right after it is created."""
+    _context_hooks.append(hook)
+    return hook
+
+
+def before_close(hook: ContextHook) -> ContextHook:
+    """Register a coroutine run on a context just before the script closes it."""
+    _close_hooks.append(hook)
+    return hook
+
+
+def on_action(hook: ActionHook) -> ActionHook:
+    """Register a coroutine run before every ``goto`` and locator click/fill/press."""
+    _action_hooks.append(hook)
+    return hook
+
+
+def selector_of(locator: Any) -> str:
+    impl = getattr(locator, "_impl_obj", None)
+    return getattr(impl, "_selector", None) or repr(locator)
+
+
+async def run_action_hooks(page: Any, action: str, target: str) -> None:
+    """Called by the patched methods; soak mode calls it for client-side navigations."""
+    for hook in _action_hooks:
+        await hook(page, action, target)
+
+
+def test_id() -> str:
+    """Id of the TC script being run, e.g. ``TC012``."""
+    return os.environ.get("HARNESS_TEST_ID", "adhoc")
+
+
+def rewrite_url(url: str) -> str:
+    """Point a URL on the hard-coded dev server at ``config.BASE_URL``."""
+    if config.BASE_URL != config.DEV_SERVER_URL and url.startswith(config.DEV_SERVER_URL):
+        return config.BASE_URL + url[len(config.DEV_SERVER_URL):]
+    return url
+
+
+def install() -> None:
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    original_new_context = Browser.new_context
+    original_close = BrowserContext.close
+    original_goto = Page.goto
+
+    async def new_context(self: Any, *args: Any, **kwargs: Any) -> Any:
+        for hook in _options_hooks:
+            kwargs = hook(kwargs)
+        context = await original_new_context(self, *args, **kwargs)
+        for hook in _context_hooks:
+            await hook(context)
+        return context
+
+    async def close(self: Any, *args: Any, **kwargs: Any) -> None:
+        if not getattr(self, "_harness_closing", False):
+            self._harness_closing = True
+            for hook in _close_hooks:
+                try:
+                    await hook(self)
+                except Exception:
+                    # A failing harness step must not mask the test's own result
+                    traceback.print_exc(file=sys.stderr)
+        await original_close(self, *args, **kwargs)
+
+    async def goto(self: Any, url: str, *args: Any, **kwargs: Any) -> Any:
+        url = rewrite_url(url)
+        await run_action_hooks(self, "goto", url)
+        return await original_goto(self, url, *args, **kwargs)
+
+    def locator_action(name: str) -> Callable[..., Awaitable[Any]]:
+        original = getattr(Locator, name)
+
+        async def action(self: Any, *args: Any, **kwargs: Any) -> Any:
+            await run_action_hooks(self.page, name, selector_of(self))
+            return await original(self, *args, **kwargs)
+
+        return action
+
+    Browser.new_context = new_context
+    BrowserContext.close = close
+    Page.goto = goto
+    for name in ("click", "fill", "press"):
+        setattr(Locator, name, locator_action(name))
@@ -0,0 +1,434 @@
+"""Main-thread long tasks per interaction, attributed to scripts and React components.
+
+Every ``click`` / ``press`` / ``fill`` (and ``goto``) is a step, as in
+``firestore_traffic``. For each step the page's CPU profile is recorded
+through DevTools (``Profiler.start`` / ``stop``, 0.5 ms sampling). An init
+script collects the page's own timing entries:
+
+- ``event`` entries with an ``interactionId``. The slowest interaction of a step
+  gives its INP-style latency (input delay + processing + presentation), as
+  Chrome computes INP. ``fill`` sends no key events, so fills fall back to the
+  longest animation frame that started within 200 ms of the action;
+- ``long-animation-frame`` entries with their ``scripts`` (invoker, source URL,
+  function): the browser's own attribution of frames over 50 ms;
+- ``longtask`` entries (> 50 ms), for the count and blocking time.
+
+Runs of busy samples of 50 ms or more in the profile are the long tasks seen
+from the sampler. Their time is charged to the script of the leaf frame and to
+the innermost React component on the stack, i.e. a capitalised function from
+a ``/src/*.tsx`` module. That needs the dev server: production bundles have
+minified names.
+
+The generated TC006/TC010/TC012 scripts never reach the filters, the
+calendar or the notification center, so ``run`` replays step plans that do.
+``run`` compiles each plan with ``steps.compile_plan``, which sends a plan's
+consecutive fills as one ``page.evaluate``. No action hook fires for them, so
+plan fills (the sign-in form) are not profiled; only runner scripts profile
+fills:
+
+    cd testsprite_tests
+    python -m harness.longtasks run plans/tc006_filters.py plans/tc012_calendar.py plans/tc010_notifications.py
+    python -m harness.runner TC006 TC010 TC012 --feature longtasks
+    python -m harness.longtasks report --top 20
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from . import browser, config, reporting
+
+RESULTS_FILE = config.REPORT_DIR / "longtasks" / "steps.jsonl"
+LONG_TASK_MS = 50
+SAMPLING_INTERVAL_US = 500
+# fill() has no Event Timing entry; a long frame this soon after it is its latency
+FRAME_WINDOW_MS = 200
+INTERACTIONS = ("click", "press", "fill")
+
+LONGTASK_INIT_SCRIPT = """
+(() => {
+  if (window.__harnessLongTasks) return;
+  const buffer = (window.__harnessLongTasks = { frames: [], events: [], tasks: [] });
+  const observe = (type, push, options) => {
+    try {
+      new PerformanceObserver((list) => list.getEntries().forEach(push)).observe({ type, buffered: true, ...options });
+    } catch (e) {}
+  };
+  const describe = (node) => {
+    if (!node || !node.tagName) return '';
+    const label = node.getAttribute('aria-label') || (node.textContent || '').trim().slice(0, 40);
+    return node.tagName.toLowerCase() + (node.id ? '#' + node.id : '') + (label ? ' "' + label + '"' : '');
+  };
+  observe('event', (e) => {
+    if (!e.interactionId) return;
+    buffer.events.push({ name: e.name, interactionId: e.interactionId, start: e.startTime, duration: e.duration,
+      processingStart: e.processingStart, processingEnd: e.processingEnd, target: describe(e.target) });
+  }, { durationThreshold: 16 });
+  observe('long-animation-frame', (e) => buffer.frames.push({
+    start: e.startTime, duration: e.duration, blocking: e.blockingDuration,
+    scripts: e.scripts.map((s) => ({ invoker: s.invoker, invokerType: s.invokerType, sourceURL: s.sourceURL,
+      sourceFunctionName: s.sourceFunctionName, duration: s.duration,
+      forcedStyleAndLayout: s.forcedStyleAndLayoutDuration })),
+  }));
+  observe('longtask', (e) => buffer.tasks.push({ start: e.startTime, duration: e.duration }));
+})();
+"""
+
+# Hands over everything observed since the last call, and the page's clock
+_DRAIN_JS = """
+() => {
+  const buffer = window.__harnessLongTasks;
+  const now = performance.now();
+  if (!buffer) return { frames: [], events: [], tasks: [], now };
+  return { frames: buffer.frames.splice(0), events: buffer.events.splice(0), tasks: buffer.tasks.splice(0), now };
+}
+"""
+
+_COMPONENT = re.compile(r"^[A-Z][A-Za-z0-9]*$")
+
+
+# ---------------------------------------------------------------------------
+# Attribution
+# ---------------------------------------------------------------------------
+
+def script_of(frame: Dict[str, Any]) -> str:
+    """Readable script name for a profile call frame."""
+    url, name = frame.get("url", ""), frame.get("functionName", "")
+    if not url:
+        return name if name.startswith("(") else "(native)"
+    path = urlparse(url).path
+    if "/node_modules/.vite/deps/" in path:
+        return "deps/" + path.rsplit("/", 1)[-1]
+    if "/node_modules/" in path:
+        return path.split("/node_modules/", 1)[1]
+    return path.lstrip("/") or url
+
+
+def component_of(frame: Dict[str, Any]) -> Optional[str]:
+    """``Name (src/...tsx)`` when the frame is a React function component in the app."""
+    path = urlparse(frame.get("url", "")).path
+    name = frame.get("functionName", "")
+    if path.startswith("/src/") and path.endswith((".tsx", ".jsx")) and _COMPONENT.match(name):
+        return f"{name} ({path.lstrip('/')})"
+    return None
+
+
+def attribute(profile: Dict[str, Any], min_task_ms: float = LONG_TASK_MS) -> Dict[str, Any]:
+    """Long tasks in a CPU profile and where their samples were spent."""
+    nodes = {node["id"]: node for node in profile.get("nodes", [])}
+    parent: Dict[int, int] = {}
+    for node in nodes.values():
+        for child in node.get("children", []):
+            parent[child] = node["id"]
+    samples, deltas = profile.get("samples", []), profile.get("timeDeltas", [])
+    # A sample lasts until the next one
+    weights = [(deltas[i + 1] if i + 1 < len(deltas) else SAMPLING_INTERVAL_US) / 1000 for i in range(len(samples))]
+
+    runs: List[List[int]] = []
+    current: List[int] = []
+    for i, node_id in enumerate(samples):
+        if nodes[node_id]["callFrame"]["functionName"] == "(idle)":
+            if current:
+                runs.append(current)
+                current = []
+        else:
+            current.append(i)
+    if current:
+        runs.append(current)
+
+    tasks: List[float] = []
+    scripts: Dict[str, float] = defaultdict(float)
+    components: Dict[str, float] = defaultdict(float)
+    for run in runs:
+        duration = sum(weights[i] for i in run)
+        if duration < min_task_ms:
+            continue
+        tasks.append(duration)
+        for i in run:
+            node_id = samples[i]
+            scripts[script_of(nodes[node_id]["callFrame"])] += weights[i]
+            while node_id is not None:
+                component = component_of(nodes[node_id]["callFrame"])
+                if component:
+                    components[component] += weights[i]
+                    break
+                node_id = parent.get(node_id)
+    return {"tasks": tasks, "scripts": dict(scripts), "components": dict(components)}
+
+
+def interaction_latency(events: List[Dict[str, Any]], frames: List[Dict[str, Any]],
+                        step_start: float) -> Optional[Dict[str, Any]]:
+    """Slowest interaction of a step, split like INP; a long frame stands in without one."""
+    by_id: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for event in events:
+        by_id[event["interactionId"]].append(event)
+    if by_id:
+        worst = max(by_id.values(), key=lambda group: max(e["duration"] for e in group))
+        start = min(e["start"] for e in worst)
+        processing_start = min(e["processingStart"] for e in worst)
+        processing_end = max(e["processingEnd"] for e in worst)
+        latency = max(e["duration"] for e in worst)
+        return {
+            "source": "event",
+            "latencyMs": latency,
+            "inputDelayMs": processing_start - start,
+            "processingMs": processing_end - processing_start,
+            "presentationMs": max(0.0, start + latency - processing_end),
+            "events": sorted({e["name"] for e in worst}),
+            "target": worst[0].get("target", ""),
+        }
+    nearby = [f for f in frames if step_start <= f["start"] <= step_start + FRAME_WINDOW_MS]
+    if nearby:
+        frame = max(nearby, key=lambda f: f["start"] + f["duration"])
+        return {"source": "frame", "latencyMs": frame["start"] + frame["duration"] - step_start}
+    return None
+
+
+def _top(values: Dict[str, float], count: int = 8) -> List[Dict[str, Any]]:
+    return [{"name": name, "ms": ms} for name, ms in sorted(values.items(), key=lambda kv: -kv[1])[:count]]
+
+
+def _frame_scripts(frames: List[Dict[str, Any]], count: int = 5) -> List[Dict[str, Any]]:
+    scripts: Dict[str, float] = defaultdict(float)
+    for frame in frames:
+        for script in frame["scripts"]:
+            source = script_of({"url": script.get("sourceURL", ""), "functionName": "(unknown)"})
+            key = f"{script.get('invoker') or script.get('invokerType')} -> {script.get('sourceFunctionName') or '(anonymous)'} @ {source}"
+            scripts[key] += script["duration"]
+    return _top(scripts, count)
+
+
+# ---------------------------------------------------------------------------
+# Per-context tracker
+# ---------------------------------------------------------------------------
+
+class LongTaskTracker:
+    """Profiles one context step by step; a step ends when the next one starts."""
+
+    def __init__(self, test: str):
+        self.test = test
+        self.steps: List[Dict[str, Any]] = []
+        self._page: Any = None
+        self._cdp: Any = None
+        self._open: Optional[Dict[str, Any]] = None
+
+    async def _switch(self, page: Any) -> None:
+        if page is self._page:
+            return
+        await self.finish()
+        self._page = page
+        self._cdp = await page.context.new_cdp_session(page)
+        await self._cdp.send("Profiler.enable")
+        await self._cdp.send("Profiler.setSamplingInterval", {"interval": SAMPLING_INTERVAL_US})
+
+    async def mark(self, page: Any, action: str, target: str) -> None:
+        await self._switch(page)
+        now = await self._close_step()
+        self._open = {"index": len(self.steps), "action": action, "target": target, "url": page.url,
+                      "start": now or 0.0}
+        await self._cdp.send("Profiler.start")
+
+    async def _close_step(self) -> Optional[float]:
+        """Finish the open step; returns the page clock at that moment."""
+        try:
+            drained = await self._page.evaluate(_DRAIN_JS)
+        except Exception:
+            drained = None  # page closed or mid-navigation
+        if self._open is None:
+            return drained["now"] if drained else None
+        try:
+            profile = (await self._cdp.send("Profiler.stop"))["profile"]
+        except Exception:
+            profile = {}
+        step, self._open = self._open, None
+        drained = drained or {"frames": [], "events": [], "tasks": [], "now": None}
+        sampled = attribute(profile)
+        tasks = [t["duration"] for t in drained["tasks"]]
+        long_frames = [f for f in drained["frames"] if f["duration"] > LONG_TASK_MS]
+        step.update({
+            "interaction": step["action"] in INTERACTIONS,
+            "latency": interaction_latency(drained["events"], drained["frames"], step["start"])
+            if step["action"] in INTERACTIONS else None,
+            "longTasks": {"count": len(tasks), "totalMs": sum(tasks), "maxMs": max(tasks, default=0.0),
+                          "blockingMs": sum(t - LONG_TASK_MS for t in tasks)},
+            "longFrames": {"count": len(long_frames), "maxMs": max((f["duration"] for f in long_frames), default=0.0),
+                           "scripts": _frame_scripts(long_frames)},
+            "sampledTasksMs": sampled["tasks"],
+            "scripts": _top(sampled["scripts"]),
+            "components": _top(sampled["components"]),
+        })
+        self.steps.append(step)
+        return drained["now"]
+
+    async def finish(self) -> None:
+        if self._page is not None:
+            await self._close_step()
+        if self._cdp is not None:
+            try:
+                await self._cdp.detach()
+            except Exception:
+                pass
+        self._page = self._cdp = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {"test": self.test, "steps": self.steps}
+
+
+async def attach(context: Any, test: Optional[str] = None) -> LongTaskTracker:
+    from . import instrument
+
+    tracker = LongTaskTracker(test or instrument.test_id())
+    await context.add_init_script(LONGTASK_INIT_SCRIPT)
+    context._harness_longtasks = tracker
+    return tracker
+
+
+async def _mark_step(page: Any, action: str, target: str) -> None:
+    tracker = getattr(page.context, "_harness_longtasks", None)
+    if tracker is not None:
+        await tracker.mark(page, action, target)
+
+
+async def _write_summary(context: Any) -> None:
+    tracker = getattr(context, "_harness_longtasks", None)
+    if tracker is None:
+        return
+    await tracker.finish()
+    RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with RESULTS_FILE.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(tracker.summary()) + "\n")
+
+
+# ---------------------------------------------------------------------------
+# Runner feature
+# ---------------------------------------------------------------------------
+
+def reset() -> None:
+    RESULTS_FILE.unlink(missing_ok=True)
+
+
+def install() -> None:
+    """Runner feature: profile every step of the script's contexts."""
+    from . import instrument
+
+    async def on_context(context: Any) -> None:
+        await attach(context)
+
+    instrument.on_context(on_context)
+    instrument.on_action(_mark_step)
+    instrument.before_close(_write_summary)
+
+
+def load_results() -> List[Dict[str, Any]]:
+    if not RESULTS_FILE.exists():
+        return []
+    return [json.loads(line) for line in RESULTS_FILE.read_text(encoding="utf-8").splitlines() if line]
+
+
+def rank(results: List[Dict[str, Any]], top: int) -> Dict[str, Any]:
+    """Interactions by latency, then blocking time; scripts and components summed over them."""
+    interactions = []
+    scripts: Dict[str, float] = defaultdict(float)
+    components: Dict[str, float] = defaultdict(float)
+    for result in results:
+        for step in result["steps"]:
+            if not step["interaction"]:
+                continue
+            interactions.append({"test": result["test"], **step})
+            for entry in step["scripts"]:
+                scripts[entry["name"]] += entry["ms"]
+            for entry in step["components"]:
+                components[entry["name"]] += entry["ms"]
+    interactions.sort(key=lambda s: ((s["latency"] or {}).get("latencyMs", 0.0), s["longTasks"]["blockingMs"]),
+                      reverse=True)
+    latencies = [(s["latency"] or {}).get("latencyMs", 0.0) for s in interactions]
+    return {
+        "interactions": len(interactions),
+        "latencyMs": reporting.summarize(latencies),
+        # Chrome reports the worst interaction, or the p98 when there are 50 or more
+        "inpMs": reporting.percentile(latencies, 98) if len(latencies) >= 50 else max(latencies, default=0.0),
+        "slowest": interactions[:top],
+        "scripts": _top(scripts, top),
+        "components": _top(components, top),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Plan runs
+# ---------------------------------------------------------------------------
+
+def label_steps(steps: List[Dict[str, Any]], plan_steps: List[Any]) -> None:
+    """Copy each plan step's ``note`` onto the recorded step it produced."""
+    pending = [s for s in plan_steps if s.action in ("goto", "click", "press")]
+    for step in steps:
+        if pending and step["action"] == pending[0].action and (pending[0].target or "") in step["target"]:
+            step["note"] = pending.pop(0).note
+
+
+async def run_plans(paths: List[str]) -> List[Dict[str, Any]]:
+    from . import instrument, steps
+
+    instrument.install()
+    instrument.on_action(_mark_step)
+    results = []
+    for path in paths:
+        plan_steps = steps.load_steps(path)
+        plan = steps.compile_plan(plan_steps, name=Path(path).stem)
+        session = await browser.open_session()
+        tracker = await attach(session.context, plan.name)
+        try:
+            await steps.execute(plan, session.context, session.page)
+            # Let the last interaction's frames and entries land
+            await session.page.wait_for_timeout(1000)
+            await tracker.finish()
+        finally:
+            await session.close()
+        label_steps(tracker.steps, plan_steps)
+        results.append(tracker.summary())
+        print(f"{plan.name}: {sum(1 for s in tracker.steps if s['interaction'])} interactions profiled")
+    return results
+
+
+def _print_ranking(ranking: Dict[str, Any], top: int) -> None:
+    print(f"{ranking['interactions']} interactions, INP-style {ranking['inpMs']:.0f} ms")
+    for step in ranking["slowest"][:top]:
+        latency = step["latency"] or {}
+        label = step.get("note") or f"{step['action']} {step['target'][:50]}"
+        culprit = (step["components"] or step["scripts"] or [{"name": "-"}])[0]["name"]
+        print(f"  {latency.get('latencyMs', 0.0):>6.0f} ms  {step['longTasks']['blockingMs']:>5.0f} ms blocking  "
+              f"{step['test']:<20} {label[:40]:<40} {culprit}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="profile step plans' interactions in fresh contexts")
+    run.add_argument("plans", nargs="+", help="plan files (see harness.steps)")
+    run.add_argument("--top", type=int, default=15)
+    report = sub.add_parser("report", help="rank the interactions of the last --feature longtasks run")
+    report.add_argument("--top", type=int, default=15)
+    sub.add_parser("clear", help="forget the last run's steps")
+    args = parser.parse_args(argv)
+
+    if args.command == "clear":
+        reset()
+        return 0
+    results = asyncio.run(run_plans(args.plans)) if args.command == "run" else load_results()
+    if not results:
+        print("No long-task results yet (run with --feature longtasks)")
+        return 0
+    ranking = rank(results, args.top)
+    path = reporting.write_report("longtasks", {"ranking": ranking, "tests": results})
+    _print_ranking(ranking, args.top)
+    print(f"Report -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
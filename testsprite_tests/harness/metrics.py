@@ -0,0 +1,44 @@
+"""Page load metrics read from the Performance APIs."""
+
+from typing import Any, Dict
+
+# Registered with context.add_init_script so LCP/CLS are observed from the start
+VITALS_INIT_SCRIPT = """
+(() => {
+  const vitals = (window.__harnessVitals = { lcp: 0, cls: 0 });
+  try {
+    new PerformanceObserver((list) => {
+      for (const entry of list.getEntries()) vitals.lcp = entry.renderTime || entry.loadTime || entry.startTime;
+    }).observe({ type: 'largest-contentful-paint', buffered: true });
+    new PerformanceObserver((list) => {
+      for (const entry of list.getEntries()) if (!entry.hadRecentInput) vitals.cls += entry.value;
+    }).observe({ type: 'layout-shift', buffered: true });
+  } catch (e) {}
+})();
+"""
+
+_READ_METRICS_JS = """
+() => {
+  const nav = performance.getEntriesByType('navigation')[0] || {};
+  const paint = Object.fromEntries(performance.getEntriesByType('paint').map((p) => [p.name, p.startTime]));
+  const resources = performance.getEntriesByType('resource');
+  const vitals = window.__harnessVitals || {};
+  return {
+    ttfb: nav.responseStart || 0,
+    domContentLoaded: nav.domContentLoadedEventEnd || 0,
+    load: nav.loadEventEnd || 0,
+    firstContentfulPaint: paint['first-contentful-paint'] || 0,
+    largestContentfulPaint: vitals.lcp || 0,
+    cumulativeLayoutShift: vitals.cls || 0,
+    resourceCount: resources.length,
+    transferBytes: resources.reduce((sum, r) => sum + (r.transferSize || 0), nav.transferSize || 0),
+    domNodes: document.getElementsByTagName('*').length,
+    jsHeapBytes: (performance.memory && performance.memory.usedJSHeapSize) || 0,
+  };
+}
+"""
+
+
+async def read_load_metrics(page: Any) -> Dict[str, float]:
+    """Navigation, paint and resource totals for the current document (ms / bytes)."""
+    return await page.evaluate(_READ_METRICS_JS)
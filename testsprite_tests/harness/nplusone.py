@@ -0,0 +1,119 @@
+"""N+1 query detector on top of the Firestore traffic capture.
+
+Within one TC step, queries with the same shape (collection, filter fields and
+operators, ordering) and single-document lookups on the same collection are
+grouped into bursts. A burst with more than ``--threshold`` distinct ids (filter
+values or document ids) is the per-card fan-out pattern, e.g. one
+``reviews where listingId EQUAL`` per listing in a grid, or one
+``users/:id`` get per row of a dashboard.
+
+    cd testsprite_tests
+    python -m harness.runner --feature firestore
+    python -m harness.nplusone --threshold 5
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import firestore_traffic, reporting
+
+# Collections whose documents are listing cards (both spellings are used in src/)
+LISTING_COLLECTIONS = ("listing", "listings")
+
+
+def _fingerprint(entry: Dict[str, Any]) -> str:
+    """What varies between the calls of one fan-out: filter values or the document id."""
+    if "id" in entry:
+        return entry["id"]
+    return json.dumps(entry["shape"]["values"], sort_keys=True, default=str)
+
+
+def bursts(entries: List[Dict[str, Any]], window_ms: float) -> Iterable[List[Dict[str, Any]]]:
+    """Split time-ordered entries wherever the gap between neighbours exceeds ``window_ms``."""
+    current: List[Dict[str, Any]] = []
+    for entry in sorted(entries, key=lambda e: e.get("t") or 0):
+        if current and (entry.get("t") or 0) - (current[-1].get("t") or 0) > window_ms:
+            yield current
+            current = []
+        current.append(entry)
+    if current:
+        yield current
+
+
+def detect(result: Dict[str, Any], threshold: int, window_ms: float,
+           collections: Tuple[str, ...] = LISTING_COLLECTIONS) -> List[Dict[str, Any]]:
+    """Fan-out findings for one context's traffic summary."""
+    groups: Dict[Tuple[int, str, str], List[Dict[str, Any]]] = defaultdict(list)
+    for query in result.get("queries", []):
+        if query.get("resume"):
+            continue  # re-listens after a stream reconnect are not new queries
+        groups[(query["step"], "query", query["key"])].append(query)
+    for lookup in result.get("lookups", []):
+        groups[(lookup["step"], "lookup", lookup["key"])].append(lookup)
+
+    steps = {step["index"]: step for step in result.get("steps", [])}
+    findings = []
+    for (step_index, kind, key), entries in groups.items():
+        for burst in bursts(entries, window_ms):
+            ids = sorted({_fingerprint(e) for e in burst})
+            if len(ids) <= threshold:
+                continue
+            step = steps.get(step_index, {"action": "?", "target": "", "url": ""})
+            delivered = sum(step.get("documentsByCollection", {}).get(c, 0) for c in collections)
+            findings.append({
+                "test": result.get("test"),
+                "step": step_index,
+                "action": step["action"],
+                "target": step["target"],
+                "url": step["url"],
+                "route": burst[0]["route"],
+                "kind": kind,
+                "shape": key,
+                "calls": len(burst),
+                "distinctIds": len(ids),
+                "sampleIds": ids[:5],
+                "listingCount": max(delivered, len(ids)) if _is_listing_fanout(burst, collections) else delivered,
+                "spanMs": (burst[-1].get("t") or 0) - (burst[0].get("t") or 0),
+            })
+    findings.sort(key=lambda f: -f["distinctIds"])
+    return findings
+
+
+def _is_listing_fanout(burst: List[Dict[str, Any]], collections: Tuple[str, ...]) -> bool:
+    """One call per listing: filtered on ``listingId`` or a get on a listing document."""
+    first = burst[0]
+    if "shape" not in first:
+        return first["key"].split("/", 1)[0] in collections
+    return any(fieldpath == "listingId" for fieldpath, _ in first["shape"]["filters"])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threshold", type=int, default=5,
+                        help="flag bursts with more than this many distinct ids")
+    parser.add_argument("--window-ms", type=float, default=1500,
+                        help="max gap between calls of the same burst")
+    parser.add_argument("--listing-collection", action="append",
+                        help=f"collections counted as listing cards (default {', '.join(LISTING_COLLECTIONS)})")
+    args = parser.parse_args(argv)
+
+    results = firestore_traffic.load_results()
+    if not results:
+        print("No Firestore traffic recorded yet (run with --feature firestore)")
+        return 0
+    collections = tuple(args.listing_collection or LISTING_COLLECTIONS)
+    findings = [f for result in results for f in detect(result, args.threshold, args.window_ms, collections)]
+    path = reporting.write_report("nplusone", {"threshold": args.threshold, "windowMs": args.window_ms,
+                                               "findings": findings})
+    for f in findings:
+        print(f"{f['test']} step {f['step']} ({f['action']} {f['target'][:50]}) on {f['route']}: "
+              f"{f['distinctIds']} x {f['shape']} within {f['spanMs']:.0f} ms, {f['listingCount']} listings")
+    print(f"{len(findings)} fan-out(s) above {args.threshold} -> {path}")
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Production build served by a managed ``vite preview`` server.
+
+The dev server transforms modules on demand and drops ``.vite/deps`` chunks
+when many browsers hit it at once (see raw_report.md). ``PreviewServer`` builds
+the app once with ``npm run build``, serves ``dist/`` with ``vite preview`` and
+only hands out its URL after the shell and its entry chunk load.
+
+    cd testsprite_tests
+    python -m harness.runner --target prod --jobs 4     # build, serve, test, tear down
+    python -m harness.preview --port 4173               # just serve the build
+"""
+
+import argparse
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from . import config
+
+DIST_DIR = config.APP_DIR / "dist"
+DEFAULT_PORT = int(os.environ.get("HARNESS_PREVIEW_PORT", "4173"))
+
+# Inputs whose changes make dist/ stale
+_BUILD_INPUTS = ["src", "public", "index.html", "vite.config.ts", "package.json", "package-lock.json",
+                 "tailwind.config.ts", "postcss.config.js", ".env", ".env.production"]
+
+_ENTRY_SCRIPT = re.compile(r'<script[^>]+src="([^"]+\.js)"')
+
+
+class PreviewError(RuntimeError):
+    pass
+
+
+def _newest_mtime(paths: Iterable[Path]) -> float:
+    newest = 0.0
+    for path in paths:
+        if path.is_dir():
+            for child in path.rglob("*"):
+                if child.is_file():
+                    newest = max(newest, child.stat().st_mtime)
+        elif path.exists():
+            newest = max(newest, path.stat().st_mtime)
+    return newest
+
+
+def build_is_stale(dist: Path = DIST_DIR) -> bool:
+    index = dist / "index.html"
+    if not index.exists():
+        return True
+    return _newest_mtime(config.APP_DIR / name for name in _BUILD_INPUTS) > index.stat().st_mtime
+
+
+def build(force: bool = False) -> bool:
+    """Run ``npm run build`` unless ``dist/`` is newer than its inputs. Returns True if it built."""
+    if not force and not build_is_stale():
+        print(f"Reusing production build in {DIST_DIR}")
+        return False
+    print("Building production bundle (npm run build) ...")
+    started = time.perf_counter()
+    completed = subprocess.run(["npm", "run", "build"], cwd=str(config.APP_DIR))
+    if completed.returncode != 0:
+        raise PreviewError(f"npm run build exited with {completed.returncode}")
+    print(f"Built in {time.perf_counter() - started:.1f} s")
+    return True
+
+
+def _get(url: str, timeout: float) -> str:
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read().decode("utf-8", "replace")
+
+
+class PreviewServer:
+    """``vite preview`` child process with a health check; usable as a context manager."""
+
+    def __init__(self, port: int = DEFAULT_PORT, host: str = "127.0.0.1"):
+        self.host = host
+        self.port = port
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self, ready_timeout: float = 60.0) -> "PreviewServer":
+        cmd = ["npx", "vite", "preview", "--host", self.host, "--port", str(self.port), "--strictPort"]
+        # Own process group so npx and the node child go down together
+        self.process = subprocess.Popen(cmd, cwd=str(config.APP_DIR), start_new_session=True,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            self.wait_healthy(ready_timeout)
+        except Exception:
+            self.stop()
+            raise
+        return self
+
+    def wait_healthy(self, timeout: float) -> None:
+        """Wait until the SPA shell and its entry chunk are served."""
+        deadline = time.monotonic() + timeout
+        last_error = "no response"
+        while time.monotonic() < deadline:
+            if self.process is not None and self.process.poll() is not None:
+                stderr = self.process.stderr.read().decode("utf-8", "replace") if self.process.stderr else ""
+                raise PreviewError(f"vite preview exited with {self.process.returncode}: {stderr.strip()[-500:]}")
+            try:
+                html = _get(f"{self.base_url}/", timeout=2)
+                match = _ENTRY_SCRIPT.search(html)
+                if 'id="root"' not in html or not match:
+                    raise PreviewError("index.html has no #root or entry script")
+                _get(f"{self.base_url}{match.group(1)}", timeout=5)
+                # A client route must fall back to index.html, not 404
+                _get(f"{self.base_url}/guest/login", timeout=2)
+                return
+            except (OSError, urllib.error.URLError, PreviewError) as exc:
+                last_error = str(exc)
+                time.sleep(0.25)
+        raise PreviewError(f"preview server not healthy after {timeout:.0f} s: {last_error}")
+
+    def stop(self) -> None:
+        if self.process is None or self.process.poll() is not None:
+            return
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            os.killpg(self.process.pid, signal.SIGKILL)
+            self.process.wait()
+        except ProcessLookupError:
+            pass
+
+    def __enter__(self) -> "PreviewServer":
+        return self.start() if self.process is None else self
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--rebuild", action="store_true", help="build even if dist/ looks up to date")
+    args = parser.parse_args(argv)
+
+    build(force=args.rebuild)
+    with PreviewServer(args.port) as server:
+        print(f"Serving {DIST_DIR} at {server.base_url} (Ctrl-C to stop)")
+        try:
+            server.process.wait()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
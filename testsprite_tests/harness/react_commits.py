@@ -0,0 +1,390 @@
+"""React commits per test step: render time, re-rendered components and why.
+
+An init script installs a ``__REACT_DEVTOOLS_GLOBAL_HOOK__`` before the app's
+scripts run, so ``react-dom`` registers with it as it would with the DevTools
+extension. React Refresh chains onto the same hook. Each ``onCommitFiberRoot``
+walks the committed tree the way DevTools does. It only descends into subtrees
+React actually reconciled. For every component that rendered it records:
+
+- self render time from the fiber's ``actualDuration`` (development builds of
+  React always collect it);
+- the reason: ``mount``, ``state``, ``context:<Provider>`` when a context it reads
+  changed value, else ``props``. ``props`` renders whose props are shallow-equal
+  to the previous ones are ``memoCandidates``: ``React.memo`` would have skipped
+  them.
+
+Commits are charged to the step (click / press / fill / goto) that preceded
+them, as in ``firestore_traffic``. In ``run``, a plan's fills go out as one
+batched ``page.evaluate`` and are not steps, so their commits land on the step
+before them. A commit that re-renders ``STORM_RENDERS`` or
+more already-mounted components is a re-render storm. The report ranks
+interactions by re-renders. It also ranks each context provider by the
+consumer renders its value changes caused. ``AuthProvider`` and
+``NotificationProvider`` wrap the whole app and pass a new ``value`` object
+on every render.
+
+    cd testsprite_tests
+    python -m harness.react_commits run plans/tc006_filters.py plans/tc010_notifications.py
+    python -m harness.runner TC006 TC010 TC012 --feature react
+    python -m harness.react_commits report --top 20
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import browser, config, reporting
+
+RESULTS_FILE = config.REPORT_DIR / "react_commits" / "steps.jsonl"
+# Already-mounted components re-rendered by one commit
+STORM_RENDERS = 40
+INTERACTIONS = ("click", "press", "fill")
+
+REACT_HOOK_INIT_SCRIPT = """
+(() => {
+  if (window.__REACT_DEVTOOLS_GLOBAL_HOOK__) return;
+  const commits = (window.__harnessReactCommits = []);
+  const PERFORMED_WORK = 1;
+  // FunctionComponent, ClassComponent, IndeterminateComponent, ForwardRef, MemoComponent, SimpleMemoComponent
+  const COMPONENT_TAGS = new Set([0, 1, 2, 11, 14, 15]);
+  const CONTEXT_PROVIDER = 10;
+
+  const typeName = (type) => {
+    if (!type) return null;
+    if (typeof type === 'function') return type.displayName || type.name || null;
+    if (type.displayName) return type.displayName;
+    if (type.render) return type.render.displayName || type.render.name || null;  // forwardRef
+    if (type.type) return typeName(type.type);  // memo
+    return null;
+  };
+  const ownerName = (fiber) => {
+    for (let f = fiber.return; f; f = f.return) {
+      if (COMPONENT_TAGS.has(f.tag)) return typeName(f.type) || 'Anonymous';
+    }
+    return 'Root';
+  };
+  const shallowEqual = (a, b) => {
+    if (a === b) return true;
+    if (!a || !b) return false;
+    const keys = Object.keys(a);
+    if (keys.length !== Object.keys(b).length) return false;
+    return keys.every((k) => Object.is(a[k], b[k]));
+  };
+  // Hooks are cloned on every render; only a state hook's value tells an update apart
+  const stateChanged = (prev, fiber) => {
+    if (fiber.tag === 1) return prev.memoizedState !== fiber.memoizedState;
+    for (let a = prev.memoizedState, b = fiber.memoizedState; a && b; a = a.next, b = b.next) {
+      if (b.queue && !Object.is(a.memoizedState, b.memoizedState)) return true;
+    }
+    return false;
+  };
+  const selfDuration = (fiber) => {
+    let ms = fiber.actualDuration || 0;
+    for (let child = fiber.child; child; child = child.sibling) ms -= child.actualDuration || 0;
+    return Math.max(0, ms);
+  };
+
+  const walk = (fiber, commit, changed) => {
+    for (; fiber; fiber = fiber.sibling) {
+      const prev = fiber.alternate;
+      if (fiber.tag === CONTEXT_PROVIDER && prev && !Object.is(prev.memoizedProps.value, fiber.memoizedProps.value)) {
+        const context = fiber.type._context || fiber.type;
+        const name = context.displayName || ownerName(fiber);
+        changed.set(context, name);
+        commit.contexts[name] = true;
+      }
+      const rendered = !prev || (fiber.flags & PERFORMED_WORK) === PERFORMED_WORK;
+      if (COMPONENT_TAGS.has(fiber.tag) && rendered) {
+        const name = typeName(fiber.type) || 'Anonymous';
+        let reason = 'mount';
+        let memoCandidate = false;
+        if (prev) {
+          reason = 'props';
+          for (let dep = fiber.dependencies && fiber.dependencies.firstContext; dep; dep = dep.next) {
+            if (changed.has(dep.context)) { reason = 'context:' + changed.get(dep.context); break; }
+          }
+          if (reason === 'props' && stateChanged(prev, fiber)) reason = 'state';
+          memoCandidate = reason === 'props' && shallowEqual(prev.memoizedProps, fiber.memoizedProps);
+        }
+        const entry = commit.components[name] || (commit.components[name] = { renders: 0, selfMs: 0, reasons: {}, memoCandidates: 0 });
+        entry.renders += 1;
+        entry.selfMs += selfDuration(fiber);
+        entry.reasons[reason] = (entry.reasons[reason] || 0) + 1;
+        if (memoCandidate) entry.memoCandidates += 1;
+        if (prev) commit.updates += 1; else commit.mounts += 1;
+      }
+      // Untouched subtrees keep the previous commit's fibers and flags
+      if (!prev || fiber.child !== prev.child) walk(fiber.child, commit, changed);
+    }
+  };
+
+  let nextId = 0;
+  window.__REACT_DEVTOOLS_GLOBAL_HOOK__ = {
+    renderers: new Map(),
+    supportsFiber: true,
+    isDisabled: false,
+    inject(renderer) {
+      const id = ++nextId;
+      this.renderers.set(id, renderer);
+      return id;
+    },
+    onScheduleFiberRoot() {},
+    onCommitFiberUnmount() {},
+    onPostCommitFiberRoot() {},
+    checkDCE() {},
+    onCommitFiberRoot(id, root) {
+      try {
+        const current = root.current;
+        const commit = { at: performance.now(), renderMs: current.actualDuration || 0, updates: 0, mounts: 0,
+          contexts: {}, components: {} };
+        walk(current.child, commit, new Map());
+        commit.contexts = Object.keys(commit.contexts);
+        commits.push(commit);
+      } catch (e) {}
+    },
+  };
+})();
+"""
+
+_DRAIN_JS = "() => (window.__harnessReactCommits || []).splice(0)"
+
+
+# ---------------------------------------------------------------------------
+# Per-step aggregation
+# ---------------------------------------------------------------------------
+
+def summarize_step(commits: List[Dict[str, Any]], storm_renders: int = STORM_RENDERS) -> Dict[str, Any]:
+    """Fold a step's commits into totals, per-component and per-context counts."""
+    components: Dict[str, Dict[str, Any]] = {}
+    contexts: Dict[str, int] = defaultdict(int)
+    storms = []
+    for commit in commits:
+        if commit["updates"] >= storm_renders:
+            storms.append({"updates": commit["updates"], "renderMs": commit["renderMs"],
+                           "contexts": commit["contexts"]})
+        for name, entry in commit["components"].items():
+            total = components.setdefault(name, {"renders": 0, "selfMs": 0.0, "reasons": {}, "memoCandidates": 0})
+            total["renders"] += entry["renders"]
+            total["selfMs"] += entry["selfMs"]
+            total["memoCandidates"] += entry["memoCandidates"]
+            for reason, count in entry["reasons"].items():
+                total["reasons"][reason] = total["reasons"].get(reason, 0) + count
+                if reason.startswith("context:"):
+                    contexts[reason.split(":", 1)[1]] += count
+    return {
+        "commits": len(commits),
+        "renderMs": sum(c["renderMs"] for c in commits),
+        "maxCommitMs": max((c["renderMs"] for c in commits), default=0.0),
+        "updates": sum(c["updates"] for c in commits),
+        "mounts": sum(c["mounts"] for c in commits),
+        "storms": storms,
+        "contexts": dict(contexts),
+        "components": components,
+    }
+
+
+def top_components(components: Dict[str, Dict[str, Any]], count: int = 10) -> List[Dict[str, Any]]:
+    ranked = sorted(components.items(), key=lambda kv: (-kv[1]["renders"], -kv[1]["selfMs"]))
+    return [{"name": name, **entry} for name, entry in ranked[:count]]
+
+
+# ---------------------------------------------------------------------------
+# Per-context tracker
+# ---------------------------------------------------------------------------
+
+class CommitTracker:
+    """Charges a context's React commits to the step that preceded them."""
+
+    def __init__(self, test: str):
+        self.test = test
+        self.steps: List[Dict[str, Any]] = []
+        self._page: Any = None
+        self._open: Optional[Dict[str, Any]] = None
+
+    async def mark(self, page: Any, action: str, target: str) -> None:
+        await self._close_step()
+        self._page = page
+        self._open = {"index": len(self.steps), "action": action, "target": target, "url": page.url}
+
+    async def _close_step(self) -> None:
+        if self._open is None:
+            return
+        try:
+            commits = await self._page.evaluate(_DRAIN_JS)
+        except Exception:
+            commits = []  # page closed or mid-navigation
+        step, self._open = self._open, None
+        step["interaction"] = step["action"] in INTERACTIONS
+        step.update(summarize_step(commits))
+        step["components"] = top_components(step["components"], 25)
+        self.steps.append(step)
+
+    async def finish(self) -> None:
+        await self._close_step()
+
+    def summary(self) -> Dict[str, Any]:
+        return {"test": self.test, "steps": self.steps}
+
+
+async def attach(context: Any, test: Optional[str] = None) -> CommitTracker:
+    from . import instrument
+
+    tracker = CommitTracker(test or instrument.test_id())
+    await context.add_init_script(REACT_HOOK_INIT_SCRIPT)
+    context._harness_react = tracker
+    return tracker
+
+
+async def _mark_step(page: Any, action: str, target: str) -> None:
+    tracker = getattr(page.context, "_harness_react", None)
+    if tracker is not None:
+        await tracker.mark(page, action, target)
+
+
+async def _write_summary(context: Any) -> None:
+    tracker = getattr(context, "_harness_react", None)
+    if tracker is None:
+        return
+    await tracker.finish()
+    RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with RESULTS_FILE.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(tracker.summary()) + "\n")
+
+
+# ---------------------------------------------------------------------------
+# Runner feature
+# ---------------------------------------------------------------------------
+
+def reset() -> None:
+    RESULTS_FILE.unlink(missing_ok=True)
+
+
+def install() -> None:
+    """Runner feature: record React commits for every step of the script's contexts."""
+    from . import instrument
+
+    async def on_context(context: Any) -> None:
+        await attach(context)
+
+    instrument.on_context(on_context)
+    instrument.on_action(_mark_step)
+    instrument.before_close(_write_summary)
+
+
+def load_results() -> List[Dict[str, Any]]:
+    if not RESULTS_FILE.exists():
+        return []
+    return [json.loads(line) for line in RESULTS_FILE.read_text(encoding="utf-8").splitlines() if line]
+
+
+def rank(results: List[Dict[str, Any]], top: int) -> Dict[str, Any]:
+    """Interactions by re-renders; components and context providers summed over them."""
+    interactions = []
+    components: Dict[str, Dict[str, Any]] = {}
+    contexts: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        for step in result["steps"]:
+            if not step["interaction"]:
+                continue
+            interactions.append({"test": result["test"], **step})
+            for entry in step["components"]:
+                total = components.setdefault(entry["name"], {"renders": 0, "selfMs": 0.0, "memoCandidates": 0})
+                for key in total:
+                    total[key] += entry[key]
+            for name, renders in step["contexts"].items():
+                total = contexts.setdefault(name, {"consumerRenders": 0, "interactions": 0})
+                total["consumerRenders"] += renders
+                total["interactions"] += 1
+    interactions.sort(key=lambda s: (s["updates"], s["renderMs"]), reverse=True)
+    return {
+        "interactions": len(interactions),
+        "updates": reporting.summarize(s["updates"] for s in interactions),
+        "renderMs": reporting.summarize(s["renderMs"] for s in interactions),
+        "storms": sum(len(s["storms"]) for s in interactions),
+        "heaviest": interactions[:top],
+        "contexts": dict(sorted(contexts.items(), key=lambda kv: -kv[1]["consumerRenders"])),
+        "components": top_components(components, top),
+        "memoCandidates": sorted(({"name": name, **entry} for name, entry in components.items()
+                                  if entry["memoCandidates"]), key=lambda e: -e["memoCandidates"])[:top],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Plan runs
+# ---------------------------------------------------------------------------
+
+async def run_plans(paths: List[str]) -> List[Dict[str, Any]]:
+    from . import instrument, steps
+    from .longtasks import label_steps
+
+    instrument.install()
+    instrument.on_action(_mark_step)
+    results = []
+    for path in paths:
+        plan_steps = steps.load_steps(path)
+        plan = steps.compile_plan(plan_steps, name=Path(path).stem)
+        session = await browser.open_session()
+        tracker = await attach(session.context, plan.name)
+        try:
+            await steps.execute(plan, session.context, session.page)
+            # Snapshot listeners and timers commit after the last action
+            await session.page.wait_for_timeout(1000)
+            await tracker.finish()
+        finally:
+            await session.close()
+        label_steps(tracker.steps, plan_steps)
+        results.append(tracker.summary())
+        print(f"{plan.name}: {sum(s['commits'] for s in tracker.steps)} commits, "
+              f"{sum(len(s['storms']) for s in tracker.steps)} storms")
+    return results
+
+
+def _print_ranking(ranking: Dict[str, Any], top: int) -> None:
+    print(f"{ranking['interactions']} interactions, {ranking['storms']} re-render storms "
+          f"(>= {STORM_RENDERS} components in one commit)")
+    for step in ranking["heaviest"][:top]:
+        label = step.get("note") or f"{step['action']} {step['target'][:50]}"
+        contexts = ", ".join(f"{name} x{count}" for name, count in step["contexts"].items()) or "-"
+        print(f"  {step['updates']:>5} re-renders {step['commits']:>3} commits {step['renderMs']:>7.1f} ms  "
+              f"{step['test']:<20} {label[:40]:<40} {contexts}")
+    if ranking["contexts"]:
+        print("Context providers by consumer renders:")
+        for name, entry in ranking["contexts"].items():
+            print(f"  {entry['consumerRenders']:>6}  {name} ({entry['interactions']} interactions)")
+    if ranking["memoCandidates"]:
+        print("Renders with unchanged props (React.memo candidates):")
+        for entry in ranking["memoCandidates"]:
+            print(f"  {entry['memoCandidates']:>6}/{entry['renders']:<6} {entry['name']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="record React commits for step plans in fresh contexts")
+    run.add_argument("plans", nargs="+", help="plan files (see harness.steps)")
+    run.add_argument("--top", type=int, default=15)
+    report = sub.add_parser("report", help="rank the interactions of the last --feature react run")
+    report.add_argument("--top", type=int, default=15)
+    sub.add_parser("clear", help="forget the last run's steps")
+    args = parser.parse_args(argv)
+
+    if args.command == "clear":
+        reset()
+        return 0
+    results = asyncio.run(run_plans(args.plans)) if args.command == "run" else load_results()
+    if not results:
+        print("No React commit results yet (run with --feature react)")
+        return 0
+    ranking = rank(results, args.top)
+    path = reporting.write_report("react_commits", {"ranking": ranking, "tests": results})
+    _print_ranking(ranking, args.top)
+    print(f"Report -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
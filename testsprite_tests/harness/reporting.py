@@ -0,0 +1,42 @@
+"""Small helpers for summarising timings and writing JSON reports."""
+
+import json
+import math
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from . import config
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; returns 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(values: Iterable[float]) -> Dict[str, float]:
+    data = list(values)
+    if not data:
+        return {"count": 0, "min": 0.0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "count": len(data),
+        "min": min(data),
+        "mean": sum(data) / len(data),
+        "p50": percentile(data, 50),
+        "p95": percentile(data, 95),
+        "p99": percentile(data, 99),
+        "max": max(data),
+    }
+
+
+def write_report(name: str, payload: Dict[str, Any]) -> Path:
+    """Write ``payload`` to ``REPORT_DIR/<name>.json`` and return the path."""
+    config.REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    path = config.REPORT_DIR / f"{name}.json"
+    body = {"generatedAt": time.strftime("%Y-%m-%dT%H:%M:%S%z"), **payload}
+    path.write_text(json.dumps(body, indent=2, default=str), encoding="utf-8")
+    return path
@@ -0,0 +1,176 @@
+"""Named resource profiles: which requests a context loads, stubs or blocks.
+
+Functional TCs (TC003, TC015, TC016, ...) assert on app behaviour, yet every
+page load also pulls the hero videos in ``public/videos``, Google Fonts,
+Cloudinary images, map tiles and the Google sign-in iframe. The ``functional``
+profile aborts media and sign-in iframes and answers images, font CSS,
+geocoding and EmailJS with tiny local stubs. ``perf`` routes nothing, so timing
+modules see the real page. Only URLs matching a rule are intercepted, so
+unmatched requests never round-trip through Python.
+
+    cd testsprite_tests
+    python -m harness.runner --feature resources                       # functional profile
+    python -m harness.runner --feature resources --resource-profile perf
+    python -m harness.resources report
+"""
+
+import argparse
+import base64
+import json
+import os
+import re
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from . import config, reporting
+
+RESULTS_FILE = config.REPORT_DIR / "resources" / "results.jsonl"
+PROFILE = os.environ.get("HARNESS_RESOURCE_PROFILE", "functional")
+
+# 1x1 transparent PNG: keeps <img> onLoad handlers and layouts working
+_PIXEL = base64.b64decode("iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII=")
+
+
+@dataclass
+class Rule:
+    name: str
+    pattern: str
+    action: str  # "abort" or "stub"
+    content_type: str = ""
+    body: bytes = b""
+    # Context attribute of a harness stand-in that takes these requests when present
+    defer_to: str = ""
+
+    def __post_init__(self) -> None:
+        self.regex = re.compile(self.pattern)
+
+
+def _stub(name: str, pattern: str, content_type: str, body: bytes, defer_to: str = "") -> Rule:
+    return Rule(name, pattern, "stub", content_type, body, defer_to)
+
+
+PROFILES: Dict[str, List[Rule]] = {
+    "perf": [],
+    "functional": [
+        Rule("media", r"\.(mp4|webm|mov|m4v|ogg)(\?|#|$)", "abort"),
+        Rule("oauth-iframe", r"^https://(accounts\.google\.com|apis\.google\.com/js/)|/__/auth/(iframe|handler)", "abort"),
+        _stub("google-fonts-css", r"^https://fonts\.googleapis\.com/", "text/css", b""),
+        Rule("google-fonts-files", r"^https://fonts\.gstatic\.com/", "abort"),
+        _stub("cloudinary-images", r"^https://res\.cloudinary\.com/", "image/png", _PIXEL),
+        _stub("map-tiles", r"^https://[a-z]\.tile\.openstreetmap\.org/", "image/png", _PIXEL),
+        _stub("map-markers", r"^https://cdnjs\.cloudflare\.com/ajax/libs/leaflet/.*\.png$", "image/png", _PIXEL),
+        _stub("geocoding", r"^https://nominatim\.openstreetmap\.org/", "application/json", b"[]"),
+        # @emailjs/browser treats a 200 "OK" as sent; the EmailJS stand-in wins when enabled
+        _stub("emailjs", r"^https://api\.emailjs\.com/", "text/plain", b"OK", defer_to="_harness_emailjs"),
+    ],
+}
+
+
+class ResourcePolicy:
+    """Applies one profile to a context and counts what it intercepted."""
+
+    def __init__(self, profile: str, test: str = "adhoc"):
+        if profile not in PROFILES:
+            raise ValueError(f"unknown resource profile {profile!r} (choose from {', '.join(PROFILES)})")
+        self.profile = profile
+        self.test = test
+        self.rules = PROFILES[profile]
+        self.counts: Counter = Counter()
+        self.by_type: Counter = Counter()
+
+    async def apply(self, context: Any) -> None:
+        for rule in self.rules:
+            await context.route(rule.regex, self._handler(context, rule))
+
+    def _handler(self, context: Any, rule: Rule) -> Any:
+        async def handle(route: Any) -> None:
+            if rule.defer_to and getattr(context, rule.defer_to, None) is not None:
+                await route.fallback()
+                return
+            self.counts[rule.name] += 1
+            self.by_type[route.request.resource_type] += 1
+            if rule.action == "abort":
+                await route.abort("blockedbyclient")
+            else:
+                await route.fulfill(status=200, content_type=rule.content_type, body=rule.body,
+                                    headers={"Access-Control-Allow-Origin": "*"})
+
+        return handle
+
+    def summary(self) -> Dict[str, Any]:
+        return {"test": self.test, "profile": self.profile, "intercepted": dict(self.counts),
+                "byType": dict(self.by_type)}
+
+
+# ---------------------------------------------------------------------------
+# Runner feature
+# ---------------------------------------------------------------------------
+
+async def _write_summary(context: Any) -> None:
+    policy = getattr(context, "_harness_resources", None)
+    if policy is None:
+        return
+    RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with RESULTS_FILE.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(policy.summary()) + "\n")
+
+
+def reset() -> None:
+    RESULTS_FILE.unlink(missing_ok=True)
+
+
+def install() -> None:
+    """Runner feature: give every context the ``HARNESS_RESOURCE_PROFILE`` profile."""
+    from . import instrument
+
+    async def on_context(context: Any) -> None:
+        policy = ResourcePolicy(PROFILE, instrument.test_id())
+        await policy.apply(context)
+        context._harness_resources = policy
+
+    instrument.on_context(on_context)
+    instrument.before_close(_write_summary)
+
+
+def load_results() -> List[Dict[str, Any]]:
+    if not RESULTS_FILE.exists():
+        return []
+    return [json.loads(line) for line in RESULTS_FILE.read_text(encoding="utf-8").splitlines() if line]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Requests intercepted by resource profiles")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("report", help="intercepted requests per rule and per test in the last run")
+    sub.add_parser("clear", help="forget the last run's counts")
+    sub.add_parser("profiles", help="print the rules of every profile")
+    args = parser.parse_args(argv)
+
+    if args.command == "clear":
+        reset()
+        return 0
+    if args.command == "profiles":
+        for name, rules in PROFILES.items():
+            print(f"{name}:" + ("" if rules else " (pass everything through)"))
+            for rule in rules:
+                print(f"  {rule.action:<5} {rule.name:<20} {rule.pattern}")
+        return 0
+    results = load_results()
+    if not results:
+        print("No resource results yet (run with --feature resources)")
+        return 0
+    totals: Counter = Counter()
+    for result in results:
+        totals.update(result["intercepted"])
+    path = reporting.write_report("resources", {"totals": dict(totals.most_common()), "tests": results})
+    print(f"{sum(totals.values())} requests intercepted across {len(results)} contexts")
+    for name, count in totals.most_common():
+        print(f"  {name:<20} {count:>6}")
+    print(f"Report -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
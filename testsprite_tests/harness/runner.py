@@ -0,0 +1,228 @@
+"""Run the generated TC scripts with harness features switched on.
+
+Each script runs in its own Python process. The child installs the requested
+features through ``harness.instrument`` and then executes the unmodified
+script, so the TC files stay exactly as TestSprite generated them.
+
+    cd testsprite_tests
+    python -m harness.runner                       # every TC script
+    python -m harness.runner TC006 TC012 --jobs 2 --feature visual
+    python -m harness.runner --target prod --jobs 4   # against the production build
+    python -m harness.runner --manifest tmp/manifest.json --shard 2   # one shard (harness.shards)
+"""
+
+import argparse
+import ast
+import asyncio
+import importlib
+import os
+import runpy
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from . import config, reporting
+from .timings import TimingDB
+
+# Feature name -> "module:function" that installs it in the child process
+FEATURES: Dict[str, str] = {
+    "visual": "harness.visual:install",
+    "firestore": "harness.firestore_traffic:install",
+    "timeouts": "harness.timeouts:install",
+    "watchdog": "harness.watchdog:install",
+    "resources": "harness.resources:install",
+    "emailjs": "harness.stubs.emailjs:install",
+    "longtasks": "harness.longtasks:install",
+    "react": "harness.react_commits:install",
+}
+
+
+def discover(patterns: Optional[List[str]] = None) -> List[Path]:
+    """TC scripts in the suite directory whose name starts with one of ``patterns``."""
+    scripts = sorted(config.SUITE_DIR.glob("TC[0-9][0-9][0-9]_*.py"))
+    if patterns:
+        scripts = [s for s in scripts if any(s.name.startswith(p) for p in patterns)]
+    return scripts
+
+
+def test_id_for(script: Path) -> str:
+    return script.name.split("_", 1)[0]
+
+
+def load_flow(script: Path) -> Callable[[], Any]:
+    """The script's ``run_test`` coroutine function, without running it.
+
+    The generated scripts end with a module-level ``asyncio.run(run_test())``;
+    that statement is dropped before the module body executes.
+    """
+    tree = ast.parse(script.read_text(encoding="utf-8"), filename=str(script))
+    tree.body = [node for node in tree.body
+                 if not (isinstance(node, ast.Expr) and isinstance(node.value, ast.Call)
+                         and ast.unparse(node.value.func) == "asyncio.run")]
+    namespace: Dict[str, Any] = {"__name__": f"harness_flow_{test_id_for(script)}", "__file__": str(script)}
+    exec(compile(tree, str(script), "exec"), namespace)
+    return namespace["run_test"]
+
+
+def _load(target: str) -> Callable[[], None]:
+    module_name, _, attr = target.partition(":")
+    module = __import__(module_name, fromlist=[attr])
+    return getattr(module, attr)
+
+
+def run_child(script: str, features: List[str]) -> int:
+    """Entry point inside the child process."""
+    from . import instrument
+
+    instrument.install()
+    for name in features:
+        _load(FEATURES[name])()
+    sys.argv = [script]
+    runpy.run_path(script, run_name="__main__")
+    return 0
+
+
+async def run_script(script: Path, features: List[str], timeout_s: float,
+                     extra_env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    env = dict(os.environ, HARNESS_TEST_ID=test_id_for(script), **(extra_env or {}))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(config.SUITE_DIR), env.get("PYTHONPATH")]))
+    cmd = [sys.executable, "-m", "harness.runner", "--child", str(script)]
+    for name in features:
+        cmd += ["--feature", name]
+
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        *cmd, cwd=str(config.SUITE_DIR), env=env,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout_s)
+        status = "passed" if process.returncode == 0 else "failed"
+    except asyncio.TimeoutError:
+        process.kill()
+        stdout, stderr = await process.communicate()
+        status = "timeout"
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    error_lines = stderr.decode("utf-8", "replace").strip().splitlines()
+    return {
+        "id": test_id_for(script),
+        "script": script.name,
+        "status": status,
+        "returncode": process.returncode,
+        "durationMs": duration_ms,
+        "error": error_lines[-1] if status != "passed" and error_lines else None,
+        "stderrTail": error_lines[-20:],
+        "stdoutTail": stdout.decode("utf-8", "replace").strip().splitlines()[-20:],
+    }
+
+
+async def run_suite(scripts: List[Path], features: List[str], jobs: int, timeout_s: float,
+                    extra_env: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    semaphore = asyncio.Semaphore(jobs)
+
+    async def guarded(script: Path) -> Dict[str, Any]:
+        async with semaphore:
+            result = await run_script(script, features, timeout_s, extra_env)
+            print(f"{result['id']:<6} {result['status']:<8} {result['durationMs'] / 1000:>7.1f} s"
+                  + (f"  {result['error']}" if result["error"] else ""))
+            return result
+
+    return list(await asyncio.gather(*(guarded(s) for s in scripts)))
+
+
+def add_run_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("tests", nargs="*", help="TC id prefixes, e.g. TC001 TC01 (default: all)")
+    parser.add_argument("--feature", action="append", default=[], choices=sorted(FEATURES))
+    parser.add_argument("--jobs", type=int, default=1, help="scripts run in parallel")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds before a script is killed")
+    parser.add_argument("--update-baselines", action="store_true", help="with --feature visual, re-record baselines")
+    parser.add_argument("--learn-timeouts", action="store_true",
+                        help="with --feature timeouts, record step latencies but keep the scripts' timeouts")
+    parser.add_argument("--resource-profile", choices=["functional", "perf"],
+                        help="turn on --feature resources with this profile (default functional)")
+    parser.add_argument("--target", choices=["dev", "prod"], default="dev",
+                        help="dev: HARNESS_BASE_URL as-is; prod: build once and serve dist/ with vite preview")
+    parser.add_argument("--rebuild", action="store_true", help="with --target prod, build even if dist/ is fresh")
+    parser.add_argument("--preview-port", type=int, default=None, help="with --target prod, vite preview port")
+    parser.add_argument("--manifest", type=Path, help="shard manifest from harness.shards plan")
+    parser.add_argument("--shard", type=int, help="with --manifest, the 1-based shard to run")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_run_arguments(parser)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return run_child(args.child, args.feature)
+
+    scripts = discover(args.tests)
+    if args.manifest:
+        from . import shards
+
+        if args.shard is None:
+            parser.error("--manifest needs --shard")
+        wanted = set(shards.shard_cases(shards.load_manifest(args.manifest), args.shard))
+        scripts = [s for s in scripts if test_id_for(s) in wanted]
+    if not scripts:
+        parser.error("no TC scripts matched")
+    extra_env = {}
+    if args.resource_profile:
+        extra_env["HARNESS_RESOURCE_PROFILE"] = args.resource_profile
+        if "resources" not in args.feature:
+            args.feature.append("resources")
+    modules = [importlib.import_module(FEATURES[name].partition(":")[0]) for name in args.feature]
+    for module in modules:
+        # Features that append per-script results start each run empty
+        if hasattr(module, "reset"):
+            module.reset()
+    if "visual" in args.feature and args.update_baselines:
+        extra_env["HARNESS_VISUAL_UPDATE"] = "1"
+    if "timeouts" in args.feature and args.learn_timeouts:
+        extra_env["HARNESS_TIMEOUT_MODE"] = "learn"
+
+    server = None
+    base_url = config.BASE_URL
+    if args.target == "prod":
+        from . import preview
+
+        preview.build(force=args.rebuild)
+        server = preview.PreviewServer(args.preview_port or preview.DEFAULT_PORT).start()
+        base_url = extra_env["HARNESS_BASE_URL"] = server.base_url
+        print(f"Production build served at {base_url}")
+    started = time.perf_counter()
+    try:
+        results = asyncio.run(run_suite(scripts, args.feature, args.jobs, args.timeout, extra_env))
+    finally:
+        if server is not None:
+            server.stop()
+    for module in modules:
+        # ...and may fold them into shared state once every script is done
+        if hasattr(module, "finalize"):
+            module.finalize()
+    passed = sum(1 for r in results if r["status"] == "passed")
+    # Durations feed shard planning; timeouts say nothing about how long a test takes
+    db = TimingDB()
+    for result in results:
+        if result["status"] != "timeout":
+            db.add(f"test:{result['id']}", result["durationMs"])
+    db.save()
+    path = reporting.write_report("run_results", {
+        "baseUrl": base_url,
+        "target": args.target,
+        "features": args.feature,
+        "shard": args.shard if args.manifest else None,
+        "wallMs": (time.perf_counter() - started) * 1000,
+        "passed": passed,
+        "total": len(results),
+        "results": results,
+    })
+    print(f"{passed}/{len(results)} passed -> {path}")
+    return 0 if passed == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""Shard manifests for multi-machine runs, and merging of the shard outputs.
+
+``plan`` splits the TC scripts (plus any data-driven case ids from ``--cases``)
+into balanced shards: longest-estimated first onto the least-loaded shard,
+with estimates from the timing database and ties broken by id, so the same
+inputs always give the same manifest. Each machine runs its slice with
+``python -m harness.runner --manifest M --shard K``, then ``collect`` copies its
+outputs into a shared directory, and ``merge`` combines everything there into
+one report. A plain local directory works as the shared store. Merging the same
+store twice gives the same output: the merged timing database is ``--base``
+plus each shard's samples from this run, never the shards' whole histories.
+
+    cd testsprite_tests
+    python -m harness.shards plan --shards 4 --out tmp/manifest.json
+    python -m harness.runner --manifest tmp/manifest.json --shard 2      # on machine 2
+    python -m harness.shards collect --shard 2 --store /mnt/ci-share/run-123
+    python -m harness.shards merge --store /mnt/ci-share/run-123 --manifest tmp/manifest.json --base tmp/harness/timings.json
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import shutil
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config, reporting, runner, timeouts
+from .timings import TIMINGS_FILE, TimingDB
+
+DEFAULT_ESTIMATE_MS = 60000.0
+# Per-run outputs worth carrying from a shard, relative to REPORT_DIR
+COLLECTED = ["run_results.json", "*.jsonl", "*/*.jsonl"]
+# Istanbul JSON from ``npm run test:coverage`` (vitest's default reports directory)
+COVERAGE_FILE = config.SUITE_DIR.parent / "coverage" / "coverage-final.json"
+
+
+# ---------------------------------------------------------------------------
+# Planning
+# ---------------------------------------------------------------------------
+
+def load_cases(path: Optional[Path]) -> Dict[str, Optional[float]]:
+    """Case ids (TC scripts first) with an explicit estimate in ms where one was given."""
+    cases: Dict[str, Optional[float]] = {runner.test_id_for(s): None for s in runner.discover()}
+    if path:
+        for item in json.loads(path.read_text(encoding="utf-8")):
+            if isinstance(item, str):
+                cases[item] = None
+            else:
+                cases[item["id"]] = item.get("estimateMs")
+    return cases
+
+
+def estimates(cases: Dict[str, Optional[float]], db: TimingDB) -> Dict[str, float]:
+    known = {case: db.percentile(f"test:{case}", 50) for case in cases}
+    history = sorted(v for v in known.values() if v)
+    fallback = history[len(history) // 2] if history else DEFAULT_ESTIMATE_MS
+    return {case: cases[case] or known[case] or fallback for case in cases}
+
+
+def fingerprint(case_ids: List[str], shards: int) -> str:
+    return hashlib.sha256(f"{shards}:{','.join(sorted(case_ids))}".encode()).hexdigest()[:16]
+
+
+def plan(cases: Dict[str, float], shards: int) -> Dict[str, Any]:
+    """Longest-processing-time-first assignment; deterministic for equal inputs."""
+    if shards < 1:
+        raise ValueError("need at least one shard")
+    loads = [0.0] * shards
+    assigned: List[List[str]] = [[] for _ in range(shards)]
+    for case in sorted(cases, key=lambda c: (-cases[c], c)):
+        target = min(range(shards), key=lambda i: (loads[i], i))
+        assigned[target].append(case)
+        loads[target] += cases[case]
+    return {
+        "version": 1,
+        "shards": shards,
+        "fingerprint": fingerprint(list(cases), shards),
+        "cases": len(cases),
+        "estimatedWallMs": max(loads) if loads else 0.0,
+        "assignments": [{"shard": i + 1, "cases": sorted(assigned[i]), "estimatedMs": loads[i]} for i in range(shards)],
+    }
+
+
+def load_manifest(path: Path) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def shard_cases(manifest: Dict[str, Any], shard: int) -> List[str]:
+    """Case ids for 1-based ``shard``."""
+    for assignment in manifest["assignments"]:
+        if assignment["shard"] == shard:
+            return assignment["cases"]
+    raise ValueError(f"manifest has shards 1-{manifest['shards']}, not {shard}")
+
+
+# ---------------------------------------------------------------------------
+# Collecting and merging
+# ---------------------------------------------------------------------------
+
+def collect(shard: int, store: Path, source: Path = config.REPORT_DIR, manifest: Optional[Dict[str, Any]] = None,
+            coverage: Path = COVERAGE_FILE) -> Path:
+    target = store / f"shard-{shard}"
+    if target.exists():
+        shutil.rmtree(target)
+    target.mkdir(parents=True)
+    copied = []
+    for pattern in COLLECTED:
+        for path in source.glob(pattern):
+            out = target / path.relative_to(source)
+            out.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(path, out)
+            copied.append(str(path.relative_to(source)))
+    if coverage.exists():
+        (target / "coverage").mkdir()
+        shutil.copy2(coverage, target / "coverage" / "coverage-final.json")
+        copied.append("coverage/coverage-final.json")
+    (target / "shard.json").write_text(json.dumps({
+        "shard": shard, "fingerprint": manifest["fingerprint"] if manifest else None, "files": copied,
+    }, indent=2), encoding="utf-8")
+    return target
+
+
+def run_samples(shard_dir: Path, run: Dict[str, Any]) -> List[Tuple[str, float]]:
+    """The timing samples a shard's run added, by the same rules the runner and timeouts use.
+
+    A shard's own timing database also holds every earlier run on that machine,
+    so it is not merged as a whole.
+    """
+    samples = [(f"test:{r['id']}", r["durationMs"]) for r in run["results"] if r["status"] != "timeout"]
+    steps = shard_dir / timeouts.RESULTS_FILE.relative_to(config.REPORT_DIR)
+    if steps.exists():
+        for line in steps.read_text(encoding="utf-8").splitlines():
+            entry = json.loads(line) if line else None
+            if entry and entry["outcome"] == "ok":
+                samples.append((entry["key"], entry["ms"]))
+    return samples
+
+
+def merge_coverage(into: Dict[str, Any], other: Dict[str, Any]) -> None:
+    """Sum Istanbul hit counts (``s``, ``f``, ``b``) file by file."""
+    for name, data in other.items():
+        if name not in into:
+            into[name] = copy.deepcopy(data)
+            continue
+        merged = into[name]
+        for key in ("s", "f"):
+            for hit_id, count in data.get(key, {}).items():
+                merged[key][hit_id] = merged[key].get(hit_id, 0) + count
+        for hit_id, counts in data.get("b", {}).items():
+            current = merged["b"].setdefault(hit_id, [0] * len(counts))
+            merged["b"][hit_id] = [a + b for a, b in zip(current, counts)]
+
+
+def merge(store: Path, manifest: Optional[Dict[str, Any]], out_dir: Path,
+          base: Optional[Path] = None) -> Dict[str, Any]:
+    shard_dirs = sorted((p for p in store.glob("shard-*") if p.is_dir()), key=lambda p: int(p.name.split("-")[1]))
+    results: List[Dict[str, Any]] = []
+    shards = []
+    timings = TimingDB(out_dir / "timings.json")
+    # Never the previous merge's output, so merging again gives the same result
+    timings.entries = TimingDB(base).entries if base else {}
+    jsonl: Dict[str, List[str]] = {}
+    coverage: Dict[str, Any] = {}
+    stale = []
+
+    for shard_dir in shard_dirs:
+        meta = json.loads((shard_dir / "shard.json").read_text(encoding="utf-8"))
+        if manifest and meta.get("fingerprint") not in (None, manifest["fingerprint"]):
+            stale.append(meta["shard"])
+        run_file = shard_dir / "run_results.json"
+        run = json.loads(run_file.read_text(encoding="utf-8")) if run_file.exists() else {"results": []}
+        for result in run["results"]:
+            results.append({**result, "shard": meta["shard"]})
+        shards.append({"shard": meta["shard"], "wallMs": run.get("wallMs"), "passed": run.get("passed"),
+                       "total": run.get("total")})
+        for key, ms in run_samples(shard_dir, run):
+            timings.add(key, ms)
+        for path in list(shard_dir.glob("*.jsonl")) + list(shard_dir.glob("*/*.jsonl")):
+            jsonl.setdefault(str(path.relative_to(shard_dir)), []).extend(
+                line for line in path.read_text(encoding="utf-8").splitlines() if line)
+        coverage_file = shard_dir / "coverage" / "coverage-final.json"
+        if coverage_file.exists():
+            merge_coverage(coverage, json.loads(coverage_file.read_text(encoding="utf-8")))
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    timings.save()
+    for relative, lines in jsonl.items():
+        path = out_dir / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    if coverage:
+        (out_dir / "coverage").mkdir(exist_ok=True)
+        (out_dir / "coverage" / "coverage-final.json").write_text(json.dumps(coverage), encoding="utf-8")
+
+    seen: Dict[str, int] = {}
+    for result in results:
+        seen[result["id"]] = seen.get(result["id"], 0) + 1
+    expected = {c for a in manifest["assignments"] for c in a["cases"]} if manifest else set(seen)
+    passed = sum(1 for r in results if r["status"] == "passed")
+    return {
+        "shards": shards,
+        "passed": passed,
+        "total": len(results),
+        "wallMs": max((s["wallMs"] or 0 for s in shards), default=0),
+        # Only TC scripts produce run results; other manifest cases are run by their own drivers
+        "missing": sorted(c for c in expected - set(seen) if c.startswith("TC")),
+        "duplicates": sorted(c for c, n in seen.items() if n > 1),
+        "staleShards": stale,
+        "mergedJsonl": sorted(jsonl),
+        "coverageFiles": len(coverage),
+        "results": sorted(results, key=lambda r: r["id"]),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("plan", help="write a balanced shard manifest")
+    p.add_argument("--shards", type=int, required=True)
+    p.add_argument("--cases", type=Path, help="JSON list of extra case ids or {id, estimateMs}")
+    p.add_argument("--timings", type=Path, default=TIMINGS_FILE, help="timing database with test:<id> durations")
+    p.add_argument("--out", type=Path, default=config.REPORT_DIR / "manifest.json")
+    p = sub.add_parser("list", help="print one shard's case ids")
+    p.add_argument("--manifest", type=Path, required=True)
+    p.add_argument("--shard", type=int, required=True)
+    p = sub.add_parser("collect", help="copy this machine's outputs into the shared store")
+    p.add_argument("--shard", type=int, required=True)
+    p.add_argument("--store", type=Path, required=True)
+    p.add_argument("--manifest", type=Path)
+    p = sub.add_parser("merge", help="combine every collected shard into one report")
+    p.add_argument("--store", type=Path, required=True)
+    p.add_argument("--manifest", type=Path)
+    p.add_argument("--out", type=Path, default=config.REPORT_DIR / "merged")
+    p.add_argument("--base", type=Path, help="timing database the shards started from; this run's samples are added to it")
+    args = parser.parse_args(argv)
+
+    if args.command == "plan":
+        cases = load_cases(args.cases)
+        manifest = plan(estimates(cases, TimingDB(args.timings)), args.shards)
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        for a in manifest["assignments"]:
+            print(f"shard {a['shard']}: {len(a['cases']):>3} cases, ~{a['estimatedMs'] / 1000:.0f} s")
+        print(f"Manifest {manifest['fingerprint']} -> {args.out}")
+        return 0
+    if args.command == "list":
+        print("\n".join(shard_cases(load_manifest(args.manifest), args.shard)))
+        return 0
+    manifest = load_manifest(args.manifest) if args.manifest else None
+    if args.command == "collect":
+        print(f"Collected -> {collect(args.shard, args.store, manifest=manifest)}")
+        return 0
+
+    merged = merge(args.store, manifest, args.out, args.base)
+    path = reporting.write_report("shards_merged", merged)
+    print(f"{merged['passed']}/{merged['total']} passed across {len(merged['shards'])} shards, "
+          f"wall {merged['wallMs'] / 1000:.0f} s -> {path}")
+    for key in ("missing", "duplicates", "staleShards"):
+        if merged[key]:
+            print(f"  {key}: {', '.join(map(str, merged[key]))}")
+    ok = merged["passed"] == merged["total"] and not merged["missing"] and not merged["duplicates"]
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
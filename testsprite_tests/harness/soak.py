@@ -0,0 +1,273 @@
+"""Soak mode: cycle guest, host and admin flows in one long-lived page for hours.
+
+The generated TC scripts are replayed in-process against one shared browser,
+context and page: their ``launch`` / ``new_context`` / ``new_page`` get the
+shared objects and their ``close`` / ``stop`` calls do nothing. Once the app is
+loaded, ``page.goto`` to a path on the same origin becomes a client-side
+navigation (``pushState`` + ``popstate``, which React Router follows), so the
+JS heap lives as long as a dashboard left open all day.
+
+After every cycle the page is sampled through DevTools: JS heap after a forced
+GC, DOM nodes, documents and event listeners, plus open Firestore listeners.
+The report has a least-squares slope per metric and flags metrics whose
+windowed means rise monotonically by more than ``--min-growth``.
+
+    cd testsprite_tests
+    python -m harness.soak --duration 4h
+    python -m harness.soak --cycles 20 --flows TC009 TC010
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from playwright import async_api
+
+from . import browser, config, firestore_traffic, instrument, reporting, runner
+
+DEFAULT_FLOWS = ["TC006", "TC007", "TC009", "TC010", "TC012", "TC015"]
+SAMPLES_FILE = config.REPORT_DIR / "soak" / "samples.jsonl"
+METRICS = ["heapUsedBytes", "domNodes", "documents", "jsEventListeners", "firestoreListeners"]
+
+_CLIENT_NAVIGATE_JS = """
+(path) => {
+  window.history.pushState({}, '', path);
+  window.dispatchEvent(new PopStateEvent('popstate', { state: {} }));
+}
+"""
+
+
+def parse_duration(text: str) -> float:
+    """Seconds for ``90s``, ``45m``, ``4h`` or a bare number of minutes."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*", text)
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid duration {text!r}")
+    value, unit = float(match.group(1)), match.group(2) or "m"
+    return value * {"s": 1, "m": 60, "h": 3600}[unit]
+
+
+# ---------------------------------------------------------------------------
+# Shared browser handed to the TC scripts
+# ---------------------------------------------------------------------------
+
+class _Proxy:
+    def __init__(self, target: Any):
+        self._target = target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+
+class SharedPage(_Proxy):
+    """The long-lived page; same-origin ``goto`` stays inside the running app."""
+
+    async def goto(self, url: str, **kwargs: Any) -> Any:
+        url = instrument.rewrite_url(url)
+        page = self._target
+        current, target = urlparse(page.url), urlparse(url)
+        if current.scheme in ("http", "https") and current.netloc == target.netloc:
+            path = target.path + (f"?{target.query}" if target.query else "")
+            await instrument.run_action_hooks(page, "goto", url)
+            await page.evaluate(_CLIENT_NAVIGATE_JS, path)
+            return None
+        return await page.goto(url, **kwargs)
+
+
+class SharedContext(_Proxy):
+    def __init__(self, context: Any, page: SharedPage):
+        super().__init__(context)
+        self._page = page
+
+    async def new_page(self) -> SharedPage:
+        return self._page
+
+    async def close(self) -> None:
+        pass
+
+
+class SharedBrowser(_Proxy):
+    def __init__(self, session: browser.Session, context: SharedContext):
+        super().__init__(session.browser)
+        self._context = context
+
+    async def new_context(self, **kwargs: Any) -> SharedContext:
+        return self._context
+
+    async def close(self) -> None:
+        pass
+
+
+class SharedPlaywright(_Proxy):
+    def __init__(self, session: browser.Session, shared_browser: SharedBrowser):
+        super().__init__(session.pw)
+        self._browser = shared_browser
+        self.chromium = _Proxy(session.pw.chromium)
+        self.chromium.launch = self._launch
+
+    async def _launch(self, **kwargs: Any) -> SharedBrowser:
+        return self._browser
+
+    async def start(self) -> "SharedPlaywright":
+        return self
+
+    async def stop(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Sampling and trends
+# ---------------------------------------------------------------------------
+
+async def sample(cdp: Any, tracker: firestore_traffic.FirestoreTracker) -> Dict[str, Any]:
+    await cdp.send("HeapProfiler.collectGarbage")
+    heap = await cdp.send("Runtime.getHeapUsage")
+    counters = await cdp.send("Memory.getDOMCounters")
+    return {
+        "heapUsedBytes": heap["usedSize"],
+        "heapTotalBytes": heap["totalSize"],
+        "domNodes": counters["nodes"],
+        "documents": counters["documents"],
+        "jsEventListeners": counters["jsEventListeners"],
+        "firestoreListeners": tracker.open_listeners(),
+    }
+
+
+def least_squares(xs: List[float], ys: List[float]) -> Tuple[float, float]:
+    """Slope and R² of the best-fit line."""
+    n = len(xs)
+    if n < 2:
+        return 0.0, 0.0
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    syy = sum((y - mean_y) ** 2 for y in ys)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    if sxx == 0:
+        return 0.0, 0.0
+    slope = sxy / sxx
+    return slope, (sxy * sxy / (sxx * syy)) if syy else 0.0
+
+
+def trend(samples: List[Dict[str, Any]], metric: str, windows: int, min_growth: float) -> Dict[str, Any]:
+    cycles = [s["cycle"] for s in samples]
+    hours = [s["elapsedS"] / 3600 for s in samples]
+    values = [float(s[metric]) for s in samples]
+    per_cycle, r2 = least_squares(cycles, values)
+    per_hour, _ = least_squares(hours, values)
+    size = max(1, len(values) // windows)
+    means = [sum(chunk) / len(chunk) for chunk in (values[i:i + size] for i in range(0, len(values), size)) if chunk]
+    monotonic = len(means) >= 3 and all(b > a for a, b in zip(means, means[1:]))
+    growth = (means[-1] - means[0]) / means[0] if means and means[0] else float(bool(means and means[-1]))
+    return {
+        "slopePerCycle": per_cycle,
+        "slopePerHour": per_hour,
+        "r2": r2,
+        "first": values[0] if values else None,
+        "last": values[-1] if values else None,
+        "windowMeans": means,
+        "monotonic": monotonic,
+        "growth": growth,
+        "alert": monotonic and growth >= min_growth,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Soak loop
+# ---------------------------------------------------------------------------
+
+async def run(args: argparse.Namespace) -> int:
+    scripts = runner.discover(args.flows)
+    if not scripts:
+        print("No TC scripts matched --flows")
+        return 2
+    flows: List[Tuple[str, Callable[[], Any]]] = [(runner.test_id_for(s), runner.load_flow(s)) for s in scripts]
+
+    instrument.install()
+    session = await browser.open_session()
+    tracker = await firestore_traffic.attach(session.context)
+    page = SharedPage(session.page)
+    context = SharedContext(session.context, page)
+    shared = SharedPlaywright(session, SharedBrowser(session, context))
+    async_api.async_playwright = lambda: shared
+    cdp = await session.context.new_cdp_session(session.page)
+
+    SAMPLES_FILE.parent.mkdir(parents=True, exist_ok=True)
+    SAMPLES_FILE.unlink(missing_ok=True)
+    samples: List[Dict[str, Any]] = []
+    failures: Dict[str, int] = {flow_id: 0 for flow_id, _ in flows}
+    started = time.monotonic()
+    cycle = 0
+    try:
+        while (args.cycles is None or cycle < args.cycles) and \
+                (args.duration is None or time.monotonic() - started < args.duration):
+            cycle += 1
+            statuses = {}
+            for flow_id, flow in flows:
+                try:
+                    await asyncio.wait_for(flow(), timeout=args.flow_timeout)
+                    statuses[flow_id] = "passed"
+                except Exception as exc:  # a failing flow must not end the soak
+                    failures[flow_id] += 1
+                    statuses[flow_id] = f"failed: {str(exc).splitlines()[0][:120] if str(exc) else type(exc).__name__}"
+                    if args.verbose:
+                        traceback.print_exc()
+                # Popups and tabs a flow opened are not part of the long-lived session
+                for extra in session.context.pages:
+                    if extra is not session.page:
+                        await extra.close()
+            point = {"cycle": cycle, "elapsedS": time.monotonic() - started, "url": session.page.url,
+                     **await sample(cdp, tracker), "flows": statuses}
+            samples.append(point)
+            with SAMPLES_FILE.open("a", encoding="utf-8") as handle:
+                handle.write(json.dumps(point) + "\n")
+            print(f"cycle {cycle:>4} {point['elapsedS'] / 60:>6.1f} min  heap {point['heapUsedBytes'] / 2**20:>7.1f} MiB  "
+                  f"nodes {point['domNodes']:>7}  listeners {point['jsEventListeners']:>6}  "
+                  f"firestore {point['firestoreListeners']:>3}  failed {sum(1 for s in statuses.values() if s != 'passed')}")
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("Interrupted, reporting what was sampled")
+    finally:
+        await session.close()
+
+    measured = samples[args.warmup:]
+    trends = {metric: trend(measured, metric, args.windows, args.min_growth) for metric in METRICS} if measured else {}
+    alerts = [metric for metric, t in trends.items() if t["alert"]]
+    path = reporting.write_report("soak", {
+        "flows": [flow_id for flow_id, _ in flows],
+        "cycles": cycle,
+        "warmup": args.warmup,
+        "elapsedS": time.monotonic() - started,
+        "flowFailures": failures,
+        "trends": trends,
+        "alerts": alerts,
+        "samplesFile": str(SAMPLES_FILE),
+    })
+    for metric, t in trends.items():
+        print(f"{metric:<20} {t['slopePerHour']:>+14.1f}/h  R² {t['r2']:.2f}  growth {t['growth']:+.0%}"
+              + ("  ALERT: monotonic growth" if t["alert"] else ""))
+    print(f"Report -> {path}")
+    return 1 if alerts else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flows", nargs="*", default=DEFAULT_FLOWS, help="TC id prefixes to cycle")
+    parser.add_argument("--duration", type=parse_duration, help="stop after e.g. 90m or 4h")
+    parser.add_argument("--cycles", type=int, help="stop after this many cycles")
+    parser.add_argument("--flow-timeout", type=float, default=600, help="seconds before one flow is abandoned")
+    parser.add_argument("--warmup", type=int, default=2, help="cycles left out of the trend analysis")
+    parser.add_argument("--windows", type=int, default=5, help="buckets compared for monotonic growth")
+    parser.add_argument("--min-growth", type=float, default=0.1, help="relative growth that raises an alert")
+    parser.add_argument("--verbose", action="store_true", help="print tracebacks of failing flows")
+    args = parser.parse_args(argv)
+    if args.duration is None and args.cycles is None:
+        parser.error("give --duration and/or --cycles")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""Declarative step plans and a compiled executor.
+
+A flow is a list of steps built with the small DSL below (or loaded from YAML)
+instead of the ``frame = context.pages[-1]; elem = ...; await elem.fill(...)``
+boilerplate in the generated TC scripts:
+
+    PLAN = [
+        goto("/guest/login"),
+        fill(EMAIL, "guest@example.com"),
+        fill(PASSWORD, "12345abc"),
+        click(SIGN_IN),
+        expect_text("Guest Dashboard", timeout=10000),
+    ]
+
+``compile_plan`` turns the list into operations once. Adjacent fills inside the
+same ``<form>`` become one in-page evaluate, and the active page is only looked
+up again after a step that can navigate or open a popup.
+
+    cd testsprite_tests
+    python -m harness.steps plans/tc018_guest_dashboard.py
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import inspect
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from . import browser, reporting
+
+
+# ---------------------------------------------------------------------------
+# Step DSL
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Step:
+    action: str
+    target: Optional[str] = None
+    value: Optional[str] = None
+    timeout: Optional[int] = None
+    note: Optional[str] = None
+
+
+def goto(path: str, timeout: int = 10000, note: Optional[str] = None) -> Step:
+    return Step("goto", path, timeout=timeout, note=note)
+
+
+def fill(selector: str, value: str, note: Optional[str] = None) -> Step:
+    return Step("fill", selector, value, note=note)
+
+
+def click(selector: str, timeout: int = 5000, note: Optional[str] = None) -> Step:
+    return Step("click", selector, timeout=timeout, note=note)
+
+
+def press(selector: str, key: str, note: Optional[str] = None) -> Step:
+    return Step("press", selector, key, note=note)
+
+
+def wait(ms: int, note: Optional[str] = None) -> Step:
+    return Step("wait", timeout=ms, note=note)
+
+
+def expect_text(text: str, timeout: int = 5000, note: Optional[str] = None) -> Step:
+    return Step("expect_text", text, timeout=timeout, note=note)
+
+
+def expect_url(pattern: str, timeout: int = 5000, note: Optional[str] = None) -> Step:
+    return Step("expect_url", pattern, timeout=timeout, note=note)
+
+
+_BUILDERS = {"goto": goto, "fill": fill, "click": click, "press": press, "wait": wait,
+             "expect_text": expect_text, "expect_url": expect_url}
+
+
+# Steps after which context.pages[-1] may be a different page
+_NAVIGATING = {"goto", "click", "press"}
+
+
+# ---------------------------------------------------------------------------
+# Compilation
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Operation:
+    kind: str
+    steps: List[Step]
+    refresh_page: bool = False
+    # For fill batches: [(xpath or css, value)]
+    fields: List[Tuple[str, str]] = field(default_factory=list)
+
+
+@dataclass
+class Plan:
+    name: str
+    operations: List[Operation]
+
+    @property
+    def step_count(self) -> int:
+        return sum(len(op.steps) for op in self.operations)
+
+
+def form_key(selector: str) -> Optional[str]:
+    """XPath prefix up to and including the enclosing ``form`` element, if any."""
+    path = selector[len("xpath="):] if selector.startswith("xpath=") else selector
+    match = re.match(r"^(.*?/form(?:\[\d+\])?)(?:/|$)", path)
+    return match.group(1) if match else None
+
+
+def compile_plan(steps: Sequence[Step], name: str = "plan") -> Plan:
+    operations: List[Operation] = []
+    for step in steps:
+        previous = operations[-1] if operations else None
+        if (
+            step.action == "fill"
+            and previous is not None
+            and previous.kind == "fill_batch"
+            and form_key(step.target or "") is not None
+            and form_key(step.target or "") == form_key(previous.steps[-1].target or "")
+        ):
+            previous.steps.append(step)
+            previous.fields.append((step.target, step.value or ""))
+            continue
+        if step.action == "fill":
+            operations.append(Operation("fill_batch", [step], fields=[(step.target, step.value or "")]))
+        else:
+            operations.append(Operation(step.action, [step], refresh_page=step.action in _NAVIGATING))
+    return Plan(name, operations)
+
+
+# ---------------------------------------------------------------------------
+# Execution
+# ---------------------------------------------------------------------------
+
+# Sets values through the native setter so React's onChange sees them
+_FILL_BATCH_JS = """
+(fields) => {
+  const find = (selector) => selector.startsWith('xpath=')
+    ? document.evaluate(selector.slice(6), document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+    : document.querySelector(selector);
+  const missing = [];
+  for (const [selector, value] of fields) {
+    const el = find(selector);
+    if (!el) { missing.push(selector); continue; }
+    const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+    el.focus();
+    Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, value);
+    el.dispatchEvent(new Event('input', { bubbles: true }));
+    el.dispatchEvent(new Event('change', { bubbles: true }));
+  }
+  return missing;
+}
+"""
+
+
+class PlanFailed(AssertionError):
+    def __init__(self, plan: str, index: int, step: Step, cause: BaseException):
+        detail = step.note or f"{step.action} {step.target or ''}".strip()
+        super().__init__(f"{plan}: step {index + 1} ({detail}) failed: {cause}")
+        self.step = step
+        self.cause = cause
+
+
+def _locator(page: Any, selector: str) -> Any:
+    return page.locator(selector).nth(0)
+
+
+async def execute(plan: Plan, context: Any, page: Any, base_url: Optional[str] = None) -> Dict[str, Any]:
+    """Run ``plan`` and return per-operation timings and protocol round-trip counts.
+
+    ``result["page"]`` is the active page after the last step, for callers that
+    continue the flow by hand.
+    """
+    from . import config
+
+    base_url = base_url or config.BASE_URL
+    timings: List[Dict[str, Any]] = []
+    round_trips = 0
+    index = 0
+    for op in plan.operations:
+        started = time.perf_counter()
+        step = op.steps[0]
+        try:
+            if op.kind == "fill_batch":
+                missing = await page.evaluate(_FILL_BATCH_JS, op.fields)
+                round_trips += 1
+                # Elements not rendered yet fall back to auto-waiting fills
+                for selector, value in op.fields:
+                    if selector in missing:
+                        await _locator(page, selector).fill(value)
+                        round_trips += 1
+            elif op.kind == "goto":
+                url = step.target if step.target.startswith("http") else f"{base_url}{step.target}"
+                await page.goto(url, timeout=step.timeout)
+                round_trips += 1
+            elif op.kind == "click":
+                await _locator(page, step.target).click(timeout=step.timeout)
+                round_trips += 1
+            elif op.kind == "press":
+                await _locator(page, step.target).press(step.value)
+                round_trips += 1
+            elif op.kind == "wait":
+                await page.wait_for_timeout(step.timeout)
+            elif op.kind == "expect_text":
+                await page.locator(f"text={step.target}").first.wait_for(state="visible", timeout=step.timeout)
+                round_trips += 1
+            elif op.kind == "expect_url":
+                await page.wait_for_url(re.compile(step.target), timeout=step.timeout)
+                round_trips += 1
+            else:
+                raise ValueError(f"Unknown step action {op.kind!r}")
+        except Exception as exc:
+            raise PlanFailed(plan.name, index, step, exc) from exc
+
+        if op.refresh_page:
+            page = context.pages[-1]
+        timings.append({"op": op.kind, "steps": len(op.steps), "ms": (time.perf_counter() - started) * 1000})
+        index += len(op.steps)
+    return {"plan": plan.name, "steps": plan.step_count, "operations": len(plan.operations),
+            "roundTrips": round_trips, "timings": timings, "page": page}
+
+
+# ---------------------------------------------------------------------------
+# Loading plan files
+# ---------------------------------------------------------------------------
+
+def load_steps(path: Union[str, Path]) -> List[Step]:
+    """Read ``PLAN`` from a Python plan module, or a list of step mappings from YAML."""
+    path = Path(path)
+    if path.suffix in (".yml", ".yaml"):
+        import yaml
+
+        raw = yaml.safe_load(path.read_text(encoding="utf-8"))
+        return [_yaml_step(item) for item in raw]
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return list(module.PLAN)
+
+
+def login_plan_for(route: str) -> Optional[Path]:
+    """Sign-in plan for a route behind the auth guards (``config.LOGIN_PLANS``), or None."""
+    from . import config
+
+    path = route.split("?", 1)[0]
+    if path.endswith(("/login", "/register")):
+        return None
+    return next((plan for prefix, plan in config.LOGIN_PLANS.items() if path.startswith(prefix)), None)
+
+
+async def sign_in_for(route: str, context: Any, page: Any) -> bool:
+    """Run the sign-in plan ``route`` needs in ``context``; False when it is public."""
+    plan_path = login_plan_for(route)
+    if plan_path is None:
+        return False
+    await execute(compile_plan(load_steps(plan_path), name=plan_path.stem), context, page)
+    return True
+
+
+def _yaml_step(item: Dict[str, Any]) -> Step:
+    """Build a YAML step with the DSL, so defaults match Python plans.
+
+    ``- fill: {target: ..., value: ...}`` maps ``target`` / ``value`` onto the
+    builder's first two arguments (``wait`` takes ``timeout`` as its ``ms``). The
+    short form passes the scalar as the first argument: ``- goto: /guest/login``,
+    ``- wait: 500``.
+    """
+    action, args = next(iter(item.items()))
+    builder = _BUILDERS.get(action)
+    if builder is None:
+        raise ValueError(f"Unknown step action {action!r}")
+    if not isinstance(args, dict):
+        return builder(args)
+    params = list(inspect.signature(builder).parameters)
+    renamed = {"target": params[0]}
+    if action in ("fill", "press"):
+        renamed["value"] = params[1]
+    elif action == "wait":
+        renamed["timeout"] = "ms"
+    return builder(**{renamed.get(key, key): value for key, value in args.items()})
+
+
+async def run(args: argparse.Namespace) -> int:
+    plan = compile_plan(load_steps(args.plan), name=Path(args.plan).stem)
+    print(f"{plan.name}: {plan.step_count} steps compiled into {len(plan.operations)} operations")
+    session = await browser.open_session()
+    try:
+        result = await execute(plan, session.context, session.page)
+    finally:
+        await session.close()
+    result.pop("page")
+    path = reporting.write_report(f"plan_{plan.name}", result)
+    total = sum(t["ms"] for t in result["timings"])
+    print(f"{result['roundTrips']} round-trips, {total:.0f} ms -> {path}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a declarative step plan")
+    parser.add_argument("plan", help="Python module defining PLAN, or a YAML list of steps")
+    return asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
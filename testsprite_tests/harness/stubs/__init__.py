@@ -0,0 +1 @@
+"""Local stand-ins for third-party services the app calls."""
@@ -0,0 +1,304 @@
+"""Threaded HTTP stand-in server with latency and failure injection.
+
+Each stand-in subclasses ``StubServer`` and registers ``(method, pattern)``
+routes. Every request is delayed by a draw from the configured latency
+distribution, may be turned into an injected failure, and is recorded in
+``StubServer.log`` so benchmarks can report what the stand-in saw.
+"""
+
+import email.parser
+import email.policy
+import fnmatch
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class Latency:
+    """Latency distribution in milliseconds, parsed from ``kind:args``.
+
+    ``none``, ``fixed:50``, ``uniform:20:200``, ``normal:100:30`` (mean, stddev)
+    and ``lognormal:80:0.5`` (median, sigma) are supported.
+    """
+
+    def __init__(self, spec: str = "none", rng: Optional[random.Random] = None):
+        self.spec = spec
+        self.rng = rng or random.Random()
+        kind, *args = spec.split(":")
+        if kind == "lognormal" and args and float(args[0]) <= 0:
+            raise ValueError(f"lognormal median must be positive: {spec!r}")
+        self.kind = kind
+        self.args = [float(a) for a in args]
+        expected = {"none": 0, "fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if kind not in expected or len(self.args) != expected[kind]:
+            raise ValueError(f"Unsupported latency spec: {spec!r}")
+
+    def sample(self) -> float:
+        if self.kind == "none":
+            return 0.0
+        if self.kind == "fixed":
+            return self.args[0]
+        if self.kind == "uniform":
+            return self.rng.uniform(*self.args)
+        if self.kind == "normal":
+            return max(0.0, self.rng.gauss(*self.args))
+        median, sigma = self.args
+        return self.rng.lognormvariate(math.log(median), sigma)
+
+    def __repr__(self) -> str:
+        return f"Latency({self.spec!r})"
+
+
+@dataclass
+class FaultProfile:
+    """Latency and error rate for requests whose path matches ``pattern``."""
+
+    pattern: str = "*"
+    latency: Latency = field(default_factory=Latency)
+    error_rate: float = 0.0
+    # "http" answers with the route's error body, "drop" closes the connection
+    error_kind: str = "http"
+
+    def matches(self, path: str) -> bool:
+        return fnmatch.fnmatch(path, self.pattern)
+
+
+@dataclass
+class RequestRecord:
+    method: str
+    path: str
+    status: int
+    injected_delay_ms: float
+    handler_ms: float
+    started_at: float
+    fault: Optional[str] = None
+
+
+class StubResponse:
+    def __init__(self, status: int = 200, body: Any = None, headers: Optional[Dict[str, str]] = None,
+                 content_type: str = "application/json"):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.content_type = content_type
+
+    def encode(self) -> bytes:
+        if self.body is None:
+            return b""
+        if isinstance(self.body, bytes):
+            return self.body
+        if isinstance(self.body, str):
+            return self.body.encode("utf-8")
+        return json.dumps(self.body).encode("utf-8")
+
+
+@dataclass
+class StubRequest:
+    method: str
+    path: str
+    query: Dict[str, List[str]]
+    headers: Dict[str, str]
+    body: bytes
+    params: Dict[str, str] = field(default_factory=dict)
+
+    def json(self) -> Any:
+        return json.loads(self.body or b"{}")
+
+    def form(self) -> Dict[str, str]:
+        return {k: v[0] for k, v in parse_qs(self.body.decode("utf-8")).items()}
+
+
+def parse_multipart(content_type: str, body: bytes) -> Dict[str, Tuple[Optional[str], bytes]]:
+    """``{field: (filename, bytes)}`` for a ``multipart/form-data`` body."""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body)
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        fields[name] = (part.get_filename(), part.get_payload(decode=True) or b"")
+    return fields
+
+
+Handler = Callable[[StubRequest], StubResponse]
+
+
+class StubServer:
+    """Base class for local stand-ins of third-party HTTP APIs."""
+
+    name = "stub"
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, faults: Optional[List[FaultProfile]] = None,
+                 seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        # First matching profile wins, so put specific patterns before "*"
+        self.faults = list(faults or [])
+        self.rng = random.Random(seed)
+        self.log: List[RequestRecord] = []
+        self._log_lock = threading.Lock()
+        self._routes: List[Tuple[str, re.Pattern, Handler]] = []
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.register_routes()
+
+    # -- routing -------------------------------------------------------------
+
+    def register_routes(self) -> None:
+        """Subclasses call ``self.route`` here."""
+
+    def route(self, method: str, pattern: str, handler: Handler) -> None:
+        """Register ``handler`` for ``pattern``; ``{name}`` segments become params."""
+        regex = re.compile("^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", pattern) + "$")
+        self._routes.append((method.upper(), regex, handler))
+
+    def error_response(self, request: StubRequest) -> StubResponse:
+        """Body returned for an injected ``http`` failure; override per API."""
+        return StubResponse(500, {"error": "injected_failure"})
+
+    def reset(self) -> None:
+        with self._log_lock:
+            self.log.clear()
+
+    # -- lifecycle -----------------------------------------------------------
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "StubServer":
+        stub = self
+
+        class _RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args: Any) -> None:  # keep benchmark output clean
+                pass
+
+            def _handle(self) -> None:
+                stub._dispatch(self)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = _handle
+
+        class _Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 1024
+
+        self._httpd = _Server((self.host, self.port), _RequestHandler)
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name=f"{self.name}-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def serve_forever(self) -> None:
+        self.start()
+        print(f"{self.name} stand-in listening on {self.base_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            self.stop()
+
+    # -- request handling ----------------------------------------------------
+
+    def _fault_for(self, path: str) -> Optional[FaultProfile]:
+        for profile in self.faults:
+            if profile.matches(path):
+                return profile
+        return None
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler) -> None:
+        started = time.time()
+        parsed = urlparse(handler.path)
+        length = int(handler.headers.get("Content-Length") or 0)
+        request = StubRequest(
+            method=handler.command,
+            path=parsed.path,
+            query=parse_qs(parsed.query),
+            headers={k.lower(): v for k, v in handler.headers.items()},
+            body=handler.rfile.read(length) if length else b"",
+        )
+
+        fault = self._fault_for(request.path)
+        delay_ms = fault.latency.sample() if fault else 0.0
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+
+        fault_kind = None
+        handler_started = time.time()
+        if request.method == "OPTIONS":
+            response = StubResponse(204)
+        elif fault and fault.error_rate and self.rng.random() < fault.error_rate:
+            fault_kind = fault.error_kind
+            if fault_kind == "drop":
+                self._record(request, 0, delay_ms, started, fault_kind)
+                handler.close_connection = True
+                return
+            response = self.error_response(request)
+        else:
+            response = self._route(request)
+
+        handler_ms = (time.time() - handler_started) * 1000
+        payload = response.encode()
+        handler.send_response(response.status)
+        handler.send_header("Content-Type", response.content_type)
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.send_header("Access-Control-Allow-Origin", "*")
+        handler.send_header("Access-Control-Allow-Headers", "*")
+        handler.send_header("Access-Control-Allow-Methods", "GET, POST, PUT, PATCH, DELETE, OPTIONS")
+        for key, value in response.headers.items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(payload)
+        self._record(request, response.status, delay_ms, started, fault_kind, handler_ms)
+
+    def _route(self, request: StubRequest) -> StubResponse:
+        for method, regex, route_handler in self._routes:
+            match = regex.match(request.path)
+            if match and method == request.method:
+                request.params = match.groupdict()
+                try:
+                    return route_handler(request)
+                except Exception as exc:  # a stand-in bug should surface, not hang the client
+                    return StubResponse(500, {"error": "stub_exception", "message": str(exc)})
+        return StubResponse(404, {"error": "not_found", "path": request.path})
+
+    def _record(self, request: StubRequest, status: int, delay_ms: float, started: float,
+                fault: Optional[str], handler_ms: float = 0.0) -> None:
+        with self._log_lock:
+            self.log.append(RequestRecord(request.method, request.path, status, delay_ms, handler_ms, started, fault))
+
+
+def parse_fault_args(latency: str, error_rate: float, error_kind: str, overrides: List[str],
+                     seed: Optional[int] = None) -> List[FaultProfile]:
+    """Build fault profiles from CLI values.
+
+    ``overrides`` entries look like ``/v2/checkout/orders/*/capture=lognormal:300:0.4,0.1``
+    (pattern = latency spec, optional error rate).
+    """
+    rng = random.Random(seed)
+    profiles = []
+    for item in overrides:
+        pattern, _, spec = item.partition("=")
+        latency_spec, _, rate = spec.partition(",")
+        profiles.append(FaultProfile(pattern, Latency(latency_spec or "none", rng), float(rate or 0.0), error_kind))
+    profiles.append(FaultProfile("*", Latency(latency, rng), error_rate, error_kind))
+    return profiles
@@ -0,0 +1,124 @@
+"""Local Cloudinary stand-in for listing image uploads.
+
+Implements the unsigned upload endpoint ``src/lib/cloudinary.ts`` posts to
+(``/v1_1/<cloud>/image/upload``) and serves what was uploaded back under
+``/<cloud>/image/upload/...``, the ``secure_url`` it returns. On top of the
+usual latency and failure injection, ``bandwidth_kbps`` throttles each upload by
+its body size, so a 4 MB photo costs what it would on a slow uplink.
+
+Browser traffic is redirected with ``route_cloudinary(context, stub)``.
+
+    cd testsprite_tests
+    python -m harness.stubs.cloudinary serve --port 8791 --latency lognormal:150:0.4 --bandwidth 8000
+"""
+
+import argparse
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .base import StubRequest, StubResponse, StubServer, parse_fault_args, parse_multipart
+
+CLOUDINARY_HOSTS = ("https://api.cloudinary.com", "https://res.cloudinary.com")
+
+_CONTENT_TYPES = {"jpg": "image/jpeg", "jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+
+
+class CloudinaryStub(StubServer):
+    name = "cloudinary"
+
+    def __init__(self, *args: Any, bandwidth_kbps: Optional[float] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.bandwidth_kbps = bandwidth_kbps
+        self.assets: Dict[str, Tuple[str, bytes]] = {}
+        self._assets_lock = threading.Lock()
+
+    def register_routes(self) -> None:
+        self.route("POST", "/v1_1/{cloud}/image/upload", self.upload)
+        self.route("GET", "/{cloud}/image/upload/v1/(?P<public_id>.+)\\.(?P<fmt>\\w+)", self.download)
+
+    def error_response(self, request: StubRequest) -> StubResponse:
+        return StubResponse(500, {"error": {"message": "Injected failure (stand-in)"}})
+
+    def upload(self, request: StubRequest) -> StubResponse:
+        if self.bandwidth_kbps:
+            time.sleep(len(request.body) * 8 / (self.bandwidth_kbps * 1000))
+        fields = parse_multipart(request.headers.get("content-type", ""), request.body)
+        if "file" not in fields:
+            return StubResponse(400, {"error": {"message": "Missing required parameter - file"}})
+        if "upload_preset" not in fields:
+            return StubResponse(400, {"error": {"message": "Upload preset must be specified when using unsigned upload"}})
+        filename, data = fields["file"]
+        fmt = (filename or "").rsplit(".", 1)[-1].lower() if filename and "." in filename else "jpg"
+        folder = fields.get("folder", (None, b""))[1].decode("utf-8").strip("/")
+        public_id = f"{folder}/{uuid.uuid4().hex[:20]}" if folder else uuid.uuid4().hex[:20]
+        with self._assets_lock:
+            self.assets[f"{public_id}.{fmt}"] = (fmt, data)
+        cloud = request.params["cloud"]
+        return StubResponse(200, {
+            "public_id": public_id,
+            "version": 1,
+            "format": fmt,
+            "resource_type": "image",
+            "bytes": len(data),
+            "width": 1,
+            "height": 1,
+            "secure_url": f"https://res.cloudinary.com/{cloud}/image/upload/v1/{public_id}.{fmt}",
+            "url": f"http://res.cloudinary.com/{cloud}/image/upload/v1/{public_id}.{fmt}",
+        })
+
+    def download(self, request: StubRequest) -> StubResponse:
+        key = f"{request.params['public_id']}.{request.params['fmt']}"
+        with self._assets_lock:
+            asset = self.assets.get(key)
+        if asset is None:
+            return StubResponse(404, {"error": {"message": "Resource not found"}})
+        fmt, data = asset
+        return StubResponse(200, data, content_type=_CONTENT_TYPES.get(fmt, "application/octet-stream"))
+
+    def uploads(self) -> List[Any]:
+        """Log records of upload requests, for concurrency analysis."""
+        return [r for r in self.log if r.method == "POST" and r.path.endswith("/image/upload")]
+
+
+async def route_cloudinary(context: Any, stub: StubServer) -> None:
+    """Send every Cloudinary upload and image request from ``context`` to ``stub``."""
+
+    async def forward(route: Any) -> None:
+        parsed = urlparse(route.request.url)
+        target = f"{stub.base_url}{parsed.path}" + (f"?{parsed.query}" if parsed.query else "")
+        try:
+            response = await route.fetch(url=target)
+        except Exception:
+            await route.abort("connectionreset")
+            return
+        await route.fulfill(response=response)
+
+    for host in CLOUDINARY_HOSTS:
+        await context.route(f"{host}/**", forward)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local Cloudinary stand-in")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run the stand-in until interrupted")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8791)
+    serve.add_argument("--bandwidth", type=float, default=None, help="upload bandwidth in kbit/s (default unlimited)")
+    serve.add_argument("--latency", default="none", help="e.g. fixed:50, uniform:20:200, lognormal:150:0.4")
+    serve.add_argument("--error-rate", type=float, default=0.0)
+    serve.add_argument("--error-kind", choices=["http", "drop"], default="http")
+    serve.add_argument("--route", action="append", default=[], metavar="PATTERN=LATENCY[,RATE]")
+    serve.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    faults = parse_fault_args(args.latency, args.error_rate, args.error_kind, args.route, args.seed)
+    CloudinaryStub(args.host, args.port, faults=faults, seed=args.seed, bandwidth_kbps=args.bandwidth).serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
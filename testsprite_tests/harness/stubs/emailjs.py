@@ -0,0 +1,283 @@
+"""Local EmailJS stand-in that captures outbound email instead of sending it.
+
+``@emailjs/browser`` posts every ``emailjs.send`` to
+``https://api.emailjs.com/api/v1.0/email/send``. The stand-in answers ``200 OK``
+like EmailJS and keeps each message (service, template, ``template_params``)
+in an in-memory mailbox. Flows can block on one message and read the OTP or
+link straight out of it, so sign-up verification, booking confirmation and
+password reset no longer stop where a real inbox would be needed:
+
+    stub = EmailJSStub().start()
+    await route_emailjs(context, stub)
+    ...  # submit the sign-up form
+    mail = await stub.wait_for_async(to="guest@example.com", template="template_otp", timeout=10)
+    await page.fill(OTP_INPUT, otp_of(mail))
+
+As a runner feature (``--feature emailjs``) every context of a TC script is
+routed to a per-script stand-in, and captured mail plus send latency go to
+``tmp/harness/emailjs/mail.jsonl``. Each context close writes what arrived since
+the previous close, so every message is recorded once. Served standalone, ``GET /emails?to=...&wait=5``
+long-polls the mailbox for tools in other processes.
+
+    cd testsprite_tests
+    python -m harness.stubs.emailjs serve --port 8792 --latency lognormal:250:0.4
+    python -m harness.runner TC001 TC009 --feature emailjs
+    python -m harness.stubs.emailjs report
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from .. import config, reporting
+from .base import StubRequest, StubResponse, StubServer, parse_fault_args, parse_multipart
+
+EMAILJS_HOST = "https://api.emailjs.com"
+RESULTS_FILE = config.REPORT_DIR / "emailjs" / "mail.jsonl"
+
+_OTP = re.compile(r"(?<!\d)\d{6}(?!\d)")
+_URL = re.compile(r"https?://[^\s\"'<>]+")
+
+
+@dataclass
+class Email:
+    id: int
+    service_id: str
+    template_id: str
+    user_id: str
+    params: Dict[str, Any]
+    received_at: float = field(default_factory=time.time)
+
+    @property
+    def to(self) -> str:
+        return str(self.params.get("to_email", ""))
+
+
+def otp_of(mail: Email) -> Optional[str]:
+    """The 6-digit code in ``otp_code`` (``sendOTPEmail``), else the first one in any param."""
+    if mail.params.get("otp_code"):
+        return str(mail.params["otp_code"])
+    for value in mail.params.values():
+        match = _OTP.search(str(value))
+        if match:
+            return match.group(0)
+    return None
+
+
+def link_of(mail: Email, key: Optional[str] = None) -> Optional[str]:
+    """``reset_link`` / ``verification_link`` (or ``key``), else the first URL in any param."""
+    for name in ([key] if key else ["reset_link", "verification_link", "booking_link"]):
+        if mail.params.get(name):
+            return str(mail.params[name])
+    for name, value in mail.params.items():
+        if name != "logo_url":
+            match = _URL.search(str(value))
+            if match:
+                return match.group(0)
+    return None
+
+
+class EmailJSStub(StubServer):
+    name = "emailjs"
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.mailbox: List[Email] = []
+        # Round trips measured by route_emailjs, i.e. what emailjs.send waited for
+        self.client_ms: List[float] = []
+        self._arrived = threading.Condition()
+
+    def register_routes(self) -> None:
+        self.route("POST", "/api/v1.0/email/send", self.send)
+        self.route("POST", "/api/v1.0/email/send-form", self.send)
+        self.route("GET", "/emails", self.list_emails)
+        self.route("DELETE", "/emails", self.clear_emails)
+
+    def error_response(self, request: StubRequest) -> StubResponse:
+        # EmailJS reports failures as plain text; the SDK rejects with {status, text}
+        return StubResponse(500, "The stand-in injected a failure", content_type="text/plain")
+
+    def send(self, request: StubRequest) -> StubResponse:
+        if request.path.endswith("send-form"):
+            fields = {k: v.decode("utf-8", "replace") for k, (_, v) in
+                      parse_multipart(request.headers.get("content-type", ""), request.body).items()}
+            payload = {"service_id": fields.pop("service_id", ""), "template_id": fields.pop("template_id", ""),
+                       "user_id": fields.pop("user_id", ""), "template_params": fields}
+        else:
+            payload = request.json()
+        if not payload.get("service_id") or not payload.get("template_id"):
+            return StubResponse(400, "The service ID and template ID are required", content_type="text/plain")
+        with self._arrived:
+            mail = Email(len(self.mailbox) + 1, payload["service_id"], payload["template_id"],
+                         payload.get("user_id", ""), payload.get("template_params") or {})
+            self.mailbox.append(mail)
+            self._arrived.notify_all()
+        return StubResponse(200, "OK", content_type="text/plain")
+
+    def reset(self) -> None:
+        super().reset()
+        with self._arrived:
+            self.mailbox.clear()
+            self.client_ms.clear()
+
+    # -- mailbox -------------------------------------------------------------
+
+    def find(self, to: Optional[str] = None, template: Optional[str] = None, after: int = 0) -> Optional[Email]:
+        """Latest message with id > ``after`` for recipient ``to`` and/or ``template``."""
+        for mail in reversed(self.mailbox):
+            if mail.id <= after:
+                break
+            if (to is None or mail.to.lower() == to.lower()) and (template is None or mail.template_id == template):
+                return mail
+        return None
+
+    def wait_for(self, to: Optional[str] = None, template: Optional[str] = None, after: int = 0,
+                 timeout: float = 10.0) -> Email:
+        """Block until a matching message arrives; ``after`` skips ids already seen."""
+        deadline = time.monotonic() + timeout
+        with self._arrived:
+            while True:
+                mail = self.find(to, template, after)
+                if mail is not None:
+                    return mail
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No email to {to or 'anyone'} (template {template or 'any'}) within {timeout} s")
+                self._arrived.wait(remaining)
+
+    async def wait_for_async(self, **kwargs: Any) -> Email:
+        return await asyncio.to_thread(self.wait_for, **kwargs)
+
+    def list_emails(self, request: StubRequest) -> StubResponse:
+        to = request.query.get("to", [None])[0]
+        template = request.query.get("template", [None])[0]
+        after = int(request.query.get("after", ["0"])[0])
+        wait = float(request.query.get("wait", ["0"])[0])
+        if wait:
+            try:
+                mail = self.wait_for(to, template, after, wait)
+            except TimeoutError:
+                return StubResponse(404, {"error": "no_matching_email"})
+            return StubResponse(200, [_as_json(mail)])
+        return StubResponse(200, [_as_json(m) for m in self.mailbox if m.id > after
+                                  and (to is None or m.to.lower() == to.lower())
+                                  and (template is None or m.template_id == template)])
+
+    def clear_emails(self, request: StubRequest) -> StubResponse:
+        self.reset()
+        return StubResponse(204)
+
+    def latency(self, log: slice = slice(None), client: slice = slice(None)) -> Dict[str, Any]:
+        """Send latency at the stand-in (injected delay + handling) and as the browser saw it.
+
+        ``log`` / ``client`` restrict it to part of the request log and client timings.
+        """
+        sends = [r for r in self.log[log] if r.path.startswith("/api/v1.0/email/send")]
+        return {
+            "sends": len(sends),
+            "failed": sum(1 for r in sends if r.status != 200),
+            "stubMs": reporting.summarize([r.injected_delay_ms + r.handler_ms for r in sends if r.status == 200]),
+            "clientMs": reporting.summarize(self.client_ms[client]),
+        }
+
+
+def _as_json(mail: Email) -> Dict[str, Any]:
+    return {**asdict(mail), "to": mail.to, "otp": otp_of(mail), "link": link_of(mail)}
+
+
+async def route_emailjs(context: Any, stub: EmailJSStub) -> None:
+    """Send every EmailJS API call from ``context`` to ``stub``."""
+
+    async def forward(route: Any) -> None:
+        parsed = urlparse(route.request.url)
+        started = time.perf_counter()
+        try:
+            response = await route.fetch(url=f"{stub.base_url}{parsed.path}")
+        except Exception:
+            await route.abort("connectionreset")
+            return
+        stub.client_ms.append((time.perf_counter() - started) * 1000)
+        await route.fulfill(response=response)
+
+    await context.route(f"{EMAILJS_HOST}/**", forward)
+
+
+# ---------------------------------------------------------------------------
+# Runner feature
+# ---------------------------------------------------------------------------
+
+def install() -> None:
+    """Runner feature: capture the script's email in a per-process stand-in."""
+    from .. import instrument
+
+    stub = EmailJSStub().start()
+    # The stand-in is shared by every context of the script; each close writes
+    # only what no earlier close has written
+    written = {"mail": 0, "log": 0, "client": 0}
+
+    async def on_context(context: Any) -> None:
+        await route_emailjs(context, stub)
+        context._harness_emailjs = stub
+
+    async def write_summary(context: Any) -> None:
+        if getattr(context, "_harness_emailjs", None) is None:
+            return
+        upto = {"mail": len(stub.mailbox), "log": len(stub.log), "client": len(stub.client_ms)}
+        emails = [_as_json(m) for m in stub.mailbox[written["mail"]:upto["mail"]]]
+        latency = stub.latency(slice(written["log"], upto["log"]), slice(written["client"], upto["client"]))
+        written.update(upto)
+        RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with RESULTS_FILE.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps({"test": instrument.test_id(), "emails": emails, "latency": latency}) + "\n")
+
+    instrument.on_context(on_context)
+    instrument.before_close(write_summary)
+
+
+def reset() -> None:
+    RESULTS_FILE.unlink(missing_ok=True)
+
+
+def load_results() -> List[Dict[str, Any]]:
+    if not RESULTS_FILE.exists():
+        return []
+    return [json.loads(line) for line in RESULTS_FILE.read_text(encoding="utf-8").splitlines() if line]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local EmailJS stand-in")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run the stand-in until interrupted")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8792)
+    serve.add_argument("--latency", default="none", help="e.g. fixed:50, lognormal:250:0.4")
+    serve.add_argument("--error-rate", type=float, default=0.0)
+    serve.add_argument("--seed", type=int, default=None)
+    sub.add_parser("report", help="mail captured by the last --feature emailjs run")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        faults = parse_fault_args(args.latency, args.error_rate, "http", [], args.seed)
+        EmailJSStub(args.host, args.port, faults=faults, seed=args.seed).serve_forever()
+        return 0
+    results = load_results()
+    by_template = Counter(mail["template_id"] for result in results for mail in result["emails"])
+    path = reporting.write_report("emailjs", {"tests": results, "byTemplate": dict(by_template)})
+    for result in results:
+        print(f"{result['test']:<6} {len(result['emails'])} emails"
+              + "".join(f"\n  {m['template_id']} -> {m['to']}" + (f"  otp {m['otp']}" if m["otp"] else "")
+                        for m in result["emails"]))
+    print(f"Report -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,453 @@
+"""Local PayPal stand-in for offline checkout, payout and OAuth flows.
+
+Implements the REST endpoints used by ``functions/src/paypalPayments.ts``,
+``functions/src/paypalPayouts.ts``, ``functions/src/index.ts`` and
+``src/lib/paypalPayoutsClient.ts``, plus a minimal ``/sdk/js`` so the
+``PayPalButtons`` in ``PayPalButton.tsx`` render and complete without paypal.com.
+
+Browser traffic is redirected with ``route_paypal(context, stub)``. For the
+Functions emulator, start it with ``PAYPAL_API_BASE_URL=<stub base url>``.
+
+    cd testsprite_tests
+    python -m harness.stubs.paypal serve --port 8790 --latency lognormal:120:0.5 --error-rate 0.02
+    python -m harness.stubs.paypal bench --flow checkout --concurrency 200 --iterations 2000
+"""
+
+import argparse
+import base64
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode, urlparse
+
+from .. import reporting
+from .base import StubRequest, StubResponse, StubServer, parse_fault_args
+
+# Hosts the app and functions talk to; everything under them goes to the stub
+PAYPAL_HOSTS = (
+    "https://api-m.sandbox.paypal.com",
+    "https://api-m.paypal.com",
+    "https://www.sandbox.paypal.com",
+    "https://www.paypal.com",
+)
+
+# Minimal stand-in for https://www.paypal.com/sdk/js. It renders one button per
+# PayPalButtons instance and drives createOrder/onApprove through the REST
+# routes above, so order creation and capture hit the stub like the real SDK.
+_SDK_JS = r"""
+(function () {
+  var API = 'https://api-m.sandbox.paypal.com';
+  function call(method, path, body) {
+    return fetch(API + path, {
+      method: method,
+      headers: { 'Content-Type': 'application/json', 'Authorization': 'Bearer sdk-client-token' },
+      body: body ? JSON.stringify(body) : undefined
+    }).then(function (res) {
+      return res.json().then(function (data) {
+        if (!res.ok) {
+          var err = new Error((data.details && data.details[0] && data.details[0].issue) || data.message || res.statusText);
+          err.details = data.details;
+          throw err;
+        }
+        return data;
+      });
+    });
+  }
+  function Buttons(options) {
+    var state = { orderID: null };
+    var actions = {
+      order: {
+        create: function (data) { return call('POST', '/v2/checkout/orders', data).then(function (o) { state.orderID = o.id; return o.id; }); },
+        capture: function () { return call('POST', '/v2/checkout/orders/' + state.orderID + '/capture', {}); },
+        get: function () { return call('GET', '/v2/checkout/orders/' + state.orderID); }
+      }
+    };
+    return {
+      isEligible: function () { return true; },
+      close: function () { return Promise.resolve(); },
+      render: function (container) {
+        var host = typeof container === 'string' ? document.querySelector(container) : container;
+        var button = document.createElement('button');
+        button.type = 'button';
+        button.textContent = 'PayPal';
+        button.setAttribute('data-testid', 'paypal-stub-button');
+        button.addEventListener('click', function () {
+          Promise.resolve()
+            .then(function () { return options.createOrder ? options.createOrder({}, actions) : actions.order.create({}); })
+            .then(function (orderID) {
+              state.orderID = state.orderID || orderID;
+              return options.onApprove && options.onApprove({ orderID: state.orderID, payerID: 'STUBPAYER' }, actions);
+            })
+            .catch(function (err) { if (options.onError) options.onError(err); });
+        });
+        if (host) host.appendChild(button);
+        return Promise.resolve();
+      }
+    };
+  }
+  window.paypal = { version: 'stub', Buttons: Buttons, FUNDING: { PAYPAL: 'paypal' } };
+})();
+"""
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+class PayPalStub(StubServer):
+    """In-memory PayPal with orders, captures, payouts and OpenID Connect."""
+
+    name = "paypal"
+
+    def __init__(self, *args: Any, payer_email: str = "stub-buyer@example.com", **kwargs: Any):
+        self.payer_email = payer_email
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.payouts: Dict[str, Dict[str, Any]] = {}
+        # Authorization codes and user access tokens, mapped to the PayPal email they stand for
+        self.identities: Dict[str, str] = {}
+        self._state_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def register_routes(self) -> None:
+        self.route("POST", "/v1/oauth2/token", self.client_token)
+        self.route("POST", "/v1/identity/openidconnect/tokenservice", self.exchange_code)
+        self.route("GET", "/v1/identity/openidconnect/userinfo", self.user_info)
+        self.route("GET", "/webapps/auth/protocol/openidconnect/v1/authorize", self.authorize_redirect)
+        self.route("POST", "/v2/checkout/orders", self.create_order)
+        self.route("GET", "/v2/checkout/orders/{order_id}", self.get_order)
+        self.route("POST", "/v2/checkout/orders/{order_id}/authorize", self.authorize_order)
+        self.route("POST", "/v2/checkout/orders/{order_id}/capture", self.capture_order)
+        self.route("POST", "/v1/payments/payouts", self.create_payout)
+        self.route("GET", "/v1/payments/payouts/{batch_id}", self.get_payout)
+        self.route("GET", "/sdk/js", self.sdk)
+
+    def error_response(self, request: StubRequest) -> StubResponse:
+        if request.path.startswith("/v1/oauth2") or "openidconnect" in request.path:
+            return StubResponse(401, {"error": "invalid_client", "error_description": "Client Authentication failed"})
+        if request.path.endswith("/capture") or request.path.endswith("/authorize"):
+            return StubResponse(422, {
+                "name": "UNPROCESSABLE_ENTITY",
+                "message": "The requested action could not be performed.",
+                "details": [{"issue": "INSTRUMENT_DECLINED", "description": "Injected decline"}],
+            })
+        return StubResponse(500, {"name": "INTERNAL_SERVER_ERROR", "message": "Injected failure"})
+
+    # -- OAuth -----------------------------------------------------------------
+
+    def client_token(self, request: StubRequest) -> StubResponse:
+        if not request.headers.get("authorization", "").startswith("Basic "):
+            return StubResponse(401, {"error": "invalid_client", "error_description": "Missing client credentials"})
+        return StubResponse(200, {
+            "scope": "https://uri.paypal.com/services/payments/payment",
+            "access_token": f"A21-stub-{uuid.uuid4().hex}",
+            "token_type": "Bearer",
+            "app_id": "APP-STUB",
+            "expires_in": 32400,
+            "nonce": uuid.uuid4().hex,
+        })
+
+    def authorize_redirect(self, request: StubRequest) -> StubResponse:
+        redirect_uri = request.query.get("redirect_uri", [""])[0]
+        state = request.query.get("state", [""])[0]
+        code = f"stub-code-{uuid.uuid4().hex[:12]}"
+        with self._state_lock:
+            self.identities[code] = self.payer_email
+        location = f"{redirect_uri}?{urlencode({'code': code, 'state': state})}"
+        return StubResponse(302, None, headers={"Location": location})
+
+    def exchange_code(self, request: StubRequest) -> StubResponse:
+        form = request.form()
+        if form.get("grant_type") != "authorization_code" or not form.get("code"):
+            return StubResponse(400, {"error": "invalid_request", "error_description": "Missing authorization code"})
+        with self._state_lock:
+            email = self.identities.pop(form["code"], self.payer_email)
+        token = f"A21-user-{uuid.uuid4().hex}"
+        with self._state_lock:
+            self.identities[token] = email
+        return StubResponse(200, {
+            "access_token": token,
+            "refresh_token": f"R23-stub-{uuid.uuid4().hex}",
+            "token_type": "Bearer",
+            "expires_in": 32400,
+        })
+
+    def user_info(self, request: StubRequest) -> StubResponse:
+        token = request.headers.get("authorization", "").replace("Bearer ", "")
+        with self._state_lock:
+            email = self.identities.get(token, self.payer_email)
+        return StubResponse(200, {
+            "user_id": f"https://www.paypal.com/webapps/auth/identity/user/{uuid.uuid5(uuid.NAMESPACE_DNS, email).hex}",
+            "name": "Stub Buyer",
+            "email": email,
+            "verified_account": "true",
+        })
+
+    # -- Orders ----------------------------------------------------------------
+
+    def create_order(self, request: StubRequest) -> StubResponse:
+        body = request.json()
+        units = body.get("purchase_units") or [{"amount": {"currency_code": "PHP", "value": "0.00"}}]
+        order_id = uuid.uuid4().hex[:17].upper()
+        order = {
+            "id": order_id,
+            "intent": body.get("intent", "CAPTURE"),
+            "status": "CREATED",
+            "purchase_units": units,
+            "create_time": _now(),
+            "links": [
+                {"href": f"https://www.sandbox.paypal.com/checkoutnow?token={order_id}", "rel": "approve", "method": "GET"},
+                {"href": f"https://api-m.sandbox.paypal.com/v2/checkout/orders/{order_id}", "rel": "self", "method": "GET"},
+            ],
+        }
+        with self._state_lock:
+            self.orders[order_id] = order
+        return StubResponse(201, order)
+
+    def get_order(self, request: StubRequest) -> StubResponse:
+        with self._state_lock:
+            order = self.orders.get(request.params["order_id"])
+        if not order:
+            return StubResponse(404, {"name": "RESOURCE_NOT_FOUND", "details": [{"issue": "INVALID_RESOURCE_ID"}]})
+        return StubResponse(200, order)
+
+    def authorize_order(self, request: StubRequest) -> StubResponse:
+        with self._state_lock:
+            order = self.orders.get(request.params["order_id"])
+            if not order:
+                return StubResponse(404, {"name": "RESOURCE_NOT_FOUND", "details": [{"issue": "INVALID_RESOURCE_ID"}]})
+            order["status"] = "APPROVED"
+            order["payer"] = {"email_address": self.payer_email, "payer_id": "STUBPAYER"}
+            return StubResponse(201, order)
+
+    def capture_order(self, request: StubRequest) -> StubResponse:
+        with self._state_lock:
+            order = self.orders.get(request.params["order_id"])
+            if not order:
+                return StubResponse(404, {"name": "RESOURCE_NOT_FOUND", "details": [{"issue": "INVALID_RESOURCE_ID"}]})
+            if order["status"] == "COMPLETED":
+                return StubResponse(422, {
+                    "name": "UNPROCESSABLE_ENTITY",
+                    "details": [{"issue": "ORDER_ALREADY_CAPTURED"}],
+                    "message": "Order already captured.",
+                })
+            for unit in order["purchase_units"]:
+                unit["payments"] = {"captures": [{
+                    "id": uuid.uuid4().hex[:17].upper(),
+                    "status": "COMPLETED",
+                    "amount": unit.get("amount"),
+                    "final_capture": True,
+                    "create_time": _now(),
+                }]}
+            order["status"] = "COMPLETED"
+            order.setdefault("payer", {"email_address": self.payer_email, "payer_id": "STUBPAYER"})
+            return StubResponse(201, order)
+
+    # -- Payouts ---------------------------------------------------------------
+
+    def create_payout(self, request: StubRequest) -> StubResponse:
+        body = request.json()
+        header = body.get("sender_batch_header", {})
+        batch_id = uuid.uuid4().hex[:13].upper()
+        items = [{
+            "payout_item_id": uuid.uuid4().hex[:13].upper(),
+            "transaction_status": "SUCCESS",
+            "payout_item": item,
+        } for item in body.get("items", [])]
+        batch = {
+            "batch_header": {
+                "payout_batch_id": batch_id,
+                "batch_status": "PENDING",
+                "sender_batch_header": header,
+                "time_created": _now(),
+            },
+            "items": items,
+        }
+        with self._state_lock:
+            self.payouts[batch_id] = batch
+        return StubResponse(201, {"batch_header": batch["batch_header"]})
+
+    def get_payout(self, request: StubRequest) -> StubResponse:
+        with self._state_lock:
+            batch = self.payouts.get(request.params["batch_id"])
+            if not batch:
+                return StubResponse(404, {"name": "INVALID_RESOURCE_ID", "message": "Batch not found"})
+            batch["batch_header"]["batch_status"] = "SUCCESS"
+            return StubResponse(200, batch)
+
+    def sdk(self, request: StubRequest) -> StubResponse:
+        return StubResponse(200, _SDK_JS, content_type="application/javascript")
+
+
+async def route_paypal(context: Any, stub: StubServer) -> None:
+    """Send every PayPal request from ``context`` to ``stub`` instead."""
+
+    async def forward(route: Any) -> None:
+        parsed = urlparse(route.request.url)
+        target = f"{stub.base_url}{parsed.path}" + (f"?{parsed.query}" if parsed.query else "")
+        try:
+            response = await route.fetch(url=target, max_redirects=0)
+        except Exception:
+            # An injected "drop" closes the socket; surface it like a network error
+            await route.abort("connectionreset")
+            return
+        await route.fulfill(response=response)
+
+    for host in PAYPAL_HOSTS:
+        await context.route(f"{host}/**", forward)
+
+
+# ---------------------------------------------------------------------------
+# Concurrency benchmark
+# ---------------------------------------------------------------------------
+
+_BASIC = base64.b64encode(b"stub-client:stub-secret").decode()
+
+# Request sequences the app performs per flow
+FLOWS = {
+    # Guest checkout: SDK create + capture, then processWalletTopUp re-reads the order
+    "checkout": ["token", "create", "capture", "get"],
+    # Listing fee: chargeHostPayPalAccount in paypalPayments.ts
+    "listing-fee": ["token", "create", "authorize", "capture"],
+    # Host withdrawal / booking payout: sendPayPalPayout in paypalPayouts.ts
+    "payout": ["token", "payout"],
+}
+
+
+def _http(method: str, url: str, body: Optional[bytes], headers: Dict[str, str], timeout: float) -> Dict[str, Any]:
+    request = urllib.request.Request(url, data=body, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return {"status": response.status, "body": json.loads(response.read() or b"{}")}
+    except urllib.error.HTTPError as exc:
+        return {"status": exc.code, "body": {}}
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return {"status": 0, "body": {}}
+
+
+def run_flow(base_url: str, flow: str, amount: str = "1500.00", timeout: float = 30.0) -> List[Dict[str, Any]]:
+    """Run one flow and return ``{"step", "status", "ms"}`` per request; stops at the first failure."""
+    steps: List[Dict[str, Any]] = []
+    token = order_id = None
+    for step in FLOWS[flow]:
+        started = time.perf_counter()
+        if step == "token":
+            result = _http("POST", f"{base_url}/v1/oauth2/token", b"grant_type=client_credentials",
+                           {"Authorization": f"Basic {_BASIC}", "Content-Type": "application/x-www-form-urlencoded"}, timeout)
+            token = result["body"].get("access_token")
+        else:
+            headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+            if step == "create":
+                payload = {"intent": "CAPTURE", "purchase_units": [{"amount": {"currency_code": "PHP", "value": amount}}]}
+                result = _http("POST", f"{base_url}/v2/checkout/orders", json.dumps(payload).encode(), headers, timeout)
+                order_id = result["body"].get("id")
+            elif step == "get":
+                result = _http("GET", f"{base_url}/v2/checkout/orders/{order_id}", None, headers, timeout)
+            elif step == "payout":
+                payload = {"sender_batch_header": {"sender_batch_id": uuid.uuid4().hex},
+                           "items": [{"recipient_type": "EMAIL", "receiver": "host@example.com",
+                                      "amount": {"value": amount, "currency": "PHP"}}]}
+                result = _http("POST", f"{base_url}/v1/payments/payouts", json.dumps(payload).encode(), headers, timeout)
+            else:
+                result = _http("POST", f"{base_url}/v2/checkout/orders/{order_id}/{step}", b"{}", headers, timeout)
+        steps.append({"step": step, "status": result["status"], "ms": (time.perf_counter() - started) * 1000})
+        if not 200 <= result["status"] < 300:
+            break
+    return steps
+
+
+def captured_order(base_url: str, amount: str, timeout: float = 30.0) -> str:
+    """Create and capture an order on the stand-in, as the SDK does before ``processWalletTopUp``."""
+    token = _http("POST", f"{base_url}/v1/oauth2/token", b"grant_type=client_credentials",
+                  {"Authorization": f"Basic {_BASIC}", "Content-Type": "application/x-www-form-urlencoded"},
+                  timeout)["body"].get("access_token")
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    payload = {"intent": "CAPTURE", "purchase_units": [{"amount": {"currency_code": "PHP", "value": amount}}]}
+    order_id = _http("POST", f"{base_url}/v2/checkout/orders", json.dumps(payload).encode(), headers, timeout)["body"].get("id")
+    result = _http("POST", f"{base_url}/v2/checkout/orders/{order_id}/capture", b"{}", headers, timeout) if order_id else None
+    if not result or result["status"] != 201:
+        raise RuntimeError(f"PayPal stand-in at {base_url} did not capture an order")
+    return order_id
+
+
+def bench(base_url: str, flow: str, concurrency: int, iterations: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: run_flow(base_url, flow), range(iterations)))
+    wall_s = time.perf_counter() - started
+
+    per_step: Dict[str, List[float]] = {}
+    failures: Dict[str, int] = {}
+    flow_ms: List[float] = []
+    completed = 0
+    for steps in results:
+        for step in steps:
+            per_step.setdefault(step["step"], []).append(step["ms"])
+            if not 200 <= step["status"] < 300:
+                key = f"{step['step']}:{step['status']}"
+                failures[key] = failures.get(key, 0) + 1
+        if len(steps) == len(FLOWS[flow]) and all(200 <= s["status"] < 300 for s in steps):
+            completed += 1
+            flow_ms.append(sum(s["ms"] for s in steps))
+
+    return {
+        "flow": flow,
+        "concurrency": concurrency,
+        "iterations": iterations,
+        "completed": completed,
+        "errorRate": 1 - completed / iterations if iterations else 0.0,
+        "failures": failures,
+        "flowsPerSecond": completed / wall_s if wall_s else 0.0,
+        "flowMs": reporting.summarize(flow_ms),
+        "stepMs": {name: reporting.summarize(values) for name, values in per_step.items()},
+    }
+
+
+def _add_fault_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", default="none", help="e.g. fixed:50, uniform:20:200, lognormal:120:0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-kind", choices=["http", "drop"], default="http")
+    parser.add_argument("--route", action="append", default=[], metavar="PATTERN=LATENCY[,RATE]",
+                        help="per-path override, e.g. '/v2/checkout/orders/*/capture=lognormal:300:0.4,0.1'")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local PayPal stand-in")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run the stand-in until interrupted")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8790)
+    _add_fault_args(serve)
+    load = sub.add_parser("bench", help="drive PayPal flows at high concurrency against a stand-in")
+    load.add_argument("--flow", choices=sorted(FLOWS), default="checkout")
+    load.add_argument("--concurrency", type=int, default=50)
+    load.add_argument("--iterations", type=int, default=500)
+    load.add_argument("--target", help="existing stand-in URL; an in-process one is started otherwise")
+    _add_fault_args(load)
+    args = parser.parse_args(argv)
+
+    faults = parse_fault_args(args.latency, args.error_rate, args.error_kind, args.route, args.seed)
+    if args.command == "serve":
+        PayPalStub(args.host, args.port, faults=faults, seed=args.seed).serve_forever()
+        return 0
+
+    stub = None if args.target else PayPalStub(faults=faults, seed=args.seed).start()
+    try:
+        result = bench(args.target or stub.base_url, args.flow, args.concurrency, args.iterations)
+    finally:
+        if stub:
+            stub.stop()
+    path = reporting.write_report(f"paypal_stub_{args.flow}", result)
+    print(f"{args.flow}: {result['completed']}/{args.iterations} completed, "
+          f"{result['flowsPerSecond']:.1f} flows/s, p95 {result['flowMs']['p95']:.1f} ms -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Network and CPU throttling profile matrix for page-load measurements.
+
+Every key route is loaded cold in a fresh context under each combination of
+network preset (DevTools ``Network.emulateNetworkConditions``) and CPU preset
+(``Emulation.setCPUThrottlingRate``), and load metrics are reported per profile.
+Dashboards redirect signed-out visitors to their login page, so those routes
+are signed into first with the role's login plan (``config.LOGIN_PLANS``),
+unthrottled. The throttled load then starts with the HTTP cache disabled.
+
+    cd testsprite_tests
+    python -m harness.throttling --runs 3
+    python -m harness.throttling --network slow-3g --cpu 4x --route /guest/browse
+"""
+
+import argparse
+import asyncio
+import itertools
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from . import browser, config, reporting, steps
+from .metrics import VITALS_INIT_SCRIPT, read_load_metrics
+
+
+@dataclass(frozen=True)
+class NetworkPreset:
+    name: str
+    latency_ms: float
+    download_kbps: float
+    upload_kbps: float
+
+    def conditions(self) -> Dict[str, Any]:
+        # DevTools takes bytes per second; -1 disables throttling
+        def rate(kbps: float) -> float:
+            return kbps * 1000 / 8 if kbps > 0 else -1
+
+        return {
+            "offline": False,
+            "latency": self.latency_ms,
+            "downloadThroughput": rate(self.download_kbps),
+            "uploadThroughput": rate(self.upload_kbps),
+        }
+
+
+# Values match the Chrome DevTools presets, including their 0.8–0.9 bandwidth factors
+NETWORK_PRESETS = {
+    "none": NetworkPreset("none", 0, 0, 0),
+    "fast-4g": NetworkPreset("fast-4g", 165, 9000 * 0.9, 1500 * 0.9),
+    "fast-3g": NetworkPreset("fast-3g", 562.5, 1600 * 0.9, 750 * 0.9),
+    "slow-3g": NetworkPreset("slow-3g", 2000, 500 * 0.8, 500 * 0.8),
+}
+
+CPU_PRESETS = {"1x": 1, "4x": 4, "6x": 6}
+
+DEFAULT_NETWORK = ["none", "fast-4g", "slow-3g"]
+DEFAULT_CPU = ["1x", "4x"]
+
+
+@dataclass(frozen=True)
+class Profile:
+    network: NetworkPreset
+    cpu_rate: float
+
+    @property
+    def name(self) -> str:
+        return f"{self.network.name}/cpu-{self.cpu_rate:g}x"
+
+
+def build_matrix(networks: List[str], cpus: List[str]) -> List[Profile]:
+    return [Profile(NETWORK_PRESETS[n], CPU_PRESETS[c]) for n, c in itertools.product(networks, cpus)]
+
+
+async def apply_profile(context: Any, page: Any, profile: Profile, disable_cache: bool = True) -> Any:
+    """Throttle ``page`` through a CDP session; call before the first navigation."""
+    cdp = await context.new_cdp_session(page)
+    await cdp.send("Network.enable")
+    await cdp.send("Network.setCacheDisabled", {"cacheDisabled": disable_cache})
+    await cdp.send("Network.emulateNetworkConditions", profile.network.conditions())
+    await cdp.send("Emulation.setCPUThrottlingRate", {"rate": profile.cpu_rate})
+    return cdp
+
+
+async def measure_route(session: browser.Session, profile: Profile, route: str, timeout_ms: int) -> Dict[str, Any]:
+    context = await session.browser.new_context()
+    try:
+        await context.add_init_script(VITALS_INIT_SCRIPT)
+        page = await context.new_page()
+        signed_in = await steps.sign_in_for(route, context, page)
+        await apply_profile(context, page, profile)
+        started = time.perf_counter()
+        error = None
+        try:
+            await page.goto(f"{config.BASE_URL}{route}", wait_until="load", timeout=timeout_ms)
+        except Exception as exc:  # a timeout under slow-3g is a result, not a crash
+            error = str(exc).splitlines()[0]
+        wall_ms = (time.perf_counter() - started) * 1000
+        # Let LCP settle before reading it
+        await page.wait_for_timeout(500)
+        metrics = await read_load_metrics(page)
+        return {"wallMs": wall_ms, "error": error, "signedIn": signed_in, "finalUrl": page.url, **metrics}
+    finally:
+        await context.close()
+
+
+async def run(args: argparse.Namespace) -> int:
+    profiles = build_matrix(args.network, args.cpu)
+    routes = args.route or config.KEY_ROUTES
+    results: Dict[str, Dict[str, Any]] = {}
+
+    session = await browser.open_session()
+    try:
+        for profile in profiles:
+            per_route: Dict[str, Any] = {}
+            for route in routes:
+                samples = [await measure_route(session, profile, route, args.timeout) for _ in range(args.runs)]
+                per_route[route] = {
+                    "samples": samples,
+                    "errors": [s["error"] for s in samples if s["error"]],
+                    "median": {
+                        key: reporting.percentile([s[key] for s in samples], 50)
+                        for key in ("wallMs", "ttfb", "firstContentfulPaint", "largestContentfulPaint",
+                                    "domContentLoaded", "load", "transferBytes", "resourceCount")
+                    },
+                }
+                median = per_route[route]["median"]
+                print(f"{profile.name:<22} {route:<20} load {median['load']:>8.0f} ms  "
+                      f"LCP {median['largestContentfulPaint']:>8.0f} ms  {median['transferBytes'] / 1024:>8.0f} KiB")
+            results[profile.name] = per_route
+    finally:
+        await session.close()
+
+    path = reporting.write_report("throttling_matrix", {
+        "baseUrl": config.BASE_URL,
+        "runs": args.runs,
+        "profiles": {p.name: {"network": p.network.__dict__, "cpuRate": p.cpu_rate} for p in profiles},
+        "results": results,
+    })
+    print(f"Report -> {path}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--network", action="append", choices=sorted(NETWORK_PRESETS),
+                        help=f"network preset (repeatable, default {DEFAULT_NETWORK})")
+    parser.add_argument("--cpu", action="append", choices=sorted(CPU_PRESETS),
+                        help=f"CPU slowdown (repeatable, default {DEFAULT_CPU})")
+    parser.add_argument("--route", action="append", help="route to load (repeatable, default KEY_ROUTES)")
+    parser.add_argument("--runs", type=int, default=3, help="cold loads per route and profile")
+    parser.add_argument("--timeout", type=int, default=120000, help="navigation timeout in ms")
+    args = parser.parse_args(argv)
+    args.network = args.network or DEFAULT_NETWORK
+    args.cpu = args.cpu or DEFAULT_CPU
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""Adaptive per-step timeouts learned from earlier runs.
+
+The generated scripts hard-code ``timeout=5000`` on clicks, ``10000`` on
+``goto`` and anything from 1000 to 30000 ms on ``expect``. With this runner
+feature every step's latency is recorded in the timing database under
+``step:<TC>:<index>:<action>:<selector>``. Once a step has five successful
+samples, its timeout becomes 3 × its p99, clamped to 250-30000 ms, instead of
+the script's literal (``HARNESS_TIMEOUT_MIN_SAMPLES`` / ``_MULTIPLIER`` /
+``_FLOOR_MS`` / ``_CEILING_MS``). A step that used to
+take 60 ms therefore fails after a few hundred ms when it breaks, and a
+slow-but-healthy step is no longer cut off by a too-tight literal.
+
+    cd testsprite_tests
+    python -m harness.runner --feature timeouts --learn-timeouts   # record only
+    python -m harness.runner --feature timeouts                    # enforce
+    python -m harness.timeouts report
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from . import config, reporting
+from .timings import TimingDB
+
+RESULTS_FILE = config.REPORT_DIR / "timeouts" / "steps.jsonl"
+# "adaptive" applies learned timeouts; "learn" records but keeps the scripts' own
+MODE = os.environ.get("HARNESS_TIMEOUT_MODE", "adaptive")
+
+
+@dataclass
+class Policy:
+    multiplier: float = float(os.environ.get("HARNESS_TIMEOUT_MULTIPLIER", "3"))
+    floor_ms: float = float(os.environ.get("HARNESS_TIMEOUT_FLOOR_MS", "250"))
+    ceiling_ms: float = float(os.environ.get("HARNESS_TIMEOUT_CEILING_MS", "30000"))
+    min_samples: int = int(os.environ.get("HARNESS_TIMEOUT_MIN_SAMPLES", "5"))
+    percentile: float = 99
+
+    def timeout_for(self, samples: List[float]) -> Optional[float]:
+        """Learned timeout in ms, or None while the history is too short."""
+        if len(samples) < self.min_samples:
+            return None
+        learned = reporting.percentile(samples, self.percentile) * self.multiplier
+        return round(min(self.ceiling_ms, max(self.floor_ms, learned)))
+
+
+def step_key(test: str, index: int, action: str, target: str) -> str:
+    return f"step:{test}:{index}:{action}:{target[:160]}"
+
+
+class StepTimer:
+    """Numbers the steps of one script and applies the policy to each."""
+
+    def __init__(self, test: str, db: TimingDB, policy: Policy, enforce: bool):
+        self.test = test
+        self.db = db
+        self.policy = policy
+        self.enforce = enforce
+        self.index = 0
+
+    async def run(self, action: str, target: str, call: Callable[..., Awaitable[Any]],
+                  kwargs: Dict[str, Any]) -> Any:
+        self.index += 1
+        key = step_key(self.test, self.index, action, target)
+        script_timeout = kwargs.get("timeout")
+        learned = self.policy.timeout_for(self.db.samples(key))
+        if self.enforce and learned is not None:
+            kwargs = {**kwargs, "timeout": learned}
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await call(**kwargs)
+        except Exception as exc:
+            outcome = "timeout" if "timeout" in f"{type(exc).__name__} {str(exc)[:300]}".lower() else "error"
+            raise
+        finally:
+            _record({
+                "test": self.test,
+                "key": key,
+                "ms": (time.perf_counter() - started) * 1000,
+                "outcome": outcome,
+                "scriptTimeoutMs": script_timeout,
+                "timeoutMs": kwargs.get("timeout"),
+                "learnedMs": learned,
+            })
+
+
+def _record(entry: Dict[str, Any]) -> None:
+    RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with RESULTS_FILE.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(entry) + "\n")
+
+
+# ---------------------------------------------------------------------------
+# Runner feature
+# ---------------------------------------------------------------------------
+
+def _assertion_selector(assertions: Any) -> str:
+    from . import instrument
+
+    impl = getattr(assertions, "_impl_obj", None)
+    actual = getattr(impl, "_actual_locator", None)
+    return getattr(actual, "_selector", None) or instrument.selector_of(assertions)
+
+
+def install() -> None:
+    """Runner feature: time every step and swap in learned timeouts."""
+    from playwright.async_api import Locator, LocatorAssertions, Page
+
+    from . import instrument
+
+    timer = StepTimer(instrument.test_id(), TimingDB(), Policy(), enforce=MODE == "adaptive")
+
+    def timed(cls: Any, name: str, target_of: Callable[[Any, tuple], str]) -> None:
+        original = getattr(cls, name)
+
+        async def method(self: Any, *args: Any, **kwargs: Any) -> Any:
+            return await timer.run(name, target_of(self, args),
+                                   lambda **kw: original(self, *args, **kw), kwargs)
+
+        setattr(cls, name, method)
+
+    for name in ("click", "fill", "press"):
+        timed(Locator, name, lambda self, args: instrument.selector_of(self))
+    timed(Page, "goto", lambda self, args: instrument.rewrite_url(args[0]) if args else "")
+    timed(Page, "wait_for_load_state", lambda self, args: args[0] if args else "load")
+    timed(LocatorAssertions, "to_be_visible", lambda self, args: _assertion_selector(self))
+
+
+def reset() -> None:
+    RESULTS_FILE.unlink(missing_ok=True)
+
+
+def load_results() -> List[Dict[str, Any]]:
+    if not RESULTS_FILE.exists():
+        return []
+    return [json.loads(line) for line in RESULTS_FILE.read_text(encoding="utf-8").splitlines() if line]
+
+
+def finalize() -> None:
+    """Fold this run's successful step latencies into the timing database."""
+    db = TimingDB()
+    for entry in load_results():
+        if entry["outcome"] == "ok":
+            db.add(entry["key"], entry["ms"])
+    db.save()
+
+
+def summarize(results: List[Dict[str, Any]], db: TimingDB, policy: Policy) -> Dict[str, Any]:
+    steps = []
+    for key in db.keys("step:"):
+        samples = db.samples(key)
+        steps.append({"key": key, "samples": len(samples), "p50": reporting.percentile(samples, 50),
+                      "p99": reporting.percentile(samples, 99), "timeoutMs": policy.timeout_for(samples)})
+    failed = [e for e in results if e["outcome"] != "ok"]
+    # Time a failing step would have waited on the script's literal timeout (30 s when none)
+    saved = sum(max(0, (e["scriptTimeoutMs"] or 30000) - e["timeoutMs"]) for e in failed
+                if e["outcome"] == "timeout" and e["timeoutMs"] is not None)
+    return {
+        "mode": MODE,
+        "policy": vars(policy),
+        "lastRun": {"steps": len(results), "adaptive": sum(1 for e in results if e["learnedMs"] is not None),
+                    "failed": failed, "timeoutMsSaved": saved},
+        "steps": steps,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Learned per-step timeouts")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("report", help="learned timeouts and the last run's step outcomes")
+    sub.add_parser("clear", help="forget the last run's step records")
+    args = parser.parse_args(argv)
+
+    if args.command == "clear":
+        reset()
+        return 0
+    policy = Policy()
+    summary = summarize(load_results(), TimingDB(), policy)
+    path = reporting.write_report("timeouts", summary)
+    learned = [s for s in summary["steps"] if s["timeoutMs"] is not None]
+    print(f"{len(learned)}/{len(summary['steps'])} steps have a learned timeout "
+          f"({policy.multiplier:g} x p99, {policy.floor_ms:g}-{policy.ceiling_ms:g} ms)")
+    run = summary["lastRun"]
+    print(f"Last run: {run['steps']} steps, {run['adaptive']} adaptive, {len(run['failed'])} failed, "
+          f"{run['timeoutMsSaved'] / 1000:.1f} s of timeout waiting avoided")
+    for entry in run["failed"][:10]:
+        print(f"  {entry['outcome']:<7} after {entry['ms']:>7.0f} ms  {entry['key'][:100]}")
+    print(f"Report -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Rolling latency history shared across runs and machines.
+
+A ``TimingDB`` is a JSON file mapping a key (``test:TC006``,
+``step:TC006:4:click:...``) to its most recent samples in milliseconds. Shard
+planning reads test durations from it, adaptive timeouts read step latencies,
+and shard merging combines the databases from several machines.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from . import config, reporting
+
+TIMINGS_FILE = Path(os.environ.get("HARNESS_TIMINGS_DB", config.REPORT_DIR / "timings.json"))
+
+# Samples kept per key; old ones age out so the history follows the app
+MAX_SAMPLES = int(os.environ.get("HARNESS_TIMINGS_KEEP", "50"))
+
+
+class TimingDB:
+    def __init__(self, path: Path = TIMINGS_FILE, max_samples: int = MAX_SAMPLES):
+        self.path = Path(path)
+        self.max_samples = max_samples
+        self.entries: Dict[str, List[float]] = {}
+        if self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.entries = {key: list(values) for key, values in data.get("entries", {}).items()}
+
+    def add(self, key: str, ms: float) -> None:
+        samples = self.entries.setdefault(key, [])
+        samples.append(round(ms, 1))
+        del samples[:-self.max_samples]
+
+    def extend(self, key: str, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(key, value)
+
+    def samples(self, key: str) -> List[float]:
+        return self.entries.get(key, [])
+
+    def percentile(self, key: str, pct: float) -> Optional[float]:
+        samples = self.entries.get(key)
+        return reporting.percentile(samples, pct) if samples else None
+
+    def keys(self, prefix: str = "") -> List[str]:
+        return sorted(key for key in self.entries if key.startswith(prefix))
+
+    def merge(self, other: "TimingDB") -> None:
+        for key, values in other.entries.items():
+            self.extend(key, values)
+
+    def save(self) -> Path:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": 1, "entries": self.entries}, sort_keys=True), encoding="utf-8")
+        tmp.replace(self.path)
+        return self.path
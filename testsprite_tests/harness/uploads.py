@@ -0,0 +1,212 @@
+"""Listing image upload benchmark against the local Cloudinary stand-in.
+
+Signs in as a host (``plans/host_login.py``) and opens the create-listing form.
+For every image count × size it then:
+
+1. picks the files through the form's ``#images`` input, so
+   ``handleImageChange`` validates them and renders previews;
+2. uploads the picked ``File`` objects with the app's own ``src/lib/cloudinary.ts``,
+   imported through the Vite dev server. ``app`` mode calls
+   ``uploadListingImages``, the sequential loop the form uses on submit, and
+   ``parallel`` mode calls ``uploadImageToCloudinary`` for all files at once;
+3. samples event-loop lag and long tasks in the page during the upload.
+
+The stand-in's request log gives the concurrency actually achieved: peak
+overlapping uploads and the average number in flight. The form keeps at most 10
+images, but every picked file goes through the upload path, so 11-30 shows how
+that path scales past today's cap.
+
+    cd testsprite_tests
+    python -m harness.uploads --counts 1 5 10 20 30 --sizes 200k 1m 4m
+    python -m harness.uploads --modes app parallel --bandwidth 8000 --latency lognormal:150:0.4
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import browser, config, reporting, steps
+from .stubs.base import parse_fault_args
+from .stubs.cloudinary import CloudinaryStub, route_cloudinary
+
+MODULE_PATH = "/src/lib/cloudinary.ts"
+FORM_PATH = "/host/create-listing/form"
+LOGIN_PLAN = config.SUITE_DIR / "plans" / "host_login.py"
+IMAGE_DIR = config.REPORT_DIR / "uploads" / "images"
+
+# Runs before the app's scripts: keep what the last file input picked, because
+# handleImageChange clears the input right after reading it
+_CAPTURE_FILES_JS = """
+document.addEventListener('change', (event) => {
+  const input = event.target;
+  if (input instanceof HTMLInputElement && input.type === 'file' && input.files) {
+    window.__harnessPickedFiles = Array.from(input.files);
+  }
+}, true);
+"""
+
+_UPLOAD_JS = """
+async ({ modulePath, mode, listingId }) => {
+  const files = window.__harnessPickedFiles || [];
+  const cloudinary = await import(modulePath);
+  const started = performance.now();
+  const progress = [];
+  let worstLag = 0;
+  let last = started;
+  const ticker = setInterval(() => {
+    const now = performance.now();
+    worstLag = Math.max(worstLag, now - last - 50);
+    last = now;
+  }, 50);
+  let longTasks = 0;
+  let longTaskMs = 0;
+  const observer = new PerformanceObserver((list) => {
+    for (const entry of list.getEntries()) { longTasks += 1; longTaskMs += entry.duration; }
+  });
+  try { observer.observe({ type: 'longtask' }); } catch (e) { /* not supported */ }
+  let urls = [];
+  let error = null;
+  try {
+    if (mode === 'parallel') {
+      urls = await Promise.all(files.map((f) => cloudinary.uploadImageToCloudinary(f, `listings/${listingId}`)));
+    } else {
+      urls = await cloudinary.uploadListingImages(files, listingId,
+        (p) => progress.push([Math.round(performance.now() - started), p]));
+    }
+  } catch (e) {
+    error = String((e && e.message) || e);
+  }
+  clearInterval(ticker);
+  observer.disconnect();
+  return { ms: performance.now() - started, picked: files.length, uploaded: urls.length, error, progress,
+           maxLagMs: Math.max(0, worstLag), longTasks, longTaskMs };
+}
+"""
+
+
+def parse_size(text: str) -> int:
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([km]?)", text.lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size {text!r} (e.g. 200k, 1m, 4m)")
+    return int(float(match.group(1)) * {"": 1, "k": 1024, "m": 1024 * 1024}[match.group(2)])
+
+
+def make_images(count: int, size: int, seed: int = 0) -> List[Path]:
+    """``count`` JPEG-typed files of ``size`` bytes; random payload, so nothing compresses."""
+    IMAGE_DIR.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = IMAGE_DIR / f"{size}_{seed}_{i}.jpg"
+        if not path.exists() or path.stat().st_size != size:
+            rng = random.Random(f"{seed}:{size}:{i}")
+            path.write_bytes(b"\xff\xd8\xff\xe0" + rng.randbytes(max(0, size - 6)) + b"\xff\xd9")
+        paths.append(path)
+    return paths
+
+
+def concurrency(records: List[Any]) -> Dict[str, float]:
+    """Peak and mean number of uploads in flight at the stand-in."""
+    spans = [(r.started_at, r.started_at + (r.injected_delay_ms + r.handler_ms) / 1000) for r in records]
+    if not spans:
+        return {"peak": 0, "mean": 0.0}
+    events = sorted([(start, 1) for start, _ in spans] + [(end, -1) for _, end in spans])
+    current = peak = 0
+    for _, delta in events:
+        current += delta
+        peak = max(peak, current)
+    wall = max(end for _, end in spans) - min(start for start, _ in spans)
+    busy = sum(end - start for start, end in spans)
+    return {"peak": peak, "mean": busy / wall if wall > 0 else float(len(spans))}
+
+
+async def run_case(session: browser.Session, stub: CloudinaryStub, count: int, size: int, mode: str,
+                   module_path: str) -> Dict[str, Any]:
+    page = session.page
+    await browser.goto(page, FORM_PATH)
+    await page.locator("#images").wait_for(state="attached", timeout=15000)
+    files = make_images(count, size)
+    stub.reset()
+
+    started = time.perf_counter()
+    await page.set_input_files("#images", [str(p) for p in files])
+    await page.wait_for_function("(n) => (window.__harnessPickedFiles || []).length === n", arg=count)
+    pick_ms = (time.perf_counter() - started) * 1000
+
+    result = await page.evaluate(_UPLOAD_JS, {"modulePath": module_path, "mode": mode,
+                                              "listingId": f"bench-{mode}-{count}-{size}"})
+    uploaded_bytes = count * size
+    return {
+        "mode": mode,
+        "count": count,
+        "sizeBytes": size,
+        "pickMs": pick_ms,
+        "uploadMs": result["ms"],
+        "uploaded": result["uploaded"],
+        "error": result["error"],
+        "throughputMBps": uploaded_bytes / 2**20 / (result["ms"] / 1000) if result["ms"] and not result["error"] else 0.0,
+        "concurrency": concurrency(stub.uploads()),
+        "responsiveness": {"maxLagMs": result["maxLagMs"], "longTasks": result["longTasks"],
+                           "longTaskMs": result["longTaskMs"]},
+        "progress": result["progress"],
+    }
+
+
+async def run(args: argparse.Namespace) -> int:
+    faults = parse_fault_args(args.latency, args.error_rate, "http", [], args.seed)
+    stub = CloudinaryStub(faults=faults, seed=args.seed, bandwidth_kbps=args.bandwidth).start()
+
+    async def prepare(context: Any) -> None:
+        await route_cloudinary(context, stub)
+        await context.add_init_script(_CAPTURE_FILES_JS)
+
+    cases: List[Dict[str, Any]] = []
+    try:
+        session = await browser.open_session(hooks=[prepare])
+        try:
+            plan = steps.compile_plan(steps.load_steps(args.login_plan), name="host_login")
+            await steps.execute(plan, session.context, session.page)
+            for mode in args.modes:
+                for size in args.sizes:
+                    for count in args.counts:
+                        case = await run_case(session, stub, count, size, mode, args.module_path)
+                        cases.append(case)
+                        print(f"{mode:<8} {count:>3} x {size / 1024:>6.0f} KiB  {case['uploadMs']:>8.0f} ms  "
+                              f"{case['throughputMBps']:>6.2f} MiB/s  in flight peak {case['concurrency']['peak']} "
+                              f"mean {case['concurrency']['mean']:.2f}  "
+                              f"max lag {case['responsiveness']['maxLagMs']:.0f} ms"
+                              + (f"  ERROR {case['error']}" if case["error"] else ""))
+        finally:
+            await session.close()
+    finally:
+        stub.stop()
+
+    path = reporting.write_report("uploads", {
+        "stand-in": {"latency": args.latency, "bandwidthKbps": args.bandwidth, "errorRate": args.error_rate},
+        "cases": cases,
+    })
+    print(f"Report -> {path}")
+    return 1 if any(c["error"] for c in cases) else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 5, 10, 20, 30])
+    parser.add_argument("--sizes", type=parse_size, nargs="+", default=[parse_size(s) for s in ("200k", "1m", "4m")],
+                        help="bytes per image, e.g. 200k 1m 4m (the form rejects files over 5 MiB)")
+    parser.add_argument("--modes", nargs="+", choices=["app", "parallel"], default=["app"])
+    parser.add_argument("--bandwidth", type=float, default=None, help="stand-in upload bandwidth in kbit/s")
+    parser.add_argument("--latency", default="lognormal:120:0.3", help="stand-in latency per request")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--login-plan", type=Path, default=LOGIN_PLAN)
+    parser.add_argument("--module-path", default=MODULE_PATH)
+    return asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""Visual regression for the final step of each TC script.
+
+Screenshots are compared against baselines keyed by test, viewport and route.
+The test id keeps two TCs that end on the same route from sharing (and, under
+``--jobs N``, racing on) one baseline:
+
+1. identical PNG bytes (digest match) are skipped without decoding;
+2. a 64-bit difference hash flags frames that changed wholesale;
+3. otherwise both frames are downscaled and diffed per tile with NumPy.
+
+Baselines live in ``testsprite_tests/visual_baselines/<test>/<W>x<H>/<route>.{png,npz}``;
+the ``.npz`` holds the downscaled frame and hashes so a run never re-decodes a
+baseline PNG. Requires ``numpy`` and ``Pillow``.
+
+    cd testsprite_tests
+    python -m harness.runner --feature visual               # compare
+    python -m harness.runner --feature visual --update-baselines
+    python -m harness.visual report
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:  # pragma: no cover - only needed when the feature is used
+    np = None
+    Image = None
+
+from . import config, reporting
+
+BASELINE_DIR = Path(os.environ.get("HARNESS_VISUAL_BASELINES", config.SUITE_DIR / "visual_baselines"))
+RESULTS_FILE = config.REPORT_DIR / "visual" / "results.jsonl"
+
+# Downscale factor, tile edge in downscaled pixels and per-tile mean difference (0-255)
+SCALE = int(os.environ.get("HARNESS_VISUAL_SCALE", "4"))
+TILE = int(os.environ.get("HARNESS_VISUAL_TILE", "16"))
+TILE_THRESHOLD = float(os.environ.get("HARNESS_VISUAL_THRESHOLD", "6"))
+# Hash distance (out of 64) above which the frame is reported changed without tiling
+HASH_CUTOFF = int(os.environ.get("HARNESS_VISUAL_HASH_CUTOFF", "20"))
+
+
+def _require_numpy() -> None:
+    if np is None or Image is None:
+        raise RuntimeError("Visual regression needs numpy and Pillow: pip install numpy pillow")
+
+
+def route_slug(url: str) -> str:
+    path = urlparse(url).path.strip("/") or "root"
+    return re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-").lower()[:80] or "root"
+
+
+def digest(png: bytes) -> str:
+    return hashlib.blake2b(png, digest_size=16).hexdigest()
+
+
+@dataclass
+class Frame:
+    digest: str
+    dhash: int
+    small: Any  # uint8 grayscale, downscaled by SCALE
+
+    @classmethod
+    def from_png(cls, png: bytes) -> "Frame":
+        _require_numpy()
+        image = Image.open(io.BytesIO(png)).convert("L")
+        gray = np.asarray(image, dtype=np.uint8)
+        return cls(digest(png), difference_hash(image), downscale(gray, SCALE))
+
+
+def downscale(gray: Any, factor: int) -> Any:
+    """Block-mean downscale; trailing rows/columns that do not fill a block are dropped."""
+    h, w = gray.shape[0] // factor * factor, gray.shape[1] // factor * factor
+    blocks = gray[:h, :w].reshape(h // factor, factor, w // factor, factor)
+    return blocks.mean(axis=(1, 3)).astype(np.uint8)
+
+
+def difference_hash(image: Any) -> int:
+    small = np.asarray(image.resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def tile_scores(a: Any, b: Any, tile: int = TILE) -> Any:
+    """Mean absolute difference per ``tile`` x ``tile`` block over the overlapping area."""
+    h = min(a.shape[0], b.shape[0]) // tile * tile
+    w = min(a.shape[1], b.shape[1]) // tile * tile
+    diff = np.abs(a[:h, :w].astype(np.int16) - b[:h, :w].astype(np.int16))
+    return diff.reshape(h // tile, tile, w // tile, tile).mean(axis=(1, 3))
+
+
+class BaselineStore:
+    """Baselines on disk with an in-process cache of decoded frames."""
+
+    def __init__(self, root: Path = BASELINE_DIR):
+        self.root = root
+        self._cache: Dict[str, Optional[Frame]] = {}
+
+    def key(self, test: str, viewport: Dict[str, int], url: str) -> str:
+        return f"{test}/{viewport['width']}x{viewport['height']}/{route_slug(url)}"
+
+    def load(self, key: str) -> Optional[Frame]:
+        if key not in self._cache:
+            path = self.root / f"{key}.npz"
+            if path.exists():
+                data = np.load(path)
+                self._cache[key] = Frame(str(data["digest"]), int(data["dhash"]), data["small"])
+            else:
+                self._cache[key] = None
+        return self._cache[key]
+
+    def save(self, key: str, png: bytes, frame: Frame) -> None:
+        path = self.root / f"{key}.npz"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        (self.root / f"{key}.png").write_bytes(png)
+        np.savez_compressed(path, digest=np.array(frame.digest), dhash=np.array(frame.dhash, dtype=np.uint64),
+                            small=frame.small)
+        self._cache[key] = frame
+
+    def compare(self, key: str, png: bytes, update: bool = False) -> Dict[str, Any]:
+        started = time.perf_counter()
+        baseline = self.load(key) if not update else None
+        new_digest = digest(png)
+        if baseline is not None and baseline.digest == new_digest:
+            return {"key": key, "status": "identical", "ms": (time.perf_counter() - started) * 1000}
+
+        frame = Frame.from_png(png)
+        if baseline is None:
+            self.save(key, png, frame)
+            return {"key": key, "status": "recorded", "ms": (time.perf_counter() - started) * 1000}
+
+        distance = hamming(frame.dhash, baseline.dhash)
+        result: Dict[str, Any] = {"key": key, "hashDistance": distance}
+        if distance > HASH_CUTOFF:
+            result.update(status="changed", reason="perceptual hash")
+        else:
+            scores = tile_scores(frame.small, baseline.small)
+            changed = np.argwhere(scores > TILE_THRESHOLD)
+            size_changed = frame.small.shape != baseline.small.shape
+            result.update(
+                status="changed" if len(changed) or size_changed else "match",
+                maxTileScore=float(scores.max()) if scores.size else 0.0,
+                changedTiles=len(changed),
+                # (row, col) in original pixels, enough to find the region by eye
+                changedRegions=[[int(r) * TILE * SCALE, int(c) * TILE * SCALE] for r, c in changed[:20]],
+                sizeChanged=size_changed,
+            )
+        result["ms"] = (time.perf_counter() - started) * 1000
+        if result["status"] == "changed":
+            out = config.REPORT_DIR / "visual" / f"{key}.actual.png"
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_bytes(png)
+            result["actual"] = str(out)
+        return result
+
+
+_store: Optional[BaselineStore] = None
+
+
+def store() -> BaselineStore:
+    global _store
+    if _store is None:
+        _store = BaselineStore()
+    return _store
+
+
+async def capture_final_step(context: Any) -> None:
+    """Screenshot the page the script ended on and compare it with its baseline."""
+    from . import instrument
+
+    if not context.pages:
+        return
+    page = context.pages[-1]
+    viewport = page.viewport_size or {"width": 1280, "height": 720}
+    png = await page.screenshot(full_page=True, animations="disabled", caret="hide")
+    update = os.environ.get("HARNESS_VISUAL_UPDATE") == "1"
+    test = instrument.test_id()
+    result = store().compare(store().key(test, viewport, page.url), png, update=update)
+    result.update(test=test, url=page.url)
+    RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with RESULTS_FILE.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(result) + "\n")
+
+
+def reset() -> None:
+    RESULTS_FILE.unlink(missing_ok=True)
+
+
+def install() -> None:
+    """Runner feature: compare the last page of every context before it closes."""
+    from . import instrument
+
+    _require_numpy()
+    instrument.before_close(capture_final_step)
+
+
+def summarize(lines: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    counts: Dict[str, int] = {}
+    for line in lines:
+        counts[line["status"]] = counts.get(line["status"], 0) + 1
+    changed = [line for line in lines if line["status"] == "changed"]
+    return {"counts": counts, "compareMs": reporting.summarize(line["ms"] for line in lines)}, changed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Visual regression results")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("report", help="summarise the last run's comparisons")
+    sub.add_parser("clear", help="forget the last run's results before a new run")
+    args = parser.parse_args(argv)
+
+    if args.command == "clear":
+        reset()
+        return 0
+    if not RESULTS_FILE.exists():
+        print("No visual results recorded yet")
+        return 0
+    lines = [json.loads(line) for line in RESULTS_FILE.read_text(encoding="utf-8").splitlines() if line]
+    summary, changed = summarize(lines)
+    path = reporting.write_report("visual", {**summary, "changed": changed})
+    print(f"{summary['counts']} in {summary['compareMs']['mean']:.2f} ms mean per frame -> {path}")
+    for line in changed:
+        print(f"  {line['test']}: {line['key']} ({line.get('changedTiles', 'all')} tiles) -> {line.get('actual')}")
+    return 1 if changed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""Fail fast when the page reports an error no later step can recover from.
+
+Console messages, page errors, failed requests, HTTP responses and WebSocket
+errors are matched against a rule set, first match wins. A ``fatal`` match
+records the reason, closes the context (so ``before_close`` features still run)
+and exits the script with ``ABORT_EXIT_CODE``. Without the watchdog, every
+later step would wait out its full timeout. ``benign`` matches and unmatched
+errors are only counted, so the report shows which rules need tuning.
+
+Rules live in ``DEFAULT_RULES``. A JSON list in ``HARNESS_WATCHDOG_RULES`` is
+checked before them, so a project can add fatal patterns or downgrade a default
+to benign. Each rule has a ``name``, a ``level`` (``fatal`` / ``benign``), a
+``source`` (``console`` / ``pageerror`` / ``requestfailed`` / ``response`` /
+``websocket``) and optional ``text`` / ``url`` regexes, ``types`` (console type
+or resource type) and ``minStatus``. ``{base}`` in a ``url`` regex stands for
+the app origin.
+
+    cd testsprite_tests
+    python -m harness.runner --feature watchdog
+    HARNESS_WATCHDOG_RULES=watchdog_rules.json python -m harness.runner --feature watchdog
+    python -m harness.watchdog report
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import config, reporting
+
+RESULTS_FILE = config.REPORT_DIR / "watchdog" / "results.jsonl"
+RULES_FILE = os.environ.get("HARNESS_WATCHDOG_RULES")
+ABORT_EXIT_CODE = 3
+
+# Modules and chunks the app cannot run without: Vite dev paths and the built assets
+_CORE = r"^{base}/(src/|node_modules/\.vite/|@vite/|@react-refresh|assets/|index\.html|$)"
+_DEAD_SERVER = r"net::ERR_(EMPTY_RESPONSE|CONNECTION_REFUSED|CONNECTION_RESET|CONNECTION_CLOSED)"
+
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"name": "core-module-failed", "level": "fatal", "source": "requestfailed", "url": _CORE,
+     "text": r"ERR_(EMPTY_RESPONSE|CONNECTION_REFUSED|CONNECTION_RESET|CONNECTION_CLOSED|INCOMPLETE_CHUNKED)"},
+    {"name": "core-module-failed", "level": "fatal", "source": "console", "types": ["error"],
+     "text": r"Failed to load resource: " + _DEAD_SERVER, "url": _CORE},
+    {"name": "dev-server-websocket", "level": "fatal", "source": "console", "types": ["error"],
+     "text": r"WebSocket connection to 'wss?://[^']*\?token=[^']*' failed.*" + _DEAD_SERVER},
+    {"name": "dev-server-websocket", "level": "fatal", "source": "websocket", "url": r"\?token=",
+     "text": _DEAD_SERVER},
+    {"name": "chunk-import-failed", "level": "fatal", "source": "pageerror",
+     "text": r"Failed to fetch dynamically imported module|Importing a module script failed|ChunkLoadError"},
+    {"name": "server-error", "level": "fatal", "source": "response", "url": _CORE, "minStatus": 500},
+    {"name": "react-router-future-flag", "level": "benign", "source": "console",
+     "text": r"React Router Future Flag Warning"},
+    {"name": "unused-preload", "level": "benign", "source": "console", "text": r"was preloaded using link preload"},
+    # Requests a resource profile blocked on purpose (harness.resources)
+    {"name": "blocked-by-profile", "level": "benign", "source": "requestfailed", "text": r"ERR_BLOCKED_BY_CLIENT"},
+    {"name": "blocked-by-profile", "level": "benign", "source": "console", "text": r"net::ERR_BLOCKED_BY_CLIENT"},
+    # NotFound.tsx logs every unknown route; the tests assert on the page instead
+    {"name": "not-found-route", "level": "benign", "source": "console", "text": r"^404 Error: User attempted"},
+]
+
+
+@dataclass
+class Rule:
+    name: str
+    level: str
+    source: str
+    text: Optional[re.Pattern] = None
+    url: Optional[re.Pattern] = None
+    types: List[str] = field(default_factory=list)
+    min_status: Optional[int] = None
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], base: str = config.BASE_URL) -> "Rule":
+        if data["level"] not in ("fatal", "benign"):
+            raise ValueError(f"rule {data['name']!r}: level must be fatal or benign")
+        url = data.get("url")
+        return cls(
+            name=data["name"],
+            level=data["level"],
+            source=data["source"],
+            text=re.compile(data["text"]) if data.get("text") else None,
+            url=re.compile(url.replace("{base}", re.escape(base))) if url else None,
+            types=data.get("types", []),
+            min_status=data.get("minStatus"),
+        )
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        return (event["source"] == self.source
+                and (not self.types or event.get("type") in self.types)
+                and (self.text is None or bool(self.text.search(event.get("text") or "")))
+                and (self.url is None or bool(self.url.search(event.get("url") or "")))
+                and (self.min_status is None or (event.get("status") or 0) >= self.min_status))
+
+
+def load_rules(path: Optional[str] = RULES_FILE) -> List[Rule]:
+    custom = json.loads(Path(path).read_text(encoding="utf-8")) if path else []
+    return [Rule.from_json(data) for data in custom + DEFAULT_RULES]
+
+
+def classify(rules: List[Rule], event: Dict[str, Any]) -> Optional[Rule]:
+    return next((rule for rule in rules if rule.matches(event)), None)
+
+
+def _is_noise(event: Dict[str, Any]) -> bool:
+    """Events worth counting when no rule matches: errors, not every 200 or log line."""
+    if event["source"] == "console":
+        return event.get("type") not in ("error", "warning")
+    if event["source"] == "response":
+        return (event.get("status") or 0) < 400
+    return False
+
+
+class Watchdog:
+    def __init__(self, test: str, rules: List[Rule]):
+        self.test = test
+        self.rules = rules
+        self.fatal: Optional[Dict[str, Any]] = None
+        self.benign: Counter = Counter()
+        self.unclassified: Counter = Counter()
+
+    def observe(self, event: Dict[str, Any]) -> Optional[Rule]:
+        """Classify one event; returns the rule when it is the first fatal one."""
+        rule = classify(self.rules, event)
+        if rule is None:
+            if not _is_noise(event):
+                detail = f"{event.get('text') or ''} {event.get('url') or ''}".strip()
+                self.unclassified[f"{event['source']}: {detail[:200]}"] += 1
+            return None
+        if rule.level == "benign":
+            self.benign[rule.name] += 1
+            return None
+        if self.fatal is not None:
+            return None
+        self.fatal = {"rule": rule.name, **event}
+        return rule
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "test": self.test,
+            "aborted": self.fatal is not None,
+            "fatal": self.fatal,
+            "benign": dict(self.benign),
+            "unclassified": dict(self.unclassified.most_common(20)),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Runner feature
+# ---------------------------------------------------------------------------
+
+def _write(dog: Watchdog) -> None:
+    RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with RESULTS_FILE.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(dog.summary()) + "\n")
+
+
+async def _abort(context: Any, dog: Watchdog) -> None:
+    fatal = dog.fatal
+    try:
+        await context.close()
+    except Exception:  # the browser may already be gone; the reason is recorded either way
+        pass
+    # Last stderr line, so it becomes the runner's error column
+    print(f"HARNESS WATCHDOG: aborted {dog.test} on {fatal['rule']} "
+          f"({fatal['source']}: {(fatal.get('text') or fatal.get('url') or '')[:200]})", file=sys.stderr)
+    sys.stderr.flush()
+    sys.stdout.flush()
+    os._exit(ABORT_EXIT_CODE)
+
+
+def attach(context: Any, rules: List[Rule]) -> Watchdog:
+    from . import instrument
+
+    dog = Watchdog(instrument.test_id(), rules)
+    context._harness_watchdog = dog
+
+    def observe(event: Dict[str, Any]) -> None:
+        if dog.observe(event) is not None:
+            _write(dog)
+            asyncio.get_running_loop().create_task(_abort(context, dog))
+
+    def on_page(page: Any) -> None:
+        page.on("console", lambda msg: observe({
+            "source": "console", "type": msg.type, "text": msg.text, "url": (msg.location or {}).get("url")}))
+        page.on("pageerror", lambda error: observe({"source": "pageerror", "text": str(error), "url": page.url}))
+        page.on("websocket", lambda ws: ws.on("socketerror", lambda error: observe({
+            "source": "websocket", "text": str(error), "url": ws.url})))
+
+    context.on("page", on_page)
+    for page in context.pages:
+        on_page(page)
+    context.on("requestfailed", lambda request: observe({
+        "source": "requestfailed", "type": request.resource_type, "text": request.failure, "url": request.url}))
+    context.on("response", lambda response: observe({
+        "source": "response", "type": response.request.resource_type, "text": str(response.status),
+        "status": response.status, "url": response.url}))
+    return dog
+
+
+async def _write_summary(context: Any) -> None:
+    dog = getattr(context, "_harness_watchdog", None)
+    if dog is not None and dog.fatal is None:
+        _write(dog)
+
+
+def reset() -> None:
+    RESULTS_FILE.unlink(missing_ok=True)
+
+
+def install() -> None:
+    """Runner feature: abort the script on the first fatal console or network event."""
+    from . import instrument
+
+    rules = load_rules()
+
+    async def on_context(context: Any) -> None:
+        attach(context, rules)
+
+    instrument.on_context(on_context)
+    instrument.before_close(_write_summary)
+
+
+def load_results() -> List[Dict[str, Any]]:
+    if not RESULTS_FILE.exists():
+        return []
+    return [json.loads(line) for line in RESULTS_FILE.read_text(encoding="utf-8").splitlines() if line]
+
+
+def aggregate(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    benign: Counter = Counter()
+    unclassified: Counter = Counter()
+    for result in results:
+        benign.update(result["benign"])
+        unclassified.update(result["unclassified"])
+    return {
+        "aborted": [{"test": r["test"], **r["fatal"]} for r in results if r["aborted"]],
+        "tests": len(results),
+        "benign": dict(benign.most_common()),
+        "unclassified": dict(unclassified.most_common(30)),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Fatal console and network events per test")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("report", help="aborts, benign counts and unmatched errors from the last run")
+    sub.add_parser("clear", help="forget the last run's results")
+    sub.add_parser("rules", help="print the active rule set")
+    args = parser.parse_args(argv)
+
+    if args.command == "clear":
+        reset()
+        return 0
+    if args.command == "rules":
+        for rule in load_rules():
+            print(f"{rule.level:<7} {rule.source:<14} {rule.name}")
+        return 0
+    results = load_results()
+    if not results:
+        print("No watchdog results yet (run with --feature watchdog)")
+        return 0
+    summary = aggregate(results)
+    path = reporting.write_report("watchdog", summary)
+    print(f"{len(summary['aborted'])}/{summary['tests']} tests aborted")
+    for abort in summary["aborted"]:
+        print(f"  {abort['test']}: {abort['rule']} ({(abort.get('text') or abort.get('url') or '')[:100]})")
+    for text, count in list(summary["unclassified"].items())[:5]:
+        print(f"  unmatched x{count}: {text[:110]}")
+    print(f"Report -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
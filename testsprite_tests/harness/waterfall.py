@@ -0,0 +1,299 @@
+"""Request waterfall and critical-path analyzer for key routes.
+
+Records every request during a cold navigation through the DevTools Network
+domain, rebuilds the initiator tree and reports the critical path, duplicate
+fetches, unused preloads and bytes per resource type, plus a short list of
+requests worth cutting or deferring. Routes behind the auth guards are signed
+into first (``config.LOGIN_PLANS``); recording starts after that, with the
+HTTP cache disabled.
+
+    cd testsprite_tests
+    python -m harness.waterfall                      # config.KEY_ROUTES
+    python -m harness.waterfall --route /guest/browse --markdown
+"""
+
+import argparse
+import asyncio
+import re
+import sys
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from . import browser, config, reporting, steps
+
+# Chrome's console wording for the two preload problems seen in raw_report.md
+_UNUSED_PRELOAD = re.compile(r"The resource (\S+) was preloaded using link preload but not used")
+_MISMATCHED_PRELOAD = re.compile(r"A preload for '([^']+)' is found, but is not used because the request credentials mode does not match")
+
+
+@dataclass
+class RequestNode:
+    request_id: str
+    url: str
+    method: str
+    resource_type: str
+    start: float
+    initiator_url: Optional[str]
+    initiator_type: str
+    end: Optional[float] = None
+    status: int = 0
+    encoded_bytes: int = 0
+    failed: Optional[str] = None
+    from_cache: bool = False
+    parent: Optional["RequestNode"] = None
+    children: List["RequestNode"] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return (self.end or self.start) - self.start
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "type": self.resource_type,
+            "startMs": (self.start - origin) * 1000,
+            "endMs": ((self.end or self.start) - origin) * 1000,
+            "durationMs": self.duration * 1000,
+            "status": self.status,
+            "bytes": self.encoded_bytes,
+            "initiator": self.initiator_url,
+            "failed": self.failed,
+        }
+
+
+class NetworkRecorder:
+    """Collects CDP Network events for one page into ``RequestNode`` objects."""
+
+    def __init__(self) -> None:
+        self.nodes: Dict[str, RequestNode] = {}
+        self.order: List[RequestNode] = []
+        self.console: List[str] = []
+
+    async def attach(self, context: Any, page: Any) -> None:
+        cdp = await context.new_cdp_session(page)
+        cdp.on("Network.requestWillBeSent", self._on_request)
+        cdp.on("Network.responseReceived", self._on_response)
+        cdp.on("Network.loadingFinished", self._on_finished)
+        cdp.on("Network.loadingFailed", self._on_failed)
+        await cdp.send("Network.enable")
+        await cdp.send("Network.setCacheDisabled", {"cacheDisabled": True})
+        page.on("console", lambda msg: self.console.append(msg.text))
+
+    def _on_request(self, event: Dict[str, Any]) -> None:
+        request_id = event["requestId"]
+        previous = self.nodes.get(request_id)
+        if previous and event.get("redirectResponse"):
+            # Redirect hops reuse the request id; close the hop, it stays in self.order
+            previous.end = event["timestamp"]
+            previous.status = event["redirectResponse"].get("status", 0)
+        initiator = event.get("initiator", {})
+        initiator_url = initiator.get("url")
+        stack = initiator.get("stack")
+        while not initiator_url and stack:
+            frames = stack.get("callFrames") or []
+            initiator_url = next((f["url"] for f in frames if f.get("url")), None)
+            stack = stack.get("parent")
+        if previous and event.get("redirectResponse"):
+            initiator_url = previous.url
+        node = RequestNode(
+            request_id=request_id,
+            url=event["request"]["url"],
+            method=event["request"]["method"],
+            resource_type=event.get("type", "Other"),
+            start=event["timestamp"],
+            initiator_url=initiator_url,
+            initiator_type=initiator.get("type", "other"),
+        )
+        self.nodes[request_id] = node
+        self.order.append(node)
+
+    def _on_response(self, event: Dict[str, Any]) -> None:
+        node = self.nodes.get(event["requestId"])
+        if node:
+            response = event["response"]
+            node.status = response.get("status", 0)
+            node.from_cache = bool(response.get("fromDiskCache") or response.get("fromServiceWorker"))
+            node.resource_type = event.get("type", node.resource_type)
+
+    def _on_finished(self, event: Dict[str, Any]) -> None:
+        node = self.nodes.get(event["requestId"])
+        if node:
+            node.end = event["timestamp"]
+            node.encoded_bytes = int(event.get("encodedDataLength", 0))
+
+    def _on_failed(self, event: Dict[str, Any]) -> None:
+        node = self.nodes.get(event["requestId"])
+        if node:
+            node.end = event["timestamp"]
+            node.failed = event.get("errorText", "failed")
+
+
+def link_initiators(nodes: List[RequestNode]) -> None:
+    """Point each request at the latest earlier request for its initiator URL."""
+    by_url: Dict[str, List[RequestNode]] = defaultdict(list)
+    for node in nodes:
+        by_url[node.url].append(node)
+    for node in nodes:
+        candidates = [c for c in by_url.get(node.initiator_url or "", []) if c is not node and c.start <= node.start]
+        if candidates:
+            node.parent = candidates[-1]
+            node.parent.children.append(node)
+
+
+def is_streaming(node: RequestNode) -> bool:
+    """Firestore WebChannel long-polls and sockets stay open and never end a load."""
+    return node.resource_type in ("WebSocket", "EventSource") or "/channel" in node.url
+
+
+def critical_path(nodes: List[RequestNode]) -> List[RequestNode]:
+    """Chain of initiators ending at the request that finished last."""
+    finished = [n for n in nodes if n.end is not None and not is_streaming(n)]
+    if not finished:
+        return []
+    node: Optional[RequestNode] = max(finished, key=lambda n: n.end or 0)
+    chain = []
+    while node is not None:
+        chain.append(node)
+        node = node.parent
+    return list(reversed(chain))
+
+
+def longest_chain(nodes: List[RequestNode]) -> List[RequestNode]:
+    """Deepest initiator chain; long chains mean late-discovered resources."""
+    best: List[RequestNode] = []
+    for node in nodes:
+        chain = []
+        current: Optional[RequestNode] = node
+        while current is not None:
+            chain.append(current)
+            current = current.parent
+        if len(chain) > len(best):
+            best = chain
+    return list(reversed(best))
+
+
+def analyze(recorder: NetworkRecorder, route: str) -> Dict[str, Any]:
+    nodes = recorder.order
+    link_initiators(nodes)
+    origin = min((n.start for n in nodes), default=0.0)
+    path = critical_path(nodes)
+    chain = longest_chain(nodes)
+
+    # Preflights and redirect hops are not duplicates
+    counted = Counter((n.method, n.url) for n in nodes if n.method != "OPTIONS" and n.status not in (301, 302, 307, 308))
+    duplicates = [{"url": url, "method": method, "count": count} for (method, url), count in counted.items() if count > 1]
+
+    unused = sorted({m.group(1) for text in recorder.console for m in [_UNUSED_PRELOAD.search(text)] if m})
+    mismatched = sorted({m.group(1) for text in recorder.console for m in [_MISMATCHED_PRELOAD.search(text)] if m})
+
+    bytes_by_type: Dict[str, int] = defaultdict(int)
+    count_by_type: Dict[str, int] = defaultdict(int)
+    for node in nodes:
+        bytes_by_type[node.resource_type] += node.encoded_bytes
+        count_by_type[node.resource_type] += 1
+
+    app_host = config.BASE_URL.split("//", 1)[-1]
+    suggestions = []
+    for url in mismatched:
+        suggestions.append(f"Preload for {url} is fetched twice: match its crossorigin attribute to the module request or drop it")
+    for url in unused:
+        if url not in mismatched:
+            suggestions.append(f"Preload for {url} is never used: remove it or give it the right `as` value")
+    for dup in duplicates:
+        suggestions.append(f"{dup['url']} is fetched {dup['count']} times: cache or share the response")
+    for node in path:
+        if app_host not in node.url and node.resource_type in ("Stylesheet", "Script", "Font"):
+            suggestions.append(f"Third-party {node.resource_type.lower()} {node.url} is on the critical path: defer or self-host it")
+    if len(chain) > 4:
+        suggestions.append(f"Initiator chain is {len(chain)} requests deep ending at {chain[-1].url}: "
+                           "modulepreload the late-discovered chunks")
+
+    return {
+        "route": route,
+        "requests": len(nodes),
+        "totalBytes": sum(n.encoded_bytes for n in nodes),
+        "finishMs": (max((n.end or n.start for n in nodes), default=origin) - origin) * 1000,
+        "criticalPath": [n.to_dict(origin) for n in path],
+        "longestChain": [n.url for n in chain],
+        "duplicates": duplicates,
+        "unusedPreloads": unused,
+        "credentialMismatchPreloads": mismatched,
+        "failed": [n.to_dict(origin) for n in nodes if n.failed],
+        "bytesByType": dict(bytes_by_type),
+        "countByType": dict(count_by_type),
+        "suggestions": suggestions,
+        "waterfall": [n.to_dict(origin) for n in nodes],
+    }
+
+
+def render_markdown(result: Dict[str, Any], width: int = 50) -> str:
+    """ASCII waterfall of the critical path plus the summary lists."""
+    lines = [f"### {result['route']}", "",
+             f"{result['requests']} requests, {result['totalBytes'] / 1024:.0f} KiB, last byte at {result['finishMs']:.0f} ms", ""]
+    span = max(result["finishMs"], 1.0)
+    lines.append("Critical path:")
+    lines.append("```")
+    for entry in result["criticalPath"]:
+        left = int(entry["startMs"] / span * width)
+        bar = max(1, int(entry["durationMs"] / span * width))
+        lines.append(f"{' ' * left}{'#' * bar:<{width - left}} {entry['durationMs']:>7.0f} ms  {entry['url'][-70:]}")
+    lines.append("```")
+    for title, key in (("Duplicate fetches", "duplicates"), ("Unused preloads", "unusedPreloads"), ("Suggestions", "suggestions")):
+        if result[key]:
+            lines.append(f"{title}:")
+            lines.extend(f"- {item if isinstance(item, str) else item['url'] + ' x' + str(item['count'])}" for item in result[key])
+    lines.append("")
+    lines.append("| type | requests | KiB |")
+    lines.append("| --- | ---: | ---: |")
+    for kind, size in sorted(result["bytesByType"].items(), key=lambda kv: -kv[1]):
+        lines.append(f"| {kind} | {result['countByType'][kind]} | {size / 1024:.0f} |")
+    return "\n".join(lines)
+
+
+async def record_route(session: browser.Session, route: str, settle_ms: int) -> NetworkRecorder:
+    context = await session.browser.new_context()
+    try:
+        page = await context.new_page()
+        await steps.sign_in_for(route, context, page)
+        recorder = NetworkRecorder()
+        await recorder.attach(context, page)
+        await page.goto(f"{config.BASE_URL}{route}", wait_until="load", timeout=60000)
+        # Unused-preload warnings are emitted a few seconds after load
+        await page.wait_for_timeout(settle_ms)
+        return recorder
+    finally:
+        await context.close()
+
+
+async def run(args: argparse.Namespace) -> int:
+    routes = args.route or config.KEY_ROUTES
+    results = []
+    session = await browser.open_session()
+    try:
+        for route in routes:
+            results.append(analyze(await record_route(session, route, args.settle), route))
+    finally:
+        await session.close()
+
+    for result in results:
+        if args.markdown:
+            print(render_markdown(result))
+        else:
+            print(f"{result['route']:<20} {result['requests']:>4} req  {result['totalBytes'] / 1024:>7.0f} KiB  "
+                  f"critical path {len(result['criticalPath'])} hops  {len(result['suggestions'])} suggestions")
+    path = reporting.write_report("waterfall", {"baseUrl": config.BASE_URL, "routes": results})
+    print(f"Report -> {path}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--route", action="append", help="route to record (repeatable, default KEY_ROUTES)")
+    parser.add_argument("--settle", type=int, default=4000, help="ms to keep recording after load")
+    parser.add_argument("--markdown", action="store_true", help="print ASCII waterfalls instead of one-line summaries")
+    return asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Declarative step plans for ``harness.steps`` (one flow per module, exported as ``PLAN``)."""
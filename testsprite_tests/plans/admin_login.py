@@ -0,0 +1,13 @@
+"""Admin sign-in with the TC013 credentials, ending on the admin dashboard."""
+
+from harness.steps import click, expect_url, fill, goto
+
+from plans.selectors import ADMIN_LOGIN_EMAIL, ADMIN_LOGIN_PASSWORD, ADMIN_LOGIN_SUBMIT
+
+PLAN = [
+    goto("/admin/login"),
+    fill(ADMIN_LOGIN_EMAIL, "admin@stayhub.com"),
+    fill(ADMIN_LOGIN_PASSWORD, "12345abc"),
+    click(ADMIN_LOGIN_SUBMIT, note="Sign In as Admin"),
+    expect_url(r"/admin/dashboard", timeout=15000),
+]
@@ -0,0 +1,13 @@
+"""Guest sign-in with the TC001 credentials, ending on the guest dashboard."""
+
+from harness.steps import click, expect_url, fill, goto
+
+from plans.selectors import LOGIN_EMAIL, LOGIN_PASSWORD, LOGIN_SUBMIT
+
+PLAN = [
+    goto("/guest/login"),
+    fill(LOGIN_EMAIL, "guest@example.com"),
+    fill(LOGIN_PASSWORD, "12345abc"),
+    click(LOGIN_SUBMIT, note="Sign In"),
+    expect_url(r"/guest/dashboard", timeout=15000),
+]
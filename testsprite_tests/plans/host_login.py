@@ -0,0 +1,13 @@
+"""Host sign-in with the TC004 credentials, ending on the host dashboard."""
+
+from harness.steps import click, expect_url, fill, goto
+
+from plans.selectors import LOGIN_EMAIL, LOGIN_PASSWORD, LOGIN_SUBMIT
+
+PLAN = [
+    goto("/host/login"),
+    fill(LOGIN_EMAIL, "host@example.com"),
+    fill(LOGIN_PASSWORD, "12345abc"),
+    click(LOGIN_SUBMIT, note="Sign In"),
+    expect_url(r"/host/dashboard", timeout=15000),
+]
@@ -0,0 +1,32 @@
+"""XPath selectors shared by the plans, taken from the generated TC scripts."""
+
+LOGIN_FORM = "xpath=html/body/div/div[2]/div[2]/div/div[3]/div/div[2]/form"
+LOGIN_EMAIL = f"{LOGIN_FORM}/div/div/input"
+LOGIN_PASSWORD = f"{LOGIN_FORM}/div[2]/div/input"
+LOGIN_SUBMIT = f"{LOGIN_FORM}/button"
+
+# The admin login page has no tabs above its form (TC013)
+ADMIN_LOGIN_FORM = "xpath=html/body/div/div[2]/div[2]/div/div[3]/form"
+ADMIN_LOGIN_EMAIL = f"{ADMIN_LOGIN_FORM}/div/div/input"
+ADMIN_LOGIN_PASSWORD = f"{ADMIN_LOGIN_FORM}/div[2]/div/input"
+ADMIN_LOGIN_SUBMIT = f"{ADMIN_LOGIN_FORM}/button"
+
+FOOTER_LINKS = "xpath=html/body/div/div[2]/footer/div/div/div[2]/ul"
+FOOTER_GUEST_DASHBOARD = f"{FOOTER_LINKS}/li[3]/a"
+FOOTER_HOST_DASHBOARD = f"{FOOTER_LINKS}/li[4]/a"
+
+# Guest browse filters (BrowseListings / AdvancedFilter)
+CATEGORY_CHIP = 'button.rounded-full:text-is("{label}")'
+SHOW_ADVANCED = 'button:has-text("Advanced Filters")'
+MIN_PRICE = "#minPrice"
+APPLY_FILTERS = 'button:text-is("Apply Filters")'
+RESET_FILTERS = 'button:text-is("Reset")'
+
+# react-day-picker v8 in the host calendar
+CALENDAR_DAY = 'button[name="day"] >> nth={index}'
+CALENDAR_NEXT = 'button[name="next-month"]'
+CALENDAR_PREVIOUS = 'button[name="previous-month"]'
+CALENDAR_TODAY = 'button:text-is("Today")'
+
+# NotificationBell in the dashboards' headers
+NOTIFICATION_BELL = 'button[aria-label^="Notifications"]'
@@ -0,0 +1,22 @@
+"""TC006 interactions: category chips and advanced filters on the guest browse page."""
+
+from harness.steps import click, expect_text, goto, press
+
+from plans.guest_login import PLAN as GUEST_LOGIN
+from plans.selectors import APPLY_FILTERS, CATEGORY_CHIP, MIN_PRICE, RESET_FILTERS, SHOW_ADVANCED
+
+PLAN = [
+    *GUEST_LOGIN,
+    goto("/guest/browse"),
+    expect_text("Browse Listings", timeout=15000),
+    click(CATEGORY_CHIP.format(label="Home"), note="Home category"),
+    click(CATEGORY_CHIP.format(label="Experience"), note="Experience category"),
+    click(CATEGORY_CHIP.format(label="All"), note="All categories"),
+    click(SHOW_ADVANCED, note="Show advanced filters"),
+    # Key presses rather than fill(): they are trusted input, so each one is an interaction
+    press(MIN_PRICE, "5"),
+    press(MIN_PRICE, "0"),
+    press(MIN_PRICE, "0"),
+    click(APPLY_FILTERS, note="Apply Filters"),
+    click(RESET_FILTERS, note="Reset filters"),
+]
@@ -0,0 +1,13 @@
+"""TC010 interactions: open and close the notification center on the guest dashboard."""
+
+from harness.steps import click
+
+from plans.guest_login import PLAN as GUEST_LOGIN
+from plans.selectors import NOTIFICATION_BELL
+
+PLAN = [
+    *GUEST_LOGIN,
+    click(NOTIFICATION_BELL, note="Open notification center"),
+    click(NOTIFICATION_BELL, note="Close notification center"),
+    click(NOTIFICATION_BELL, note="Reopen notification center"),
+]
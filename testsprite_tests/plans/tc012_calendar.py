@@ -0,0 +1,18 @@
+"""TC012 interactions: month navigation and day clicks on the host calendar."""
+
+from harness.steps import click, expect_text, goto
+
+from plans.host_login import PLAN as HOST_LOGIN
+from plans.selectors import CALENDAR_DAY, CALENDAR_NEXT, CALENDAR_PREVIOUS, CALENDAR_TODAY
+
+PLAN = [
+    *HOST_LOGIN,
+    goto("/host/calendar"),
+    expect_text("Booking Calendar", timeout=15000),
+    click(CALENDAR_NEXT, note="Next month"),
+    click(CALENDAR_NEXT, note="Next month"),
+    click(CALENDAR_PREVIOUS, note="Previous month"),
+    click(CALENDAR_DAY.format(index=10), note="Day 11 of the grid"),
+    click(CALENDAR_DAY.format(index=17), note="Day 18 of the grid"),
+    click(CALENDAR_TODAY, note="Today"),
+]
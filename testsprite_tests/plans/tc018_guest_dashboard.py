@@ -0,0 +1,15 @@
+"""TC018 as data: footer link to the guest login, sign in, land on the dashboard."""
+
+from harness.steps import click, expect_url, fill, goto
+
+from plans.selectors import FOOTER_GUEST_DASHBOARD, LOGIN_EMAIL, LOGIN_PASSWORD, LOGIN_SUBMIT
+
+PLAN = [
+    goto("/"),
+    click(FOOTER_GUEST_DASHBOARD, note="Guest Dashboard link in the footer"),
+    # These two fills share the login form and run as one in-page round-trip
+    fill(LOGIN_EMAIL, "guest@example.com"),
+    fill(LOGIN_PASSWORD, "12345abc"),
+    click(LOGIN_SUBMIT, note="Sign In"),
+    expect_url(r"/guest/dashboard", timeout=15000),
+]